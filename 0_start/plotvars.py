@@ -9,6 +9,10 @@ from math import *
 from ROOT import *
 from histutil import *
 from time import sleep
+import numpy as np
+from columnutil import weightedMeanStd
+from columncache import readCached
+from arrayhist import histogram2dPairs, setContent
 #------------------------------------------------------------------
 # potential discriminating variables
 VARS = '''
@@ -21,64 +25,36 @@ f_lept1_pt
 '''
 VARS = map(strip, split(strip(VARS),'\n'))
 #------------------------------------------------------------------
-# read data, cache them, and normalize them
+# read data into arrays and normalize them
 def readData(filename, treename, d1=None, d2=None):
     print '\n=> reading file %s' % filename
-    ntuple = Ntuple(filename, treename)
-    accumulate = d1 == None
-    if accumulate:
-        d1 = [0.0]*len(VARS)
-        d2 = [0.0]*len(VARS)
-    data  = []
-    total = 0
-    weight= 0.0
-    for event in ntuple:
-        if not (event.f_massjj > 0): continue
-        
-        if total % 5000 == 0: print total
-            
-        total  += 1
-        weight += event.f_weight
-        
-        d = [0]*len(VARS)
-        for i, var in enumerate(VARS):
-            x = eval('event.%s' % var)
-            if accumulate: 
-                d1[i] += x * event.f_weight
-                d2[i] += x*x * event.f_weight
-            d[i]   = x
-            
-        data.append((d, event.f_weight))
-    print "unweighted count: %d\tweighted count: %8.2f" % (total, weight)
+    columns = readCached(filename, treename, VARS + ['f_weight'],
+                         'f_massjj>0')
+    X = np.column_stack([columns[var] for var in VARS])
+    w = np.array(columns['f_weight'])
+    print "unweighted count: %d\tweighted count: %8.2f" % (len(w), w.sum())
 
-    for i, var in enumerate(VARS):
-        if accumulate:
-            d1[i] /= weight
-            d2[i] /= weight
-            d2[i]  = sqrt(d2[i]-d1[i]*d1[i])
-        
-    for d, w in data:
-        for i, x in enumerate(d):
-            d[i] = (x - d1[i])/d2[i]
-    return (data, d1, d2)
+    if d1 is None:
+        d1, d2 = weightedMeanStd(X, w)
+    X = (X - d1) / d2
+    return ((X, w), d1, d2)
 #------------------------------------------------------------------
-# fill 2-D histograms
-def fill(canvas, h, data, maxrows=2000):
-    for index, (d, w) in enumerate(data):
-        ih = 0
-        for ii in xrange(len(d)):
-            x = d[ii]
-            for jj in xrange(ii+1, len(d)):
-                y = d[jj]
-                h[ih].Fill(x, y)
-                ih += 1
-        if index % 500 == 0:
-            print index
-            for ih in xrange(len(h)):
-                canvas.cd(ih+1)
-                h[ih].Draw('p')
-            canvas.Update()
-        if index > maxrows: break
+# fill 2-D histograms, one per pair of variables, using all events.
+# the binning is taken from the histograms, which must all have the
+# same binning in x and y.
+def fill(canvas, h, data):
+    X, w = data
+    binning = [(a.GetNbins(), a.GetXmin(), a.GetXmax())
+               for hh in h for a in [hh.GetXaxis(), hh.GetYaxis()]]
+    if len(set(binning)) > 1:
+        sys.exit('** fill: histograms must have the same binning in x and y')
+    nbins, xmin, xmax = binning[0]
+    contents = histogram2dPairs(X, w, nbins, xmin, xmax)
+    for ih in xrange(len(h)):
+        setContent(h[ih], contents[ih], len(w))
+        canvas.cd(ih+1)
+        h[ih].Draw('p')
+    canvas.Update()
 #------------------------------------------------------------------    
 def main():
     
@@ -86,8 +62,8 @@ def main():
     setStyle()
 
     treename    = "HZZ4LeptonsAnalysisReduced"
-    sigfilename = '../data/ntuple_4mu_VV.root'
-    bkgfilename = '../data/ntuple_4mu_gg.root'
+    sigfilename = '../data/ntuple_4mu_VV.h5'
+    bkgfilename = '../data/ntuple_4mu_gg.h5'
 
     sdata,d1,d2 = readData(sigfilename, treename)
     
@@ -11,8 +11,12 @@ from rgsutil import *
 from histutil import *
 from time import sleep
 from array import array
+from arrayhist import histogram2d, setContent, fill2d
+from columncache import readCached
+from rgsscan import scan
 from ROOT import *
 # ---------------------------------------------------------------------
+TOPK=10 # number of best cut-points to list
 START_ROW=5000
 CWD=getCWD()
 # ---------------------------------------------------------------------
@@ -33,6 +37,7 @@ def plotData():
     treename    = "HZZ4LeptonsAnalysisReduced"
     sigfilename = '../data/ntuple_4mu_VV.root'
     bkgfilename = '../data/ntuple_4mu_gg.root'
+    selection   = "f_massjj>0"
     
     cmass = TCanvas("fig_%s_VV_gg" % CWD, "VBF/ggF", 10, 10, 500, 500)    
 
@@ -47,16 +52,13 @@ def plotData():
     hsig.SetMarkerSize(msize)
     hsig.SetMarkerColor(kCyan+1)
           
-    sntuple = Ntuple(sigfilename, treename, START_ROW)
-    total   = 0
-    for event in sntuple:
-        if not (event.f_massjj > 0): continue
-        hsig.Fill(event.f_deltajj, event.f_massjj, event.f_weight)
-        if total % 5000 == 0:
-            cmass.cd()
-            hsig.Draw('p')
-            cmass.Update()
-        total += 1
+    # the selected columns are read from the column cache (see columncache.py)
+    columns = readCached(sigfilename, treename,
+                         [fieldx, fieldy, weightname], selection, START_ROW)
+    fill2d(hsig, columns[fieldx], columns[fieldy], columns[weightname])
+    cmass.cd()
+    hsig.Draw('p')
+    cmass.Update()
     
     # -- background
     hbkg = mkhist2("hbkg", varx, vary,
@@ -69,17 +71,12 @@ def plotData():
     hbkg.SetMarkerSize(msize)
     hbkg.SetMarkerColor(kMagenta+1)     
 
-    bntuple = Ntuple(bkgfilename, treename, START_ROW)
-    total  = 0
-    for event in bntuple:
-        if not (event.f_massjj > 0): continue
-        hbkg.Fill(event.f_deltajj, event.f_massjj, event.f_weight)
-        total += 1
-        if total % 5000 == 0:
-            cmass.cd()
-            hbkg.Draw('p')
-            cmass.Update()
-        total += 1
+    columns = readCached(bkgfilename, treename,
+                         [fieldx, fieldy, weightname], selection, START_ROW)
+    fill2d(hbkg, columns[fieldx], columns[fieldy], columns[weightname])
+    cmass.cd()
+    hbkg.Draw('p')
+    cmass.Update()
         
     hsig.Scale(1.0/hsig.Integral())
     hbkg.Scale(1.0/hbkg.Integral())
@@ -135,35 +132,26 @@ def main():
     hist.SetMarkerSize(msize)
 
 
-    # loop over all cut-points, compute a significance measure Z
-    # for each cut-point, and find the cut-point with the highest
-    # significance and the associated cuts.
+    # compute a significance measure Z for all cut-points at once,
+    # and find the cut-points with the highest significance.
     print "\tfilling ROC plot..."	
-    bestZ = -1 # best Z value
-    best  = -1 # row number of with best cuts
-
-    for row, cuts in enumerate(ntuple):
-        fb = cuts.fraction_b  #  background fraction
-        fs = cuts.fraction_s  #  signal fraction
-        b  = cuts.count_b     #  background count
-        s  = cuts.count_s     #  signal count
-                
-        #  Plot fs vs fb
-        hist.Fill(fb, fs)
-        	
-        # Compute measure of significance
-        #   Z  = sign(LR) * sqrt(2*|LR|)
-        # where LR = log(Poisson(s+b|s+b)/Poisson(s+b|b))
-        Z = 0.0
-        if b > 1:
-            Z = 2*((s+b)*log((s+b)/b)-s)
-            absZ = abs(Z)
-            if absZ != 0:
-                Z = Z*sqrt(absZ)/absZ                    
-        if Z > bestZ:
-            bestZ = Z
-            best  = row
-
+    values, rows = scan(resultsfilename, treename, TOPK)
+    fb = values['fraction_b']  #  background fractions
+    fs = values['fraction_s']  #  signal fractions
+    Z  = values['Z']
+
+    #  Plot fs vs fb
+    setContent(hist, histogram2d(fb, fs, None,
+                                 xbins, xmin, xmax,
+                                 ybins, ymin, ymax), len(fb))
+
+    print "\n\t%5s %10s %10s %10s %10s" % \
+      ('rank', 'row', 'Z', 'count_s', 'count_b')
+    for rank, row in enumerate(rows):
+        print "\t%5d %10d %10.2f %10.3f %10.3f" % \
+          (rank, row, Z[row], values['count_s'][row], values['count_b'][row])
+    best  = int(rows[0]) # row number of with best cuts
+    bestZ = Z[best] # best Z value
     # -------------------------------------------------------------            
     # get best cut
     # -------------------------------------------------------------
@@ -10,6 +10,7 @@ import os, sys, re
 from rgsutil import *
 from string import *
 from ROOT import *
+import rgsengine
 # ----------------------------------------------------------------------------
 def main():
     print "="*80
@@ -17,10 +18,15 @@ def main():
     print "="*80
 
     # ---------------------------------------------------------------------
-    # Load the RGS shared library and check that the various input files
-    # exist.
+    # By default, use the numpy implementation of RGS (python/rgsengine.py).
+    # To use the RGS shared library instead, do: python train.py libRGS
+    # Then check that the various input files exist.
     # ---------------------------------------------------------------------
-    if gSystem.Load("libRGS") < 0: error("unable to load libRGS")
+    if 'libRGS' in sys.argv[1:]:
+        if gSystem.Load("libRGS") < 0: error("unable to load libRGS")
+        RGSEngine = RGS
+    else:
+        RGSEngine = rgsengine.RGS
 
     # Name of file containing cut definitions
     # Format of file:
@@ -64,8 +70,8 @@ def main():
     #   algorithm is run.
     # ---------------------------------------------------------------------
     cutdatafilename = sigfilename
-    rgs = RGS(cutdatafilename, start, maxcuts, treename, weightname,
-              selection)
+    rgs = RGSEngine(cutdatafilename, start, maxcuts, treename, weightname,
+                    selection)
 
     # ---------------------------------------------------------------------
     #  Add signal and background data to RGS object.
@@ -86,7 +92,12 @@ def main():
     # ---------------------------------------------------------------------	
     #  Run RGS and write out result
     # ---------------------------------------------------------------------
-    rgs.run(varfilename)
+    # The numpy engine splits the cut-points into shards and counts them
+    # in parallel, one process per core.
+    if RGSEngine is rgsengine.RGS:
+        rgs.run(varfilename, nworkers=rgsengine.cpu_count())
+    else:
+        rgs.run(varfilename)
 
     # Write to a root file
     rgsfilename = "%s.root" % nameonly(varfilename)
@@ -10,56 +10,33 @@ import os, sys
 from histutil import *
 from time import sleep
 from array import array
+import numpy as np
+from eventloop import EventLoop, Histogram1D, Histogram2D, Counter
+from arrayhist import setContent, sampleSurface, surfaceContent
+from mvautil import MLPNetwork, BDTForest
 from ROOT import *
 #------------------------------------------------------------------
 FIRST_ROW=5000
 OPTION='cont1'
+SURFACE_BINS=1000 # number of bins in x and y of MVA surface plot
 #------------------------------------------------------------------
-def getTreeWeights(code):
-    # hack to get tree weights from TMVA class code
-    get = re.compile('(?<=fBoostWeights[.]push_back\().*?(?=\);)', re.DOTALL)
-    rec = get.findall(code)
-    if len(rec) == 0:
-        sys.exit('** cannot get weights from BDT class code')
-    weights = []
-    for t in rec:
-        weights.append(atof(t))
-    return weights
-
-def readAndFill(filename, treename, h):
+def readAndFill(filename, treename, reader, h2, h1):
+    # a single pass over the selected events fills both the
+    # (deltajj, massjj) density h2 and the distribution h1 of the
+    # discriminant (see eventloop.py for implementation)
     print "==> reading %s" % filename
-    # open ntuple (see histutil.py for implementation)
-    ntuple = Ntuple(filename, treename, FIRST_ROW)
-    total  = 0
-    for event in ntuple :
-        if not (event.f_massjj > 0): continue
-        h.Fill(event.f_deltajj, event.f_massjj, event.f_weight)
-        if total % 5000 == 0:
-            print total
-        total += 1            
-    h.Scale(1.0/h.Integral())
-#------------------------------------------------------------------
-def readAndFillAgain(filename, treename, reader, which, c, h):
-    ntuple = Ntuple(filename, treename, FIRST_ROW)
-    total  = 0
-    inputvars = vector('double')(2)
-    isBDT  = which == 'BDT' 
-    for event in ntuple:
-        if not (event.f_massjj > 0): continue
-        
-        inputvars[0] = event.f_deltajj
-        inputvars[1] = event.f_massjj
-        
-        # evaluate discriminant
-        D = reader.GetMvaValue(inputvars)
-        h.Fill(D, event.f_weight)
-
-        if total % 5000 == 0:
-            c.cd()
-            h.Draw("hist")
-            c.Update()
-        total += 1
-    h.Scale(1.0/h.Integral())
+    def discriminant(chunk):
+        X = np.column_stack([chunk[name] for name in reader.varnames])
+        return reader(X)
+
+    loop = EventLoop(filename, treename, 'f_massjj>0', start=FIRST_ROW)
+    loop.add(Histogram2D(h2, 'f_deltajj', 'f_massjj', 'f_weight'))
+    loop.add(Histogram1D(h1, discriminant, 'f_weight',
+                         columns=reader.varnames))
+    counter = loop.add(Counter('f_weight'))
+    loop.run()
+    print "\t%d events" % counter.count
+    h2.Scale(1.0/h2.Integral())
 #------------------------------------------------------------------
 def main():
     print "="*80
@@ -90,29 +67,21 @@ def main():
         which = 'MLP'
     isBDT = which == 'BDT'
     
-    # read in trained MLP class and compile it
+    # read trained MVA from its class code into numpy arrays
     codename = 'weights/HATS_%s.class.C' % which
-    print "=> compiling code:      %s" % codename
-    code = open(codename).read()
-    gROOT.ProcessLine(code)
-
-    classname = 'Read%s(inputnames)' % which
-    print "=> instantiating class: %s" % classname
-    inputnames = vector('string')(2)
-    inputnames[0] = fieldx
-    inputnames[1] = fieldy
-    reader = eval(classname)
-
-    # get tree weights from BDT class code.
+    print "=> reading %s:         %s" % (which, codename)
+    if isBDT:
+        reader = BDTForest(codename)
+    else:
+        reader = MLPNetwork(codename)
+
     # Assuming the AdaBoost algorithm was used, we
     # need the summed weights in order transform BDT
     # output to a probability:
     # D = 1/(1 + exp(-2*summedalpha*D))
     summedalpha = None
     if isBDT:
-        print "=> extracting alphas"
-        weights = getTreeWeights(code)
-        summedalpha = sum(weights)
+        summedalpha = reader.summedalpha
 
     # ---------------------------------------------------------
     # make 2-D surface plot
@@ -133,8 +102,14 @@ def main():
     hsig.SetMinimum(0)    
     hsig.SetMarkerSize(msize)
     hsig.SetMarkerColor(kCyan+1)
-          
-    readAndFill(sigfilename, treename, hsig)
+
+    # distribution of discriminant
+    dmin =-1 if isBDT else 0
+    dmax = 1
+    hs = mkhist1("hs", "D(%s, %s)" % (varx, vary), "", 50, dmin, dmax)
+    hs.SetFillColor(kCyan+1)
+    hs.SetFillStyle(3001)
+    readAndFill(sigfilename, treename, reader, hsig, hs)
 
     # Fill background histogram
     hbkg = mkhist2('hbkg', varx, vary,
@@ -146,7 +121,11 @@ def main():
     hbkg.SetMinimum(0)        
     hbkg.SetMarkerSize(msize)
     hbkg.SetMarkerColor(kMagenta+1)        
-    readAndFill(bkgfilename, treename, hbkg)
+
+    hb = mkhist1("hb", "D(%s, %s)" % (varx, vary), "", 50, dmin, dmax)
+    hb.SetFillColor(kMagenta+1)
+    hb.SetFillStyle(3001)
+    readAndFill(bkgfilename, treename, reader, hbkg, hb)
 
     # make some plots
 
@@ -191,32 +170,28 @@ def main():
     c.Update()
 
     # ---------------------------------------------------------
+    sbins = SURFACE_BINS
     h1 = mkhist2("h1", varx, vary,
-                 xbins, xmin, xmax,
-                 ybins, ymin, ymax)                 
+                 sbins, xmin, xmax,
+                 sbins, ymin, ymax)                 
     h1.SetMinimum(0)
     h1.SetMaximum(1)
     h1.GetYaxis().SetTitleOffset(2.10)
     
-    # compute discriminant at a grid of points
-
-    xstep = (xmax-xmin)/xbins
-    ystep = (ymax-ymin)/ybins
-    inputvars = vector('double')(2)
-    for i in xrange(xbins):
-        x = xmin + (i+0.5)*xstep
-        inputvars[0] = x
-        for j in xrange(ybins):
-            y = ymin + (j+0.5)*ystep
-            inputvars[1] = y
-            D = reader.GetMvaValue(inputvars)
-
-            # need to transform BDT output so that
-            # we arrive at an apples to apples
-            # comparison.
-            if isBDT:
-                D = 1.0/(1 + exp(-summedalpha*D))            
-            h1.Fill(x, y, D)
+    # compute discriminant at a (fine) grid of points
+    def discriminant(points):
+        D = reader(points)
+        # need to transform BDT output so that
+        # we arrive at an apples to apples
+        # comparison.
+        if isBDT:
+            D = 1.0/(1 + np.exp(-summedalpha*D))
+        return D
+
+    D = sampleSurface(discriminant,
+                      sbins, xmin, xmax,
+                      sbins, ymin, ymax)
+    setContent(h1, surfaceContent(D), D.size)
 
     # plot MVA approximation to discriminant
     c.cd(4)
@@ -230,19 +205,8 @@ def main():
     # ---------------------------------------------------------
     c1  = TCanvas("fig_VV_gg_D_%s" % which, "",
                   710, 310, 500, 500)
-
-    xmin =-1 if isBDT else 0
-    xmax = 1
-    hs = mkhist1("hs", "D(%s, %s)" % (varx, vary), "", 50, xmin, xmax)
-    hs.SetFillColor(kCyan+1)
-    hs.SetFillStyle(3001)
-    readAndFillAgain(sigfilename, treename, reader, which, c1, hs)
-    sleep(2)
-
-    hb = mkhist1("hb", "D(%s, %s)" % (varx, vary), "", 50, xmin, xmax)
-    hb.SetFillColor(kMagenta+1)
-    hb.SetFillStyle(3001)
-    readAndFillAgain(bkgfilename, treename, reader, which, c1, hb)
+    hs.Scale(1.0/hs.Integral())
+    hb.Scale(1.0/hb.Integral())
 
     c1.cd()
     hb.Draw('hist')
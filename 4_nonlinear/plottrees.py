@@ -13,6 +13,9 @@ from string import *
 from time import sleep
 from array import array
 from histutil import *
+import numpy as np
+from arrayhist import setContent, surfaceContent
+from mvautil import BDTForest
 from ROOT import *
 #-----------------------------------------------------------------------------
 def fixhist(hb): 
@@ -30,8 +33,11 @@ def main():
     treename  = 'HZZ4LeptonAnalysisReduced'
     weightname= 'f_weight'
         
-    # create a Python wrapper of the TMVA BDT class
+    # create a Python wrapper of the TMVA BDT class (used to draw
+    # individual trees) and a numpy version of the forest (used to
+    # compute the response of the forest as it grows)
     bdt = BDT(filename)
+    forest = BDTForest(filename)
 
     xbins =  16 
     xmin  =   0.0
@@ -78,20 +84,21 @@ def main():
     ystep = (ymax-ymin) / ny
         
     ntrees = [2, 8, 32, 100]
+
+    # compute the contribution of every tree at each grid point once,
+    # then get the response of the first n trees from running sums
+    x = xmin + np.arange(nx) * xstep
+    y = ymin + np.arange(ny) * ystep
+    x, y = np.meshgrid(x, y, indexing='ij')
+    points = np.column_stack((x.ravel(), y.ravel()))
+    z = forest.responses(points, ntrees)
+
     hh = []
-    firstTree = 0
     for ii in xrange(len(ntrees)):
         hname = "h%4.4d" % ntrees[ii]
-        lastTree = ntrees[ii]-1
         hh.append(mkhist2(hname, varx, vary,
                           nx, xmin, xmax, ny, ymin, ymax))
-        for ix in xrange(nx):
-            x = xmin + ix * xstep
-            for iy in xrange(ny):
-                y = ymin + iy * ystep
-                vtuple = (x, y)
-                z = bdt(vtuple, firstTree, lastTree)
-                hh[-1].SetBinContent(ix+1, iy+1, z);
+        setContent(hh[-1], surfaceContent(z[:, ii].reshape(nx, ny)))
         c1.cd(ii+1)
         hh[-1].Draw('col')
         addTitle('%5d trees' % ntrees[ii], 0.06)
@@ -99,18 +106,18 @@ def main():
     c1.SaveAs('.png')
     sleep(10)
 
-    ## # make an animiated gif
+    ## # make an animiated gif of the forest growing one tree at a time.
+    ## # all 100 responses come from a single pass over the trees.
     ## os.system('rm -rf fig_manytrees.gif')
     ## c1 = TCanvas('fig_manytrees', 'many trees', 610, 310, 2*pixels, 2*pixels)
-    ## option = 'col'
+    ## ntrees = range(1, len(forest)+1)
+    ## z = forest.responses(points, ntrees)
     ## hbdt = []
-    ## for ii in xrange(100):
+    ## for ii in xrange(len(ntrees)):
     ##     print ii
-    ##     hbdt.append(bdt.plot(ii,
-    ##                       'hmtree',
-    ##                       'SO_{2}', 'alcohol',
-    ##                       xmin, xmax, ymin, ymax))
-    ##     #fixhist(hbdt[-1])
+    ##     hbdt.append(mkhist2('hmtree%3.3d' % ii, varx, vary,
+    ##                         nx, xmin, xmax, ny, ymin, ymax))
+    ##     setContent(hbdt[-1], surfaceContent(z[:, ii].reshape(nx, ny)))
     ##     hbdt[-1].Draw('col')
     ##     c1.Update()
     ##     c1.Print('fig_manytrees.gif+10')
@@ -13,12 +13,22 @@
 #
 # where mu is the signal strength.
 #
+# Usage:
+#   ./analyzeworkspace.py [workspace-file [workspace-name]]
+#   ./analyzeworkspace.py scenarios.h5
+#       analyze every scenario of a table of parameters (see
+#       createworkspace.py), without workspaces. The table can
+#       also be a text file or a .root file with a tree
+#       "scenarios" (which createworkspace.py does not write;
+#       see readScenarios in singlecount.py).
+#
 # Created: 18-Dec-2015 CMSDAS 2016, LPC Fermilab HBP
 #          08-Jun-2016 Adapted to HATS@LPC 2016
 #-------------------------------------------------------------
 import os,sys,re
 from time import sleep
 from math import *
+from singlecount import SingleCount, PARAMETERS, readScenarios
 from ROOT import *
 #-------------------------------------------------------------
 def check(o, message):
@@ -56,34 +66,39 @@ def analyzeWorkspace(wsname, wsfilename):
     # suppress some (apparently) innocuous warnings
     msgservice = RooMsgService.instance()
     msgservice.setGlobalKillBelow(RooFit.FATAL)
-        
-    print 'compute 68% interval using profile likelihood'
-    plc = RooStats.ProfileLikelihoodCalculator(data, cfg)
-    CL  = 0.683
-    plc.SetConfidenceLevel(CL)
-    plcInterval= plc.GetInterval()
-    lowerLimit = plcInterval.LowerLimit(wspace.var('mu'))
-    upperLimit = plcInterval.UpperLimit(wspace.var('mu'))
 
-    print '\tPL %4.1f%s CL interval = [%5.2f, %5.2f]' % \
-      (100*CL, '%', lowerLimit, upperLimit)
+    # The nuisance parameters s, b1 and b2 are profiled, and q(mu) (see
+    # below) is computed on a fine grid of mu values, in one go by the
+    # numpy solver in singlecount.py, rather than by repeated minimizations
+    # (RooStats.ProfileLikelihoodCalculator). All results of this section
+    # come from this one scan.
+    model = SingleCount(*[wspace.var(name).getVal()
+                          for name in ['N', 'B1', 'dB1', 'B2', 'dB2',
+                                       'S', 'dS']],
+                        mumin=wspace.var('mu').getMin(),
+                        mumax=wspace.var('mu').getMax())
+    pl = model.analyze(CL=0.683, CLlimit=0.95)
 
-    # compute a 95% upper limit on mu by
-    # computing a 90% central interval and
-    # ignoring the lower limit
-    CL = 0.90
-    plc.SetConfidenceLevel(CL)
-    plcInterval = plc.GetInterval()
-    upperLimit = plcInterval.UpperLimit(wspace.var('mu'))
+    print 'compute 68% interval using profile likelihood'
+    CL = 0.683
+    print '\tPL %4.1f%s CL interval = [%5.2f, %5.2f]' % \
+      (100*CL, '%', pl['lower'], pl['upper'])
 
+    # the 95% upper limit on mu is the upper limit of a
+    # 90% central interval (the lower limit is ignored)
     CL = 0.95
     print '\tPL %4.1f%s upper limit = %5.2f\n' % \
-      (100*CL, '%', upperLimit)      
-
-    # plot it
-    plcplot = RooStats.LikelihoodIntervalPlot(plcInterval)
+      (100*CL, '%', pl['limit'])      
+
+    # plot it: -log[Lp(mu)/Lp(mu_hat)] = q(mu)/2
+    plcplot = TGraph(len(pl['mu']), pl['mu'], 0.5*pl['q'])
+    plcplot.SetTitle('')
+    plcplot.GetXaxis().SetTitle('#mu')
+    plcplot.GetYaxis().SetTitle('-log #lambda(#mu)')
+    plcplot.SetLineWidth(2)
+    plcplot.SetLineColor(kBlue)
     plccanvas = TCanvas('fig_PL', 'plc', 10, 10, 500, 500)
-    plcplot.Draw()
+    plcplot.Draw('al')
     plccanvas.Update()
 
     # In the frequentist approach, the goal is to reject an hypothesis, 
@@ -112,61 +127,63 @@ def analyzeWorkspace(wsname, wsfilename):
     # The convention in particle physics is to declare victory if Z >= 5 and,
     # sometimes, state that one has evidence if Z >= 3.
     #
-    # In order to compute q(0), one proceeds as follows:
-    # 1. get the negative log-profilelikelihood ratio (-log[Lp(mu)/Lp(mu_hat)])
-    nlplratio = plcInterval.GetLikelihoodRatio()
-    # 2. set the value of mu to zero (the no effect hypothesis)
-    wspace.var('mu').setVal(0)
-    # 3. and compute q(0)
-    q0 = 2*nlplratio.getVal()
-    # 4. compute a Z value
-    Z  = sqrt(q0)
+    # q(0) is the value of the scan at mu = 0 (the no effect hypothesis),
+    # from which Z = sqrt(q(0))
+    Z  = pl['Z']
     print "\tZ-value = %8.1f\n" % Z
 
     #-----------------------------------------------------    
     # Compute interval based on Bayesian calculator
     #-----------------------------------------------------
+    # The posterior density of mu is computed once, on a fine grid, by
+    # integrating over s, b1 and b2 exactly (see singlecount.py), rather
+    # than by RooStats.BayesianCalculator, which integrates numerically
+    # and repeats the whole scan for each interval. Intervals at any
+    # confidence level follow from the cumulative distribution.
     print 'compute interval using Bayesian calculator'
-    print "\t\tplease be patient...!"
-    bc = RooStats.BayesianCalculator(data, cfg)
+    posterior = model.posterior()
     CL  = 0.683
-    bc.SetConfidenceLevel(CL)
-    bcInterval = bc.GetInterval()
-    lowerLimit = bcInterval.LowerLimit()
-    upperLimit = bcInterval.UpperLimit()
+    # central interval: probability (1-CL)/2 on either side
+    lowerLimit, upperLimit = posterior.central(CL)
 
     print '\tBayes %4.1f%s CL interval = [%5.2f, %5.2f]' % \
       (100*CL, '%', lowerLimit, upperLimit)
 
-    NP = 50 # number of points at which to calculate posterior density
-    # calculate posterior density
-    bc.SetScanOfPosterior(NP)
-    bcplot = bc.GetPosteriorPlot()
+    # shortest (highest posterior density) interval
+    lowerLimit, upperLimit = posterior.shortest(CL)
+
+    print '\tBayes %4.1f%s CL shortest interval = [%5.2f, %5.2f]' % \
+      (100*CL, '%', lowerLimit, upperLimit)
+
+    # plot the posterior density
+    bcplot = TGraph(len(posterior.mu), posterior.mu, posterior.density)
+    bcplot.SetTitle('')
+    bcplot.GetXaxis().SetTitle('#mu')
+    bcplot.GetYaxis().SetTitle('posterior density')
+    bcplot.SetLineWidth(2)
+    bcplot.SetLineColor(kBlue)
     bccanvas = TCanvas('fig_Bayes', 'Bayes', 500, 10, 850, 400)
     bccanvas.Divide(2, 1)
     bccanvas.cd(1)
-    bcplot.Draw()
+    bcplot.Draw('al')
     bccanvas.Update()
 
     # compute a 95% upper limit on mu
     CL  = 0.950
-    bc.SetConfidenceLevel(CL)
-    # 0   = upper limit
-    # 0.5 = central limits (default)
-    # 1   = lower limit
-    bc.SetLeftSideTailFraction(0)
-    bcInterval = bc.GetInterval()
-    upperLimit = bcInterval.UpperLimit()
+    upperLimit = posterior.upperLimit(CL)
 
     print '\tBayes %4.1f%s upper limit = %5.2f\n' % \
       (100*CL, '%', upperLimit)
 
-    print "\t\tplease be patient...computing posterior density again!"      
-    # calculate posterior density
-    bc.SetScanOfPosterior(NP)
-    bcplot2 = bc.GetPosteriorPlot()
+    # plot the cumulative distribution
+    bcplot2 = TGraph(len(posterior.mu), posterior.mu, posterior.cdf)
+    bcplot2.SetTitle('')
+    bcplot2.GetXaxis().SetTitle('#mu')
+    bcplot2.GetYaxis().SetTitle('posterior probability below #mu')
+    bcplot2.SetLineWidth(2)
+    bcplot2.SetLineColor(kBlue)
     bccanvas.cd(2)
-    bcplot2.Draw()
+    bcplot2.Draw('al')
     bccanvas.Update()
 
     # save canvases
@@ -175,13 +192,44 @@ def analyzeWorkspace(wsname, wsfilename):
     
     sleep(5)  
 #------------------------------------------------------------------
+def isScenarios(filename):
+    # a table of scenarios (see readScenarios), rather than a
+    # workspace file
+    if not filename.endswith('.root'):
+        return True
+    tfile = TFile(filename)
+    return tfile.IsOpen() and bool(tfile.Get('scenarios'))
+#------------------------------------------------------------------
+def analyzeScenarios(filename):
+    # profile likelihood and Bayesian results for every
+    # scenario, from the numpy solvers in singlecount.py
+    names, params = readScenarios(filename)
+    print "%-16s %6s %15s %6s %6s %15s %6s" % \
+      ('scenario', 'mu_hat', 'PL 68.3%', 'PL 95%', 'Z',
+       'Bayes 68.3%', 'B 95%')
+    for row, name in enumerate(names):
+        model = SingleCount(*[params[x][row] for x in PARAMETERS])
+        pl = model.analyze(CL=0.683, CLlimit=0.95)
+        posterior = model.posterior()
+        lower, upper = posterior.central(0.683)
+        print "%-16s %6.2f  [%5.2f, %5.2f] %6.2f %6.2f  "\
+          "[%5.2f, %5.2f] %6.2f" % \
+          (name, pl['mu_hat'], pl['lower'], pl['upper'], pl['limit'],
+           pl['Z'], lower, upper, posterior.upperLimit(0.95))
+#------------------------------------------------------------------
 def main():
     # Suppress all messages except those that matter
     msgservice = RooMsgService.instance()
     msgservice.setGlobalKillBelow(RooFit.WARNING)
     print "="*80
 
-    analyzeWorkspace('HATS@LPC', 'HATSworkspace.root')
+    if len(sys.argv) > 1 and isScenarios(sys.argv[1]):
+        analyzeScenarios(sys.argv[1])
+        return
+
+    wsfilename = sys.argv[1] if len(sys.argv) > 1 else 'HATSworkspace.root'
+    wsname     = sys.argv[2] if len(sys.argv) > 2 else 'HATS@LPC'
+    analyzeWorkspace(wsname, wsfilename)
 #------------------------------------------------------------------
 try:
     main()
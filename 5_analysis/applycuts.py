@@ -8,41 +8,91 @@ import os, sys
 from histutil import *
 from time import sleep
 from array import array
+import numpy as np
+from columnutil import readTree, writeColumns
+from arrayhist import fill2d, histogram2d, upperSums2d
+from rgsscan import FIGURES_OF_MERIT, bestCutPoints
+from selection import compileSelection
+from cutflow import CutFlow
 from ROOT import *
 #------------------------------------------------------------------
+# --------------------
+# PLACE YOUR CUTS HERE
+# --------------------
+# each cut is a (name, selection) pair; the cuts are applied in order
+CUTS = [('D_bkg',      'D_bkg > 0.5'),
+        ('D_VVgg_MLP', 'D_VVgg_MLP > 0.5')]
+
+# threshold scan (./applycuts.py MLP MLP scan): yields for the thresholds
+# D_VVgg_* >= 0, 1/SCANBINS, ..., 1 and D_bkg >= 0, 1/SCANBINS, ..., 1
+SCANBINS   = 200
+SCANFILE   = 'scan_%s.root'
+SIGNAL     = ['VV']
+BACKGROUND = ['gg', 'ZZ']
+#------------------------------------------------------------------
+def scanThresholds(tables, Dname, filename, fom='Z', k=10):
+    '''
+    Given tables[title], the yields of a sample for every pair of
+    thresholds (see arrayhist.upperSums2d), compute the figure of merit of
+    every pair, write the yields and figure of merit to filename and print
+    the k best pairs.
+    '''
+    t = np.arange(SCANBINS+1) / float(SCANBINS)
+    tx, ty = np.meshgrid(t, t, indexing='ij')
+    s = sum([tables[title] for title in SIGNAL])
+    b = sum([tables[title] for title in BACKGROUND])
+    Z = FIGURES_OF_MERIT[fom](s, b)
+
+    names = [Dname, 'D_bkg'] + sorted(tables.keys()) + [fom]
+    columns = {Dname: tx.ravel(), 'D_bkg': ty.ravel(), fom: Z.ravel()}
+    for title in tables:
+        columns[title] = tables[title].ravel()
+    print "==> writing %s" % filename
+    writeColumns(filename, 'scan', names, columns, title='threshold scan')
+
+    print "best thresholds (%s >= x, D_bkg >= y)" % Dname
+    print "\t%6s %6s %10s %10s %10s" % ('x', 'y', 'signal', 'background',
+                                          fom)
+    for row in bestCutPoints(columns[fom], k):
+        print "\t%6.3f %6.3f %10.3f %10.3f %10.3f" % \
+            (columns[Dname][row], columns['D_bkg'][row],
+             s.ravel()[row], b.ravel()[row], columns[fom][row])
+    print
+#------------------------------------------------------------------
 def readAndFill(filename, treename, which, c, h, pad):
     useBDT = which == 'BDT'
     print "==> reading %s" % filename
-    # open ntuple (see histutil.py for implementation)
-    ntuple = Ntuple(filename, treename)
-    total  = 0
-    weight = 0.0
-    passweight = 0.0
-    for event in ntuple :
-        D = event.D_VVgg_BDT if useBDT else event.D_VVgg_MLP
-        h.Fill(D, event.D_bkg, event.weight)
-
-        weight += event.weight
-        total  += 1
-        # --------------------
-        # PLACE YOUR CUTS HERE
-        # --------------------
-        if not (event.D_bkg > 0.5): continue
-        if not (event.D_VVgg_MLP > 0.5): continue
-        
-        passweight += event.weight
-        
-        if total % 5000 == 0:
-            c.cd(pad)
-            h.Draw('lego2')
-            c.Update()
+    Dname = 'D_VVgg_BDT' if useBDT else 'D_VVgg_MLP'
+
+    # read only the columns needed (see columnutil.py)
+    names = [Dname, 'D_bkg', 'weight']
+    for name, cut in CUTS:
+        names += [x for x in compileSelection(cut).names if x not in names]
+    columns = readTree(filename, treename, names)
+    w = columns['weight']
+    fill2d(h, columns[Dname], columns['D_bkg'], w)
+
+    # yields for every pair of thresholds on a fine grid
+    table = upperSums2d(histogram2d(columns[Dname], columns['D_bkg'], w,
+                                    SCANBINS, 0.0, 1.0,
+                                    SCANBINS, 0.0, 1.0))
+
+    # each cut is evaluated once (see cutflow.py)
+    flow = CutFlow(columns, w)
+    for name, cut in CUTS:
+        flow.add(name, cut)
+
+    total, weight = flow.yields([])
+    passweight = flow.yields()[1]
 
     print "==> total (unweighted):            %5d" % total        
     print "==>       (weighted):              %8.2f" % weight
     print "==>       (weighted with cuts):    %8.2f\n" % passweight
+    flow.printTable()
     c.cd(pad)
     h.Draw('lego2')
     c.Update()
+    return (flow, table)
 #------------------------------------------------------------------
 def main():
     print 
@@ -61,6 +111,9 @@ def main():
     else:
         whichvar = 'MLP'        
 
+    # scan all threshold pairs?
+    scan = len(sys.argv) > 3 and sys.argv[3] == 'scan'
+
     # set up a standard graphics style	
     setStyle()
 
@@ -98,6 +151,7 @@ def main():
     h = []
     s = []
     k = 0
+    tables = {}
     for i, (filename, title, color) in enumerate(filenames):
         h.append(mkhist2('h%d' % i, varx, vary,
                             xbins, xmin, xmax,
@@ -110,7 +164,8 @@ def main():
         h[i].SetMarkerSize(msize)
         h[i].SetMarkerColor(color)
         
-        readAndFill(filename, treename, which, c, h[i], i+1)
+        flow, tables[title] = readAndFill(filename, treename, which,
+                                          c, h[i], i+1)
         
         j = i % 2
         s.append(Scribe(0.2+j*0.5, 0.95, 0.07))
@@ -118,6 +173,10 @@ def main():
         c.cd(i+1)
         s[-1].write(title)
     c.SaveAs('.png')
+
+    if scan:
+        Dname = 'D_VVgg_BDT' if isBDT else 'D_VVgg_MLP'
+        scanThresholds(tables, Dname, SCANFILE % which)
     sleep(5)
 #----------------------------------------------------------------------
 main()
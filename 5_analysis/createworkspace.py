@@ -13,22 +13,44 @@
 #
 # where mu is the signal strength.
 #
+# Usage:
+#   ./createworkspace.py
+#       write the model above to HATSworkspace.root
+#   ./createworkspace.py scenarios.txt [workspaces.root]
+#       write one workspace per scenario (see readScenarios in
+#       singlecount.py), named after the scenario, to workspaces.root
+#   ./createworkspace.py scenarios.txt scenarios.h5
+#       write the scenarios as a table of parameters, which
+#       analyzeworkspace.py can analyze without workspaces
+#
+# The factory strings are parsed once, into a template workspace;
+# each scenario is a copy of the template with its own parameter
+# values, data and model configuration. The scenarios are built in
+# parallel.
+#
 # Created: 18-Dec-2015 CMSDAS 2016, LPC Fermilab HBP
 #          08-Jun-2016 Adapted to HATS@LPC 2016
 #-------------------------------------------------------------
 import os,sys,re
 from time import sleep
 from math import *
+from parallel import parallelMap, cpu_count
+from singlecount import PARAMETERS, NOMINAL, readScenarios, encodeNames
+from columnutil import writeColumns
 from ROOT import *
 #-------------------------------------------------------------
 def check(o, message):
     if o == None:
         sys.exit(message)
 #-------------------------------------------------------------
-def createWorkspace(wsname, wsfilename):
+def createTemplate(wsname):
     # The most convenient way to use RooFit/RooStats is to 
     # make a workspace so that we can use its factory method
     # and write the probability model and data to a Root file
+    #
+    # This workspace holds the model (without data), which is
+    # copied for every set of parameter values (see
+    # createWorkspace)
     wspace = RooWorkspace(wsname)
 
     #-----------------------------------------------------
@@ -101,16 +123,6 @@ def createWorkspace(wsname, wsfilename):
         cmd = 'expr::%s' % t
         wspace.factory(cmd)
 
-    print '\neffective counts and scale factors'
-    print 'Q1 = %8.2f, q1 = %8.2f' % (wspace.function('Q1').getVal(),
-                                      wspace.function('q1').getVal())
-
-    print 'Q2 = %8.2f, q2 = %8.2f' % (wspace.function('Q2').getVal(),
-                                      wspace.function('q2').getVal())
-
-    print 'Q  = %8.2f, q  = %8.2f' % (wspace.function('Q').getVal(),
-                                      wspace.function('q').getVal())
-
     #-----------------------------------------------------
     # Create pdfs
     #
@@ -156,6 +168,37 @@ def createWorkspace(wsname, wsfilename):
         name, parlist = t
         wspace.defineSet(name, parlist)
     
+    return wspace
+#-------------------------------------------------------------
+def createWorkspace(template, wsname, values, verbose=False):
+    # copy the template (no factory strings are parsed here)
+    wspace = RooWorkspace(template)
+    wspace.SetName(wsname)
+
+    # set the observation, the estimates and, as starting values,
+    # the nuisance parameters. widen the ranges if needed.
+    for name in PARAMETERS:
+        x = wspace.var(name)
+        x.setMax(max(x.getMax(), 2*values[name]))
+        x.setVal(values[name])
+    for name, estimate, error in [('b1', 'B1', 'dB1'),
+                                  ('b2', 'B2', 'dB2'),
+                                  ('s',  'S',  'dS')]:
+        x = wspace.var(name)
+        x.setMax(max(x.getMax(), values[estimate] + 10*values[error]))
+        x.setVal(values[estimate])
+
+    if verbose:
+        print '\neffective counts and scale factors'
+        print 'Q1 = %8.2f, q1 = %8.2f' % (wspace.function('Q1').getVal(),
+                                          wspace.function('q1').getVal())
+
+        print 'Q2 = %8.2f, q2 = %8.2f' % (wspace.function('Q2').getVal(),
+                                          wspace.function('q2').getVal())
+
+        print 'Q  = %8.2f, q  = %8.2f' % (wspace.function('Q').getVal(),
+                                          wspace.function('q').getVal())
+
     #-----------------------------------------------------        
     # Create a dataset
     #-----------------------------------------------------    
@@ -180,11 +223,55 @@ def createWorkspace(wsname, wsfilename):
 
     # import model configuration into workspace
     getattr(wspace, 'import')(cfg)
+    return wspace
+#-------------------------------------------------------------
+def _buildScenarios(task, template, scenarios, wsfilename):
+    # build a subset of the scenarios and write them to a
+    # file of their own
+    k, rows = task
+    names, params = scenarios
+    filename = '%s.%d.tmp' % (wsfilename, k)
+    out = TFile(filename, 'recreate')
+    for row in rows:
+        values = dict([(name, params[name][row]) for name in PARAMETERS])
+        wspace = createWorkspace(template, names[row], values)
+        out.cd()
+        wspace.Write()
+    out.Close()
+    return filename
+#-------------------------------------------------------------
+def createWorkspaces(template, scenarios, wsfilename, nworkers=1):
+    names, params = scenarios
+    nworkers = max(1, min(nworkers, len(names)))
+    tasks = [(k, range(k, len(names), nworkers)) for k in xrange(nworkers)]
 
-    wspace.Print()
-    
-    # write out workspace
-    wspace.writeToFile(wsfilename)
+    # the workers inherit the template and scenarios
+    filenames = parallelMap(_buildScenarios, tasks, nworkers,
+                            template=template, scenarios=scenarios,
+                            wsfilename=wsfilename)
+
+    # the workspaces have distinct names, so merging the
+    # files just copies them
+    merger = TFileMerger(False)
+    merger.SetPrintLevel(0)
+    for filename in filenames:
+        merger.AddFile(filename)
+    merger.OutputFile(wsfilename, 'recreate')
+    if not merger.Merge():
+        sys.exit("** can't merge workspaces into %s" % wsfilename)
+    for filename in filenames:
+        os.remove(filename)
+    print "wrote %d workspaces to %s" % (len(names), wsfilename)
+#-------------------------------------------------------------
+def writeParameters(scenarios, filename):
+    # a compact table of the names and parameters, one row per
+    # scenario
+    names, params = scenarios
+    columns = dict(params)
+    columns['name'] = encodeNames(names)
+    writeColumns(filename, 'scenarios', ['name'] + PARAMETERS, columns,
+                 title='single count scenarios')
+    print "wrote %d scenarios to %s" % (len(names), filename)
 #------------------------------------------------------------------
 def main():
     # Suppress all messages except those that matter
@@ -192,7 +279,24 @@ def main():
     msgservice.setGlobalKillBelow(RooFit.WARNING)
     print "="*80
 
-    createWorkspace('HATS@LPC', 'HATSworkspace.root')
+    template = createTemplate('HATS@LPC')
+
+    if len(sys.argv) < 2:
+        wspace = createWorkspace(template, 'HATS@LPC', NOMINAL, True)
+        wspace.Print()
+        # write out workspace
+        wspace.writeToFile('HATSworkspace.root')
+        return
+
+    scenarios = readScenarios(sys.argv[1])
+    if len(sys.argv) > 2:
+        filename = sys.argv[2]
+    else:
+        filename = 'workspaces.root'
+    if filename.endswith('.h5'):
+        writeParameters(scenarios, filename)
+    else:
+        createWorkspaces(template, scenarios, filename, cpu_count())
 #------------------------------------------------------------------
 try:
     main()
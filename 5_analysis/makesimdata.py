@@ -6,33 +6,20 @@
 #  Created:     05-Jun-2015 Harrison B. Prosper
 # ---------------------------------------------------------------------
 import os, sys, re
+import numpy as np
 from maketree import makeTree
-from histutil import Ntuple
-from random import uniform
+from columnutil import readTree
+from bootstrap import WeightedSampler
 from ROOT import *
 # ---------------------------------------------------------------------
-# Binary search - Slightly modified version of Jessen Havill (Denison U.)
-# algorithm.
-# http://personal.denison.edu/~havill
-#----------------------------------------------------------------------
-def binsearch(L, item):
-    first = 0
-    last = len(L) - 1   
-    found = False
-    while (first <= last) and not found:
-        mid = (first + last) / 2
-        if item <= L[mid]:
-            last = mid;       
-        elif item > L[mid]:
-            first = mid + 1
-        if first >= last:
-            mid = first
-            found = True
-        if found: return mid
-    return -1
-# ---------------------------------------------------------------------
 def main():
     print "\n\tmakesimdata.py\n"
+
+    # number of simulated data sets to make
+    if len(sys.argv) > 1:
+        nreplicas = int(sys.argv[1])
+    else:
+        nreplicas = 1
     
     treename = "HZZ4LeptonsAnalysisReduced"
     # source names   
@@ -42,49 +29,43 @@ def main():
 
     # ---------------------------------------------------
     # 1. load data into memory
-    # 2. create a bootstrap sample of a given size
+    # 2. create bootstrap samples of a given size
     #    by randomly selecting events with a 
     #    probability proportional to event weight
     # 3. write out events to an ntuple
     # ---------------------------------------------------
     records = []
-    weight = 0.0
+    lumis   = []
     for name in srcnames:
         filename = 'd_4mu_%s.root' % name
         print 'read %s' % filename
-        ntuple = Ntuple(filename, treename)
-        for row in ntuple:
-            rec = []
-            for varname in varnames:
-                rec.append(row(varname))
-            records.append(rec)
-            weight += records[-1][-1] # weight is last column
-        
-    print "Total weight (300/fb): %8.2f" % weight
-    print "\tcompute cdf of weights"
-    wcdf = len(records)*[0]
-    wcdf[0] = records[0][-1]
-    for i in xrange(1,len(records)):
-        wcdf[i] = wcdf[i-1] + records[i][-1]
-    sumw = wcdf[-1]
-    if sumw != weight:
-        sys.exit("huh?")
+        columns = readTree(filename, treename, varnames + ['lumi'])
+        records.append(np.column_stack([columns[varname]
+                                        for varname in varnames]))
+        lumis += list(np.unique(columns['lumi']))
+    # luminosity of the sources (see maketree.py)
+    if len(set(lumis)) != 1:
+        sys.exit('** the sources are not scaled to the same luminosity')
+    Lumi = lumis[0]
+    records = np.vstack(records)
+    weight  = records[:, -1].sum() # weight is last column
+    print "Total weight (%.0f/fb): %8.2f" % (Lumi, weight)
 
     # randomly select "N" events according to event weight
-    N = int(sumw+0.5) # number of events to select
-    print "\tselecting %d events" % N
-    outrecords = []
-    for i in xrange(N):
-        w = uniform(0, sumw)
-        k = binsearch(wcdf, w)
-        if k < 0:
-            sys.exit("**error** not found %f *** should not happen!" % w)
-        outrecords.append(records[k])
-        outrecords[-1][-1] = 1.0
+    sampler = WeightedSampler(records[:, -1])
+    N = int(sampler.sumw+0.5) # number of events to select
+    print "\tselecting %d events per data set" % N
+
+    for ii, index in enumerate(sampler.replicas(nreplicas, N)):
+        outrecords = records[index]
+        outrecords[:, -1] = 1.0
 
-    # write out records to an ntuple
-    filename = 'd_4mu_simdata.root'
-    makeTree(filename, treename, outrecords)
+        # write out records to an ntuple
+        if nreplicas == 1:
+            filename = 'd_4mu_simdata.root'
+        else:
+            filename = 'd_4mu_simdata_%03d.root' % ii
+        makeTree(filename, treename, outrecords, Lumi)
 # ---------------------------------------------------------------------
 try:
     main()
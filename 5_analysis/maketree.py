@@ -9,41 +9,18 @@ import os, sys, re
 from string import *
 from histutil import *
 from time import sleep, ctime
+import numpy as np
+from columnutil import writeColumns, CHUNKSIZE
+from columncache import readCached
+from cutflow import CutFlow
+from mvautil import MLPNetwork, BDTForest, BatchMVA
 from ROOT import *
 #------------------------------------------------------------------------------
 def nameonly(s):
     import posixpath
     return posixpath.splitext(posixpath.split(s)[1])[0]
 #------------------------------------------------------------------------------
-def getTreeWeights(code):
-    # hack to get tree weights from TMVA class code
-    get = re.compile('(?<=fBoostWeights[.]push_back\().*?(?=\);)', re.DOTALL)
-    rec = get.findall(code)
-    if len(rec) == 0:
-        sys.exit('** cannot get weights from BDT class code')
-    weights = []
-    for t in rec:
-        weights.append(atof(t))
-    return weights
-#------------------------------------------------------------------------------
-def getVarnames(code):
-    # hack to get variables from TMVA class code
-    # get lines from NVar to NSpec
-    get = re.compile('(?s)NVar(.*?)NSpec', re.M)
-    rec = get.findall(code)
-    if len(rec) == 0:
-        sys.exit('** cannot get variable names from class code')
-    # split at newline (skip first line)
-    rec = split(strip(rec[0]), '\n')[1:]
-
-    # first field of each lone is weight
-    varnames = vector('string')()
-    for t in rec:
-        t = split(t)
-        varnames.push_back(t[0])
-    return varnames
-#------------------------------------------------------------------------------
-def readData(filename, treename, MLP, BDT, varnames, Lumi, summedalphas):
+def readData(filename, treename, MLP, BDT, Lumi, chunksize=CHUNKSIZE):
     # mass4l window (just to check counts)
     lower  = 110 # GeV
     upper  = 136 # GeV
@@ -51,6 +28,7 @@ def readData(filename, treename, MLP, BDT, varnames, Lumi, summedalphas):
     # scale to desired lumi (original ntuples scaled to 2.8/fb)
     if   find(filename, '_data') > 0:
         scale = 1 # don't scale real data
+        Lumi  = 2.8 # luminosity of the data
     elif find(filename, '_bkg') > 0:
         # the 1.5 makes the background match the observed count in the
         # sidebands m4l < 110 or m4l > 136 GeV.
@@ -59,95 +37,71 @@ def readData(filename, treename, MLP, BDT, varnames, Lumi, summedalphas):
         scale = Lumi / 2.8
      
     print "=> reading file %s, scale weights by %8.1f" % (filename, scale)
-    ntuple = Ntuple(filename, treename)
-
-    total   = 0
-    i_weight= 0.0
-    w_weight= 0.0
-    m_weight= 0.0
-    inputvars = vector('double')(2)
-    records= []
-    for event in ntuple:
-        w = scale * event.f_weight
-        i_weight += w
-        
-        # impose window cut
-        if event.f_mass4l < lower: continue
-        if event.f_mass4l > upper: continue
-        w_weight += w
-
-        # require at least two jets
-        if event.f_massjj <= 0:    continue
-        m_weight += w
-        
-        if total % 5000 == 0:
-            print "\t",total
 
-        total  += 1
-        
-        # evaluate discriminants        
-        for i, varname in enumerate(varnames):
-            inputvars[i] = eval('event.%s' % varname)
-            
-        D_MLP = MLP.GetMvaValue(inputvars)
-        D_BDT = BDT.GetMvaValue(inputvars)
-        D_BDT = 1.0/(1 + exp(-2*summedalphas*D_BDT))
+    # the discriminants need not use the same inputs, or the same order
+    varnames = list(MLP.varnames)
+    varnames+= [name for name in BDT.varnames if name not in varnames]
+    columns  = varnames + ['f_mass4l', 'f_massjj', 'f_D_bkg', 'f_weight']
+
+    # all rows of the columns, memory-mapped (see columncache.py)
+    data = readCached(filename, treename, columns)
+    w = scale * data['f_weight']
+
+    # evaluate each cut once into a bit of a per-event mask (see cutflow.py)
+    flow = CutFlow(data, w)
+    # impose window cut
+    flow.add('window cut', 'f_mass4l >= %g && f_mass4l <= %g' % \
+                 (lower, upper))
+    # require at least two jets
+    flow.add('massjj > 0 cut', 'f_massjj > 0')
+    select = np.flatnonzero(flow.passed())
+
+    records = []
+    for first in xrange(0, len(select), chunksize):
+        rows = select[first:first+chunksize]
+        print "\t", first + len(rows)
+
+        # evaluate discriminants for the selected rows of the chunk
+        D_MLP = MLP(np.column_stack([data[varname][rows]
+                                     for varname in MLP.varnames]))
+        D_BDT = BDT(np.column_stack([data[varname][rows]
+                                     for varname in BDT.varnames]))
                     
-        records.append((D_MLP, D_BDT, event.f_D_bkg, w))
+        records.append(np.column_stack((D_MLP, D_BDT,
+                                        data['f_D_bkg'][rows],
+                                        w[rows])))
+    if len(records) > 0:
+        records = np.vstack(records)
+    else:
+        records = np.empty((0, 4))
 
     print
-    print "cut flow"
-    print "\tno cuts:                 %10.3f (%d)" % (i_weight, len(ntuple))
-    print "\twindow cut:              %10.3f" % w_weight
-    print "\tmassjj > 0 cut:          %10.3f (%d)\n" % (m_weight, total)
-    print
-    return records
+    flow.printTable()
+    return (records, Lumi)
 #------------------------------------------------------------------------------
-def makeTree(filename, treename, records, complevel=2):
+def makeTree(filename, treename, records, Lumi, complevel=2,
+             chunksize=CHUNKSIZE):
+    '''
+    Write records, an array of shape (nrows, 4), to a ROOT tree, or to an
+    HDF5 table if filename ends in .h5, with a fifth column, lumi, set to
+    Lumi, the integrated luminosity (in 1/fb) to which the weights are
+    scaled. The columns are written chunksize rows at a time.
+    '''
     print "=> writing to file %s" % filename
-    
-    # open output root file
-    tfile = TFile(filename, "recreate")
-    tfile.SetCompressionLevel(complevel)
-    ttree = TTree(treename, "%s created: %s" % (treename, ctime()))
-    
-    # ---------------------------------------------------
-    # create branches
-    # ---------------------------------------------------
+
     # variable names in ntuple to be created
     varnames = ['D_VVgg_MLP', 'D_VVgg_BDT', 'D_bkg', 'weight']
-    
-    # make a struct of variables
-    rec = 'struct Bag {'
-    for varname in varnames:
-        rec += 'double %s;' % varname
-    rec += "};"
-    
-    # compile struct
-    gROOT.ProcessLine(rec)
-    # and make it visible to Python
-    from ROOT import Bag
-    bag = Bag()
-    
-    # OK, actually create branches. note use of AddressOf
-    branch = []
-    for varname in varnames:
-        branch.append( ttree.Branch(varname,
-                                    AddressOf(bag, varname),
-                                    "%s/D" % varname) )
-
-    # fill tree
-    for index, record in enumerate(records):
-        if index % 5000 == 0: print '\t',index
-        for ii, x in enumerate(record):
-            # note use of __setattr__(name, value) to set
-            # attributes of struct
-            bag.__setattr__(varnames[ii], x)
-            
-        tfile.cd()
-        ttree.Fill()
-        
-    tfile.Write("", TObject.kOverwrite)
+
+    records = np.asarray(records, dtype=np.float64).reshape(-1, len(varnames))
+    columns = {}
+    for ii, varname in enumerate(varnames):
+        columns[varname] = records[:, ii]
+    columns['lumi'] = np.full(len(records), float(Lumi))
+    varnames.append('lumi')
+
+    writeColumns(filename, treename, varnames, columns, complevel, chunksize,
+                 title="%s created: %s" % (treename, ctime()))
+    print "\t%d rows" % len(records)
 #------------------------------------------------------------------------------
 def main():
     print "\n\tmaketree.py\n"
@@ -155,7 +109,12 @@ def main():
     if len(sys.argv) < 2:
         sys.exit('''
 Usage:
-       maketree.py input-root-file Lumi [300/fb]
+       maketree.py input-root-file [Lumi [format [engine]]]
+
+       Lumi defaults to 300/fb, format (root or h5) to root and engine
+       to numpy. With engine root, the discriminants are evaluated by the
+       TMVA class code itself (compiled by ROOT), e.g., for classifiers
+       that the numpy versions cannot read.
         ''')
 
     filename = sys.argv[1]
@@ -166,40 +125,39 @@ Usage:
         Lumi = atof(sys.argv[2])
     else:
         Lumi = 300.0 # 1/fb
+
+    if len(sys.argv) > 3:
+        ext = sys.argv[3]
+    else:
+        ext = 'root'
+    if ext not in ['root', 'h5']:
+        sys.exit('** unknown output format %s' % ext)
+
+    if len(sys.argv) > 4:
+        engine = sys.argv[4]
+    else:
+        engine = 'numpy'
+    if engine not in ['numpy', 'root']:
+        sys.exit('** unknown engine %s' % engine)
         
     treename = "HZZ4LeptonsAnalysisReduced"
     
-    # read and compile MLP class
-    codename = '../4_nonlinear/weights/HATS_MLP.class.C'
-    if not os.path.exists(codename):
-        sys.exit('** file %s NOT found\n'\
-                 '** run ../4_nonlinear/train.py to create it\n' % codename)
-    print "=> compiling %s" % codename
-    code = open(codename).read()
-    gROOT.ProcessLine(code)
-
-    # read and compile BDT class
-    codename = '../4_nonlinear/weights/HATS_BDT.class.C'
-    if not os.path.exists(codename):
-        sys.exit('** file %s NOT found\n'\
-                 '** run ../4_nonlinear/train.py to create it\n' % codename)    
-    print "=> compiling %s" % codename
-    BDTcode = open(codename).read()
-    gROOT.ProcessLine(BDTcode)
-    
-    # instantiate discriminants. Annoyingly, we need to pass
-    # the names to it first. Let's just extract them from the code
-    varnames = getVarnames(BDTcode)
-    MLP  = ReadMLP(varnames)
-    BDT  = ReadBDT(varnames)
+    # read the discriminants into numpy arrays. Each evaluates a chunk
+    # of events per call. The BDT output is mapped to [0, 1].
+    if engine == 'numpy':
+        MLP = MLPNetwork('../4_nonlinear/weights/HATS_MLP.class.C')
+        BDT = BDTForest('../4_nonlinear/weights/HATS_BDT.class.C',
+                        calibrate=True)
+    else:
+        MLP = BatchMVA('../4_nonlinear/weights/HATS_MLP.class.C')
+        BDT = BatchMVA('../4_nonlinear/weights/HATS_BDT.class.C',
+                       calibrate=True)
 
     # load data into memory
-    summedalphas = sum(getTreeWeights(BDTcode))
-    records  = readData(filename, treename, MLP, BDT, varnames,
-                        Lumi, summedalphas)
+    records, Lumi = readData(filename, treename, MLP, BDT, Lumi)
 
-    filename = '%s.root' % replace(nameonly(filename), 'ntuple', 'd')
-    makeTree(filename, treename, records)
+    filename = '%s.%s' % (replace(nameonly(filename), 'ntuple', 'd'), ext)
+    makeTree(filename, treename, records, Lumi)
     
     print '\ndone!\n'
 #------------------------------------------------------------------------------
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+#------------------------------------------------------------------
+# File: projectlumi.py
+# Description: expected yields, best cuts and expected significance
+#              of VV -> H -> ZZ -> 4mu as a function of luminosity.
+#
+# Usage:
+#   ./projectlumi.py [MLP|BDT [systematic]]
+#
+#   systematic is the relative uncertainty in each of the yields
+#   of VV (signal), gg and ZZ (default 0, i.e., none).
+#
+# The discriminants and weights of the d_4mu_{gg,VV,bkg} files
+# (see maketree.py) are read once (memory-mapped from the column
+# cache if the .h5 versions exist) and, divided by the luminosity
+# recorded with them (column lumi), turned into tables of yields
+# per 1/fb above every pair of thresholds on D_VVgg_* and D_bkg.
+# Since the yields are proportional to the luminosity, the
+# yields, best thresholds and expected (Asimov) significance at
+# every luminosity follow from these tables, without re-running
+# maketree.py or anything after it.
+#
+# Created: 17-Oct-2026 HATS@LPC
+#------------------------------------------------------------------
+import os, sys
+from math import sqrt
+import numpy as np
+from columnutil import readTree, writeColumns, h5name
+from columncache import readCached
+from arrayhist import histogram2d, upperSums2d
+from rgsscan import poissonZ
+from singlecount import profile, effectiveCounts
+#------------------------------------------------------------------
+LUMIS    = np.geomspace(10.0, 3000.0, 60) # 1/fb
+SCANBINS = 200   # thresholds 0, 1/SCANBINS, ..., 1
+ZTARGETS = [3.0, 5.0]
+TINY     = 1e-9  # smallest yield used in the likelihood
+#------------------------------------------------------------------
+def readTables(Dname, treename='HZZ4LeptonsAnalysisReduced'):
+    '''
+    Return a dictionary with, for each sample (VV, gg, ZZ), the table of
+    yields per 1/fb above every pair of thresholds (see
+    arrayhist.upperSums2d).
+    '''
+    names  = [Dname, 'D_bkg', 'weight', 'lumi']
+    tables = {}
+    for title, source in [('VV', 'VV'), ('gg', 'gg'), ('ZZ', 'bkg')]:
+        filename = 'd_4mu_%s.root' % source
+        if os.path.exists(h5name(filename)):
+            columns = readCached(filename, treename, names)
+        else:
+            columns = readTree(filename, treename, names)
+        print "==> read %s (%d rows)" % (filename, len(columns['weight']))
+        # the weights are scaled to the luminosity in column lumi
+        w = np.asarray(columns['weight'], dtype=np.float64) / \
+          np.asarray(columns['lumi'], dtype=np.float64)
+        tables[title] = upperSums2d(histogram2d(columns[Dname],
+                                                columns['D_bkg'], w,
+                                                SCANBINS, 0.0, 1.0,
+                                                SCANBINS, 0.0, 1.0)).ravel()
+    return tables
+#------------------------------------------------------------------
+def expectedZ(s, b1, b2, systematic=0.0):
+    '''
+    Return the expected significance, sqrt(q(0)), of the yields s, b1 and
+    b2 (arrays) for the observation N = s + b1 + b2. If systematic > 0,
+    each yield has that relative uncertainty (see singlecount.py).
+    Z = 0 where the total background is below 1.
+    '''
+    b = b1 + b2
+    if systematic <= 0:
+        return poissonZ(s, b)
+    Z  = np.zeros(len(s))
+    ok = (b > 1) & (s > 0)
+    s, b1, b2 = [np.maximum(x[ok], TINY) for x in (s, b1, b2)]
+    counts = []
+    for x in (b1, b2, s):
+        counts += effectiveCounts(x, systematic*x)
+    N  = s + b1 + b2
+    # the maximum likelihood estimate of mu is 1
+    q0 = 2*(profile(0.0, N, *counts)[0] - profile(1.0, N, *counts)[0])
+    Z[ok] = np.sqrt(np.maximum(q0, 0.0))
+    return Z
+#------------------------------------------------------------------
+def crossing(lumis, Z, target):
+    '''
+    Return the luminosity at which Z first reaches target, interpolated
+    in log(lumi), or None.
+    '''
+    above = np.flatnonzero(Z >= target)
+    if len(above) == 0: return None
+    i = above[0]
+    if i == 0: return lumis[0]
+    f = (target - Z[i-1]) / (Z[i] - Z[i-1])
+    return float(np.exp(np.log(lumis[i-1]) +
+                        f*(np.log(lumis[i]) - np.log(lumis[i-1]))))
+#------------------------------------------------------------------
+def main():
+    print
+    print "="*80
+    which = sys.argv[1] if len(sys.argv) > 1 else 'MLP'
+    systematic = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    Dname = 'D_VVgg_BDT' if which == 'BDT' else 'D_VVgg_MLP'
+
+    tables = readTables(Dname)
+
+    t = np.arange(SCANBINS+1) / float(SCANBINS)
+    tx, ty = [x.ravel() for x in np.meshgrid(t, t, indexing='ij')]
+
+    # best thresholds at each luminosity
+    names = ['lumi', Dname, 'D_bkg', 'VV', 'gg', 'ZZ', 'Z']
+    proj  = dict([(name, np.zeros(len(LUMIS))) for name in names])
+    for ii, lumi in enumerate(LUMIS):
+        s, b2, b1 = [lumi*tables[title] for title in ['VV', 'gg', 'ZZ']]
+        Z = expectedZ(s, b1, b2, systematic)
+        k = np.argmax(Z)
+        for name, value in [('lumi', lumi), (Dname, tx[k]),
+                            ('D_bkg', ty[k]), ('VV', s[k]), ('gg', b2[k]),
+                            ('ZZ', b1[k]), ('Z', Z[k])]:
+            proj[name][ii] = value
+
+    print "best thresholds (%s >= x, D_bkg >= y), systematic = %4.2f" % \
+      (Dname, systematic)
+    print "\t%8s %6s %6s %9s %9s %9s %6s" % \
+      ('lumi/fb', 'x', 'y', 'VV', 'gg', 'ZZ', 'Z')
+    for ii in xrange(0, len(LUMIS), 5):
+        print "\t%8.1f %6.3f %6.3f %9.2f %9.2f %9.2f %6.2f" % \
+          tuple([proj[name][ii] for name in names])
+    print
+
+    for target in ZTARGETS:
+        lumi = crossing(LUMIS, proj['Z'], target)
+        if lumi is None:
+            print "\tZ = %3.1f not reached below %6.0f/fb" % \
+              (target, LUMIS[-1])
+        else:
+            print "\tZ = %3.1f reached at %8.1f/fb" % (target, lumi)
+    print
+
+    filename = 'projection_%s.root' % which
+    print "==> writing %s" % filename
+    writeColumns(filename, 'projection', names, proj,
+                 title='luminosity projection')
+#------------------------------------------------------------------
+try:
+    main()
+except KeyboardInterrupt:
+    print
+    print "ciao!"
+    print
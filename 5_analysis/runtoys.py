@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+#-------------------------------------------------------------
+# File: runtoys.py
+# Description: Expected significance, upper limit bands and
+#              coverage of the single count analysis from
+#              pseudo-experiments (toys).
+#
+# Usage:
+#   ./runtoys.py [ntoys [mu]]
+#
+# The model is read from HATSworkspace.root (see
+# createworkspace.py). The toys are generated with the true
+# signal strength mu (default 1) and the estimates B1, B2 and S
+# as the true values of b1, b2 and s.
+#
+# Created: 17-Oct-2026 HATS@LPC
+#-------------------------------------------------------------
+import os,sys,re
+from time import time
+from singlecount import SingleCount
+from toymc import ToyMC, cpu_count
+from ROOT import *
+#-------------------------------------------------------------
+def check(o, message):
+    if o == None:
+        sys.exit(message)
+#-------------------------------------------------------------
+def main():
+    print "="*80
+    ntoys = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    mu    = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+
+    wsname, wsfilename = 'HATS@LPC', 'HATSworkspace.root'
+    wsfile = TFile(wsfilename)
+    if not wsfile.IsOpen():
+        sys.exit("*** can't open file %s" % wsfilename)
+    wspace = wsfile.Get(wsname)
+    check(wspace, "*** can't access workspace %s" % wsname)
+
+    model = SingleCount(*[wspace.var(name).getVal()
+                          for name in ['N', 'B1', 'dB1', 'B2', 'dB2',
+                                       'S', 'dS']],
+                        mumin=wspace.var('mu').getMin(),
+                        mumax=wspace.var('mu').getMax())
+
+    print "generate and fit %d toys with mu = %4.2f" % (ntoys, mu)
+    toys = ToyMC(model, seed=42)
+    t0 = time()
+    results = toys.run(ntoys, mu, nworkers=cpu_count())
+    print "\t%d toys in %6.1f s\n" % (ntoys, time() - t0)
+
+    summary = toys.summarize(results, CL=0.683)
+    print "\texpected Z-value (median)   = %8.2f" % summary['Z']
+    print "\texpected 95%s upper limit   = %5.2f" % ('%',
+                                                    summary['limits'][2])
+    print "\t             -1/+1 sigma    = [%5.2f, %5.2f]" % \
+      (summary['limits'][1], summary['limits'][3])
+    print "\t             -2/+2 sigma    = [%5.2f, %5.2f]" % \
+      (summary['limits'][0], summary['limits'][4])
+    if summary['capped'] > 0:
+        print "\t** limit capped at mu = %4.2f in %5.1f%s of toys" % \
+          (model.mumax, 100*summary['capped'], '%')
+    print "\tcoverage of 68.3%s interval = %8.3f\n" % ('%',
+                                                      summary['coverage'])
+#------------------------------------------------------------------
+try:
+    main()
+except KeyboardInterrupt:
+    print
+    print "ciao!"
+    print
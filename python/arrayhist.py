@@ -0,0 +1,163 @@
+#------------------------------------------------------------------------------
+# File: arrayhist.py
+# Description: fill histograms from numpy arrays.
+#
+#   Bin contents are computed with numpy (one np.bincount per batch of
+#   events) and then copied into ROOT histograms in one go, rather than
+#   calling TH1::Fill once per event.
+#
+#   Bin contents follow the ROOT convention: bin 0 is the underflow bin and
+#   bin nbins+1 is the overflow bin.
+#
+# Created: 17-Oct-2026 HATS@LPC
+#------------------------------------------------------------------------------
+import numpy as np
+#------------------------------------------------------------------------------
+BATCHSIZE = 100000 # number of events to histogram at a time
+#------------------------------------------------------------------------------
+def binIndex(x, nbins, xmin, xmax):
+    '''
+    Return ROOT-style bin numbers (0 = underflow, nbins+1 = overflow)
+    of the values in x.
+    '''
+    scale = nbins / float(xmax - xmin)
+    i = np.floor((np.asarray(x) - xmin) * scale)
+    return np.clip(i, -1, nbins).astype(np.intp) + 1
+#------------------------------------------------------------------------------
+def histogram1d(x, w, nbins, xmin, xmax):
+    '''
+    Return weighted 1-D histogram of x as an array of nbins+2 bin contents.
+    '''
+    k = binIndex(x, nbins, xmin, xmax)
+    return np.bincount(k, weights=w, minlength=nbins+2).astype(np.float64)
+#------------------------------------------------------------------------------
+def histogram2d(x, y, w, xbins, xmin, xmax, ybins, ymin, ymax):
+    '''
+    Return weighted 2-D histogram of (x, y) as an array of shape
+    (xbins+2, ybins+2), indexed by [xbin, ybin]. If w is None, each
+    entry has unit weight.
+    '''
+    ix = binIndex(x, xbins, xmin, xmax)
+    iy = binIndex(y, ybins, ymin, ymax)
+    nb = (xbins+2) * (ybins+2)
+    counts = np.bincount(ix * (ybins+2) + iy, weights=w, minlength=nb)
+    return counts.astype(np.float64).reshape(xbins+2, ybins+2)
+#------------------------------------------------------------------------------
+def upperSums2d(contents):
+    '''
+    Given the contents, of shape (xbins+2, ybins+2), of a 2-D histogram,
+    return the array T of shape (xbins+1, ybins+1) in which T[i, j] is the
+    sum of the contents of the bins with xbin > i and ybin > j (including
+    the overflow bins), that is, the weight of the entries with
+    x >= xmin + i*xstep and y >= ymin + j*ystep.
+    '''
+    c = np.asarray(contents, dtype=np.float64)[1:, 1:]
+    return c[::-1, ::-1].cumsum(0).cumsum(1)[::-1, ::-1]
+#------------------------------------------------------------------------------
+def pairs(nvar):
+    '''
+    Return list of all (ii, jj) column pairs with ii < jj, in the order used
+    to book one histogram per pair of variables.
+    '''
+    return [(ii, jj) for ii in xrange(nvar) for jj in xrange(ii+1, nvar)]
+#------------------------------------------------------------------------------
+def histogram2dPairs(X, w, nbins, xmin, xmax, batchsize=BATCHSIZE):
+    '''
+    Return weighted 2-D histograms of all pairs of columns of the (N, nvar)
+    array X as an array of shape (npairs, nbins+2, nbins+2), indexed by
+    [pair, xbin, ybin]. All columns use the same binning.
+    '''
+    X = np.asarray(X)
+    w = np.asarray(w, dtype=np.float64)
+    nvar = X.shape[1]
+    ii, jj = np.array(pairs(nvar), dtype=np.intp).reshape(-1, 2).T
+    npairs = len(ii)
+
+    nb = nbins + 2
+    offset = np.arange(npairs, dtype=np.intp) * nb * nb
+    counts = np.zeros(npairs * nb * nb)
+
+    for first in xrange(0, len(X), batchsize):
+        last = first + batchsize
+        # bin each variable once, then combine bin numbers pairwise
+        k = binIndex(X[first:last], nbins, xmin, xmax)
+        flat = offset + k[:, ii] * nb + k[:, jj]
+        wb = np.repeat(w[first:last], npairs)
+        counts += np.bincount(flat.ravel(), weights=wb,
+                              minlength=len(counts))
+    return counts.reshape(npairs, nb, nb)
+#------------------------------------------------------------------------------
+def setContent(h, contents, entries=None, sumw2=None):
+    '''
+    Copy bin contents, indexed by [xbin] or [xbin, ybin] and including the
+    underflow and overflow bins, into the ROOT 1-D or 2-D histogram h.
+    If given, sumw2 (indexed as contents) are the sums of squared weights.
+    '''
+    # ROOT's global bin number is xbin + (nx+2) * ybin
+    c = np.ascontiguousarray(np.asarray(contents, dtype=np.float64).T)
+    h.SetContent(c.ravel())
+    if sumw2 is not None:
+        e = np.ascontiguousarray(np.asarray(sumw2, dtype=np.float64).T)
+        if h.GetSumw2N() == 0: h.Sumw2()
+        h.GetSumw2().Set(e.size, e.ravel())
+    if entries is not None:
+        h.SetEntries(entries)
+#------------------------------------------------------------------------------
+def _binning(axis):
+    return (axis.GetNbins(), axis.GetXmin(), axis.GetXmax())
+
+def fill1d(h, x, w=None):
+    '''
+    Fill the ROOT 1-D histogram h with the values x and weights w, as
+    h.Fill(x[i], w[i]) would for every i (the histogram is assumed empty).
+    '''
+    nbins, xmin, xmax = _binning(h.GetXaxis())
+    if w is None: w = np.ones(len(x))
+    w = np.asarray(w, dtype=np.float64)
+    setContent(h, histogram1d(x, w, nbins, xmin, xmax), len(w),
+               histogram1d(x, w*w, nbins, xmin, xmax))
+
+def fill2d(h, x, y, w=None):
+    '''
+    Fill the ROOT 2-D histogram h with the values (x, y) and weights w, as
+    h.Fill(x[i], y[i], w[i]) would for every i (the histogram is assumed
+    empty).
+    '''
+    xbins, xmin, xmax = _binning(h.GetXaxis())
+    ybins, ymin, ymax = _binning(h.GetYaxis())
+    if w is None: w = np.ones(len(x))
+    w = np.asarray(w, dtype=np.float64)
+    setContent(h, histogram2d(x, y, w, xbins, xmin, xmax, ybins, ymin, ymax),
+               len(w),
+               histogram2d(x, y, w*w, xbins, xmin, xmax, ybins, ymin, ymax))
+#------------------------------------------------------------------------------
+def sampleSurface(function, xbins, xmin, xmax, ybins, ymin, ymax,
+                  batchsize=BATCHSIZE):
+    '''
+    Evaluate function, which maps an (N, 2) array of points to N values,
+    at the bin centers of an xbins x ybins grid. The grid is evaluated a
+    batch of (about) batchsize points at a time. Return an array of shape
+    (xbins, ybins), indexed by [xbin, ybin].
+    '''
+    xstep = (xmax - xmin) / float(xbins)
+    ystep = (ymax - ymin) / float(ybins)
+    x = xmin + (np.arange(xbins) + 0.5) * xstep
+    y = ymin + (np.arange(ybins) + 0.5) * ystep
+
+    Z = np.empty((xbins, ybins))
+    rows = max(1, batchsize // ybins) # number of x values per batch
+    for first in xrange(0, xbins, rows):
+        last = min(first + rows, xbins)
+        xx, yy = np.meshgrid(x[first:last], y, indexing='ij')
+        points = np.column_stack((xx.ravel(), yy.ravel()))
+        Z[first:last] = np.reshape(function(points), (last-first, ybins))
+    return Z
+#------------------------------------------------------------------------------
+def surfaceContent(Z):
+    '''
+    Return bin contents, including empty underflow and overflow bins, of a
+    2-D histogram whose bins hold the values Z[xbin, ybin].
+    '''
+    contents = np.zeros((Z.shape[0]+2, Z.shape[1]+2))
+    contents[1:-1, 1:-1] = Z
+    return contents
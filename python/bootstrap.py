@@ -0,0 +1,116 @@
+#------------------------------------------------------------------------------
+# File: bootstrap.py
+# Description: draw weighted bootstrap samples (pseudo-data sets) with numpy.
+#
+#   An event is selected with probability proportional to its weight. All
+#   draws are made at once, either by a binary search (np.searchsorted) of
+#   uniform numbers in the cumulative distribution of the weights, O(log n)
+#   per draw, or from an alias table, O(1) per draw:
+#
+#     sampler = WeightedSampler(weights, seed=42)
+#     index   = sampler.sample(N)                   # one sample of N events
+#     for index in sampler.replicas(500, N): ...    # 500 samples
+#
+# Created: 17-Oct-2026 HATS@LPC
+#------------------------------------------------------------------------------
+import os, sys
+import numpy as np
+#------------------------------------------------------------------------------
+BATCHSIZE = 10000000 # maximum number of draws per batch
+#------------------------------------------------------------------------------
+def aliasTable(weights):
+    '''
+    Return (prob, alias) of Walker's alias method for the given weights.
+    A draw picks a column k uniformly, then returns k with probability
+    prob[k] and alias[k] otherwise.
+
+    The table is built by Vose's method, except that, in each round, as
+    many under-full columns as possible are paired with distinct over-full
+    columns at once.
+    '''
+    w = np.asarray(weights, dtype=np.float64)
+    n = len(w)
+    prob  = w * (n / w.sum())
+    alias = np.arange(n)
+    small = np.flatnonzero(prob < 1)
+    large = np.flatnonzero(prob >= 1)
+    while len(small) > 0 and len(large) > 0:
+        k = min(len(small), len(large))
+        s, l = small[:k], large[:k]
+        # column s is topped up from column l
+        alias[s] = l
+        prob[l] -= 1 - prob[s]
+        under = prob[l] < 1
+        small = np.concatenate((small[k:], l[under]))
+        large = np.concatenate((large[k:], l[~under]))
+    # what is left over is full, up to rounding
+    prob[small] = 1.0
+    prob[large] = 1.0
+    return (prob, alias)
+#------------------------------------------------------------------------------
+class WeightedSampler:
+    '''
+    Draw indices 0,...,n-1 with probability proportional to weights.
+    method is "alias" (O(1) per draw) or "cdf" (searchsorted, O(log n)
+    per draw). Negative weights are not allowed.
+    '''
+    def __init__(self, weights, method='alias', seed=None):
+        w = np.asarray(weights, dtype=np.float64)
+        if len(w) == 0:
+            sys.exit('** WeightedSampler: no weights')
+        if (w < 0).any():
+            sys.exit('** WeightedSampler: negative weights')
+        if method not in ['alias', 'cdf']:
+            sys.exit('** WeightedSampler: unknown method %s' % method)
+        self.method = method
+        self.cdf    = np.cumsum(w)
+        self.sumw   = self.cdf[-1]
+        if self.sumw <= 0:
+            sys.exit('** WeightedSampler: weights sum to zero')
+        if method == 'alias':
+            self.prob, self.alias = aliasTable(w)
+        self.random = np.random.RandomState(seed)
+
+    def __len__(self):
+        return len(self.cdf)
+
+    def _draw(self, size):
+        if self.method == 'cdf':
+            u = self.random.uniform(0, self.sumw, size)
+            # first k with cdf[k] > u; zero-weight events are never chosen
+            k = np.searchsorted(self.cdf, u, 'right')
+            return np.minimum(k, len(self.cdf)-1)
+        n = len(self.prob)
+        k = self.random.randint(0, n, size)
+        u = self.random.uniform(0, 1, size)
+        return np.where(u < self.prob[k], k, self.alias[k])
+
+    def sample(self, size):
+        '''
+        Return an array of indices of the given size (an integer, or a
+        tuple, e.g., (nreplicas, N)).
+        '''
+        return self._draw(size)
+
+    def replicas(self, nreplicas, N=None, poisson=False):
+        '''
+        Iterate over nreplicas samples of indices. Each sample has N events
+        (by default, the sum of weights rounded to the nearest integer) or,
+        if poisson is True, a Poisson-distributed number of events with
+        mean N. The samples are drawn in batches of at most BATCHSIZE
+        indices.
+        '''
+        if N is None: N = int(self.sumw + 0.5)
+        if poisson:
+            sizes = self.random.poisson(N, nreplicas)
+        else:
+            sizes = np.full(nreplicas, N, dtype=int)
+        first = 0
+        while first < nreplicas:
+            # replicas [first, last) are drawn together
+            ends = np.cumsum(sizes[first:])
+            last = first + max(1, np.searchsorted(ends, BATCHSIZE, 'right'))
+            index = self._draw(int(ends[last-first-1]))
+            for chunk in np.split(index, ends[:last-first-1]):
+                yield chunk
+            first = last
@@ -0,0 +1,288 @@
+#------------------------------------------------------------------------------
+# File: columncache.py
+# Description: on-disk cache of selected ntuple columns.
+#
+#   The tutorial steps read the same columns of the same ntuples, with the
+#   same selection (f_massjj > 0), again and again. Here the selected rows
+#   of each column are saved, the first time they are read, as a numpy
+#   (.npy) file and are memory-mapped on later reads, so that repeated runs
+#   read (almost) nothing and processes reading the same columns share the
+#   same pages of memory.
+#
+#   A cache entry is a directory whose name is a hash of
+#
+#     source file (path, size and modification time, or content hash),
+#     tree name, selection string and row range
+#
+#   and which contains the indices of the selected rows (rows.npy) and one
+#   .npy file per column read so far. When the total size of the cache
+#   exceeds CACHESIZE, the least recently used entries are deleted.
+#
+#   The cache also keeps the minimum and maximum of columns over each chunk
+#   of rows, which readSelected uses to skip chunks in which no row can
+#   pass a selection without reading them. They are recorded, at no extra
+#   cost, for every chunk of the columns used by the selection that
+#   readSelected reads in full, and are not used when the cache is off.
+#
+#   The cache is configured with environment variables:
+#
+#     HATSMVA_CACHE       cache directory (default ~/.cache/hatsmva);
+#                         "off" disables the cache
+#     HATSMVA_CACHE_SIZE  maximum cache size in MB (default 4096)
+#     HATSMVA_CACHE_KEY   "mtime" (default) or "hash" to identify a source
+#                         file by the SHA1 hash of its content
+#
+# Created: 17-Oct-2026 HATS@LPC
+#------------------------------------------------------------------------------
+import os, sys, shutil
+import hashlib
+import numpy as np
+from columnutil import readColumns, selectionMask, selectionNames, h5name
+from columnutil import getEntries, CHUNKSIZE
+from selection import compileSelection
+#------------------------------------------------------------------------------
+CACHEDIR  = os.environ.get('HATSMVA_CACHE',
+                           os.path.join(os.path.expanduser('~'),
+                                        '.cache', 'hatsmva'))
+CACHESIZE = int(os.environ.get('HATSMVA_CACHE_SIZE', 4096)) * 2**20 # bytes
+CACHEKEY  = os.environ.get('HATSMVA_CACHE_KEY', 'mtime')
+HASHBLOCK = 2**24 # bytes per read when hashing a file
+#------------------------------------------------------------------------------
+def fileKey(filename, how=CACHEKEY):
+    '''
+    Return a string that changes whenever the file changes.
+    '''
+    if how == 'hash':
+        sha = hashlib.sha1()
+        f = open(filename, 'rb')
+        while True:
+            block = f.read(HASHBLOCK)
+            if not block: break
+            sha.update(block)
+        f.close()
+        return sha.hexdigest()
+    s = os.stat(filename)
+    return '%s %d %r' % (os.path.realpath(filename), s.st_size, s.st_mtime)
+#------------------------------------------------------------------------------
+def entryName(filename, treename, selection, start, numrows):
+    key = '\n'.join([fileKey(filename), treename, selection or '',
+                     '%d' % start, '%r' % numrows])
+    return hashlib.sha1(key).hexdigest()
+#------------------------------------------------------------------------------
+def _save(filename, array):
+    # write to a temporary file, then rename, so that other processes
+    # never see a partly written file
+    tmpname = '%s.%d.tmp' % (filename, os.getpid())
+    f = open(tmpname, 'wb')
+    try:
+        np.save(f, array)
+    finally:
+        f.close()
+    os.rename(tmpname, filename)
+#------------------------------------------------------------------------------
+def _entrySize(entry):
+    size = 0
+    for name in os.listdir(entry):
+        try:
+            size += os.path.getsize(os.path.join(entry, name))
+        except OSError:
+            pass
+    return size
+#------------------------------------------------------------------------------
+def evict(keep=None, cachedir=None, cachesize=None):
+    '''
+    Delete the least recently used cache entries, other than keep, until
+    the cache is no larger than cachesize bytes.
+    '''
+    if cachedir  is None: cachedir  = CACHEDIR
+    if cachesize is None: cachesize = CACHESIZE
+    entries = []
+    total = 0
+    for name in os.listdir(cachedir):
+        entry = os.path.join(cachedir, name)
+        try:
+            size  = _entrySize(entry)
+            mtime = os.path.getmtime(entry)
+        except OSError:
+            continue # removed by another process
+        entries.append((mtime, entry, size))
+        total += size
+    entries.sort()
+    for mtime, entry, size in entries:
+        if total <= cachesize: break
+        if entry == keep: continue
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+#------------------------------------------------------------------------------
+def readCached(filename, treename, varnames, selection='', start=0,
+               numrows=None):
+    '''
+    Return a dictionary of read-only, memory-mapped numpy arrays, one per
+    name in varnames, with the rows in [start, start+numrows) that pass the
+    selection (e.g., "f_massjj>0"). The columns are read from the HDF5
+    version of the ntuple (see columnutil.py) the first time and from the
+    cache afterwards.
+    '''
+    varnames = list(varnames)
+    if CACHEDIR == 'off':
+        names = varnames + selectionNames(selection)
+        columns = readColumns(filename, treename, names, start, numrows)
+        nrows = len(columns[names[0]])
+        select = selectionMask(columns, selection, nrows)
+        return dict([(name, columns[name][select]) for name in varnames])
+
+    source = h5name(filename)
+    if not os.path.exists(source):
+        sys.exit('** file %s not found' % source)
+    entry = os.path.join(CACHEDIR,
+                         entryName(source, treename, selection, start,
+                                   numrows))
+    if not os.path.exists(entry):
+        try:
+            os.makedirs(entry)
+        except OSError:
+            pass # created by another process
+
+    # indices of the selected rows
+    rowsname = os.path.join(entry, 'rows.npy')
+    if os.path.exists(rowsname):
+        rows = np.load(rowsname, mmap_mode='r')
+    else:
+        names = selectionNames(selection)
+        if len(names) > 0:
+            columns = readColumns(filename, treename, names, start, numrows)
+            nrows = len(columns[names[0]])
+        else:
+            # no selection: only the number of rows in range is needed
+            columns = {}
+            end = getEntries(filename, treename)
+            if numrows is not None:
+                end = min(end, start + numrows)
+            nrows = max(0, end - start)
+        rows = np.flatnonzero(selectionMask(columns, selection, nrows))
+        _save(rowsname, rows)
+
+    # read the columns not yet in the cache
+    missing = [name for name in varnames
+               if not os.path.exists(os.path.join(entry, '%s.npy' % name))]
+    written = False
+    if len(missing) > 0:
+        columns = readColumns(filename, treename, missing, start, numrows)
+        for name in missing:
+            _save(os.path.join(entry, '%s.npy' % name),
+                  columns[name][np.asarray(rows)])
+        written = True
+
+    columns = {}
+    for name in varnames:
+        columns[name] = np.load(os.path.join(entry, '%s.npy' % name),
+                                mmap_mode='r')
+    # mark as recently used
+    os.utime(entry, None)
+    if written: evict(keep=entry)
+    return columns
+#------------------------------------------------------------------------------
+def _statsName(filename, treename, name, chunksize):
+    # cache entry and file of the chunk statistics of a column
+    entry = os.path.join(CACHEDIR,
+                         entryName(h5name(filename), treename, '', 0, None))
+    return (entry, os.path.join(entry, '%s.minmax%d.npy' % (name, chunksize)))
+
+def chunkStatistics(filename, treename, name, chunksize=CHUNKSIZE):
+    '''
+    Return (mins, maxs, valid), the minimum and maximum of the column over
+    each chunk [k*chunksize, (k+1)*chunksize) of rows of the tree, and
+    whether they are known, as recorded in the cache. If the cache is off
+    or nothing is recorded, valid is False for every chunk. The file is
+    never read to compute them (see readSelected).
+    '''
+    nchunks = (getEntries(filename, treename) + chunksize - 1) // chunksize
+    if CACHEDIR != 'off':
+        entry, statsname = _statsName(filename, treename, name, chunksize)
+        if os.path.exists(statsname):
+            stats = np.load(statsname)
+            if stats.shape == (3, nchunks):
+                os.utime(entry, None)
+                return (stats[0], stats[1], stats[2] > 0)
+    return (np.zeros(nchunks), np.zeros(nchunks),
+            np.zeros(nchunks, dtype=bool))
+
+def _saveChunkStatistics(filename, treename, name, stats, chunksize):
+    entry, statsname = _statsName(filename, treename, name, chunksize)
+    if not os.path.exists(entry):
+        try:
+            os.makedirs(entry)
+        except OSError:
+            pass # created by another process
+    _save(statsname, np.array(stats, dtype=np.float64))
+#------------------------------------------------------------------------------
+def readSelected(filename, treename, varnames, selection='', start=0,
+                 numrows=None, chunksize=CHUNKSIZE):
+    '''
+    Iterate over the rows in [start, start+numrows) that pass the selection,
+    in chunks of at most chunksize rows. Each chunk is a dictionary of
+    arrays, one per name in varnames.
+
+    The selection is compiled once (see selection.py). Chunks in which, by
+    the minimum and maximum of the columns it uses, no row can pass are not
+    read; chunks in which every row passes are read without evaluating the
+    selection. Otherwise, only the selected rows are kept.
+
+    The minimum and maximum are taken from the cache (see chunkStatistics).
+    Those of a chunk not yet recorded are taken from the selection columns
+    when the chunk is read in full, and saved, if the cache is on, at the
+    end of the iteration.
+    '''
+    select = compileSelection(selection)
+    varnames = list(varnames)
+    names = list(varnames)
+    for name in select.names:
+        if name not in names: names.append(name)
+
+    ntotal = getEntries(filename, treename)
+    end = ntotal
+    if numrows is not None:
+        end = min(end, start + numrows)
+
+    # chunk statistics (mins, maxs, valid) of the selection columns; a
+    # chunk can be skipped only if those of all its columns are known
+    stats = dict([(name, chunkStatistics(filename, treename, name,
+                                         chunksize))
+                  for name in select.names])
+    known = np.ones((ntotal + chunksize - 1) // chunksize, dtype=bool)
+    for name in select.names:
+        known &= stats[name][2]
+    recorded = False
+
+    for k in xrange(start // chunksize, (end + chunksize - 1) // chunksize):
+        first = max(k * chunksize, start)
+        last  = min((k+1) * chunksize, end)
+        if first >= last: continue
+        decision = None
+        if known[k]:
+            decision = select.decide(dict([(name, (stats[name][0][k],
+                                                   stats[name][1][k]))
+                                           for name in select.names]))
+        if decision is False:
+            continue
+        if decision is True:
+            yield readColumns(filename, treename, varnames, first,
+                              last-first, chunksize)
+            continue
+        columns = readColumns(filename, treename, names, first, last-first,
+                              chunksize)
+        if not known[k] and first == k * chunksize and \
+          last == min((k+1) * chunksize, ntotal):
+            for name in select.names:
+                mins, maxs, valid = stats[name]
+                mins[k]  = np.min(columns[name])
+                maxs[k]  = np.max(columns[name])
+                valid[k] = True
+            recorded = True
+        mask = select(columns, last-first)
+        yield dict([(name, columns[name][mask]) for name in varnames])
+
+    if recorded and CACHEDIR != 'off':
+        for name in select.names:
+            _saveChunkStatistics(filename, treename, name, stats[name],
+                                 chunksize)
@@ -0,0 +1,229 @@
+#------------------------------------------------------------------------------
+# File: columnutil.py
+# Description: read ntuple columns straight into numpy arrays.
+#
+#   The HDF5 versions of the ntuples (data/ntuple_4mu_*.h5) contain a single
+#   compound dataset, named after the ROOT tree, with one field per branch.
+#   Reading a field from the dataset reads only that field, so we can pull in
+#   just the branches we need and do all further work with array operations.
+#
+# Created: 17-Oct-2026 HATS@LPC
+#------------------------------------------------------------------------------
+import os, sys
+import numpy as np
+import h5py
+from selection import compileSelection
+#------------------------------------------------------------------------------
+CHUNKSIZE = 100000 # number of rows to read at a time
+#------------------------------------------------------------------------------
+def h5name(filename):
+    # map ntuple_4mu_XX.root to ntuple_4mu_XX.h5
+    return os.path.splitext(filename)[0] + '.h5'
+#------------------------------------------------------------------------------
+def getEntries(filename, treename):
+    hfile = h5py.File(h5name(filename), 'r')
+    n = hfile[treename].shape[0]
+    hfile.close()
+    return n
+#------------------------------------------------------------------------------
+def readChunks(filename, treename, varnames, start=0, numrows=None,
+               chunksize=CHUNKSIZE, dtype=np.float64):
+    '''
+    Iterate over rows [start, start+numrows) of the specified tree in chunks
+    of at most chunksize rows. Each chunk is a dictionary of numpy arrays,
+    one per name in varnames. Only the requested columns are read.
+    '''
+    filename = h5name(filename)
+    if not os.path.exists(filename):
+        sys.exit('** file %s not found' % filename)
+
+    hfile = h5py.File(filename, 'r')
+    if treename not in hfile:
+        sys.exit("** can't find tree %s in %s" % (treename, filename))
+    dset = hfile[treename]
+
+    fields = dset.dtype.names
+    for name in varnames:
+        if name not in fields:
+            sys.exit("** can't find column %s in %s" % (name, filename))
+
+    # remove duplicates, but preserve order
+    names = []
+    for name in varnames:
+        if name not in names: names.append(name)
+
+    end = dset.shape[0]
+    if numrows is not None:
+        end = min(end, start + numrows)
+
+    try:
+        for first in xrange(start, end, chunksize):
+            last  = min(first + chunksize, end)
+            chunk = dset[(slice(first, last),) + tuple(names)]
+            columns = {}
+            for name in names:
+                if len(names) > 1:
+                    columns[name] = chunk[name].astype(dtype)
+                else:
+                    columns[name] = chunk.astype(dtype)
+            yield columns
+    finally:
+        hfile.close()
+#------------------------------------------------------------------------------
+def readColumns(filename, treename, varnames, start=0, numrows=None,
+                chunksize=CHUNKSIZE, dtype=np.float64):
+    '''
+    Return a dictionary of numpy arrays, one per name in varnames, for rows
+    [start, start+numrows) of the specified tree. Only the requested
+    columns are read.
+    '''
+    chunks = list(readChunks(filename, treename, varnames, start, numrows,
+                             chunksize, dtype))
+    columns = {}
+    for name in varnames:
+        if len(chunks) > 0:
+            columns[name] = np.concatenate([c[name] for c in chunks])
+        else:
+            columns[name] = np.empty(0, dtype=dtype)
+    return columns
+#------------------------------------------------------------------------------
+def readTree(filename, treename, names, size=1):
+    '''
+    Return a dictionary of numpy arrays, one per name, from a ROOT tree. A
+    name can be any expression understood by TTree::Draw, e.g.,
+    "f_deltajj[1]". If size > 1, the names are arrays of the given size and
+    the arrays returned have shape (nrows, size). If the file is an HDF5
+    file, the names must be column names.
+    '''
+    names = list(names)
+    if filename.endswith('.h5'):
+        return readColumns(filename, treename, names)
+
+    from ROOT import TFile
+    tfile = TFile(filename)
+    if not tfile.IsOpen():
+        sys.exit("** can't open file %s" % filename)
+    tree = tfile.Get(treename)
+    if not tree:
+        sys.exit("** can't find tree %s" % treename)
+
+    nrows = int(tree.GetEntries())
+    nvalues = nrows * size
+    tree.SetEstimate(nvalues+1)
+    columns = {}
+    # TTree::Draw returns up to 4 variables at a time
+    for first in xrange(0, len(names), 4):
+        batch = names[first:first+4]
+        tree.Draw(':'.join(batch), '', 'goff')
+        for j, name in enumerate(batch):
+            v = getattr(tree, 'GetV%d' % (j+1))()
+            if nrows == 0:
+                if size > 1:
+                    columns[name] = np.empty((0, size))
+                else:
+                    columns[name] = np.empty(0)
+                continue
+            v.SetSize(nvalues)
+            columns[name] = np.frombuffer(v, dtype=np.float64,
+                                          count=nvalues).copy()
+            if size > 1:
+                columns[name] = columns[name].reshape(nrows, size)
+    tfile.Close()
+    return columns
+#------------------------------------------------------------------------------
+def writeColumns(filename, treename, names, columns, complevel=2,
+                 chunksize=CHUNKSIZE, title=''):
+    '''
+    Write the numpy arrays columns[name], for name in names, as a table
+    with one row per entry: a ROOT tree if filename ends in .root, an HDF5
+    compound dataset if it ends in .h5. A column of shape (nrows, n) is
+    written as an array of n values per row. The rows are written
+    chunksize at a time with compression level complevel (0 = none).
+    '''
+    names = list(names)
+    nrows = len(columns[names[0]])
+    cols  = [np.asarray(columns[name], dtype=np.float64) for name in names]
+    shape = [c.shape[1:] for c in cols]
+    cols  = [c.reshape(nrows, int(np.prod(s))) for c, s in zip(cols, shape)]
+
+    if filename.endswith('.h5'):
+        dtype = np.dtype([(name, np.float64, s)
+                          for name, s in zip(names, shape)])
+        hfile = h5py.File(filename, 'w')
+        options = {}
+        if complevel > 0:
+            options = {'compression': 'gzip', 'compression_opts': complevel}
+        dset = hfile.create_dataset(treename, (nrows,), dtype=dtype,
+                                    maxshape=(None,),
+                                    chunks=(max(1, min(chunksize, nrows)),),
+                                    **options)
+        for first in xrange(0, nrows, chunksize):
+            last  = min(first + chunksize, nrows)
+            table = np.empty(last-first, dtype=dtype)
+            for name, c, s in zip(names, cols, shape):
+                table[name] = c[first:last].reshape((last-first,)+s)
+            dset[first:last] = table
+        hfile.close()
+        return
+
+    from ROOT import gROOT, TFile, TTree, TObject
+    import ROOT
+    # a loop that fills the tree from a block of rows, compiled once
+    if not hasattr(ROOT, 'fillColumns'):
+        gROOT.ProcessLine('''
+        void fillColumns(TTree* tree, int nrows, int width,
+                         const double* X, double* buffer)
+        {
+          for(int i=0; i < nrows; i++)
+            {
+              for(int j=0; j < width; j++) buffer[j] = X[i*width+j];
+              tree->Fill();
+            }
+        }''')
+
+    tfile = TFile(filename, 'recreate')
+    tfile.SetCompressionLevel(complevel)
+    tree  = TTree(treename, title)
+    # flush baskets every chunk of rows
+    tree.SetAutoFlush(chunksize)
+
+    # the branches point to consecutive slots of a single buffer
+    width  = sum([c.shape[1] for c in cols])
+    buffer = np.zeros(width)
+    offset = 0
+    for name, c, s in zip(names, cols, shape):
+        size = c.shape[1]
+        if len(s) == 0:
+            leaf = '%s/D' % name
+        else:
+            leaf = '%s[%d]/D' % (name, size)
+        tree.Branch(name, buffer[offset:offset+size], leaf)
+        offset += size
+
+    for first in xrange(0, nrows, chunksize):
+        last = min(first + chunksize, nrows)
+        X = np.ascontiguousarray(np.hstack([c[first:last] for c in cols]))
+        ROOT.fillColumns(tree, last-first, width, X, buffer)
+    tfile.Write('', TObject.kOverwrite)
+    tfile.Close()
+#------------------------------------------------------------------------------
+def selectionMask(columns, selection, nrows):
+    '''
+    Evaluate a selection string, e.g., "f_massjj>0", on a dictionary of
+    columns (see selection.py). An empty selection selects all rows.
+    '''
+    return compileSelection(selection).mask(columns, nrows)
+#------------------------------------------------------------------------------
+def selectionNames(selection):
+    # names of the columns used in a selection string
+    return list(compileSelection(selection).names)
+#------------------------------------------------------------------------------
+def weightedMeanStd(X, w):
+    '''
+    Return weighted means and standard deviations of the columns of the
+    (N, nvar) array X, given event weights w.
+    '''
+    sumw = w.sum()
+    mean = np.dot(w, X) / sumw
+    std  = np.sqrt(np.dot(w, X*X) / sumw - mean*mean)
+    return (mean, std)
@@ -0,0 +1,143 @@
+#------------------------------------------------------------------------------
+# File: cutflow.py
+# Description: cut flows from per-event bitmasks.
+#
+#   Each named cut is evaluated once (see selection.py) and stored as one
+#   bit of a per-event integer mask. The events are then summarized by the
+#   weighted count of each distinct bit pattern, from which every yield,
+#   cumulative (cuts applied in order) or N-1 (all cuts but one), follows
+#   by bit operations on the (few) patterns rather than on the events:
+#
+#     flow = CutFlow(columns, weights)
+#     flow.add('window', 'f_mass4l >= 110 && f_mass4l <= 136')
+#     flow.add('dijet',  'f_massjj > 0')
+#     flow.printTable()
+#     flow.set('window', 'f_mass4l >= 115 && f_mass4l <= 131')
+#
+#   Changing a cut (set) re-evaluates only the bit of that cut.
+#
+# Created: 17-Oct-2026 HATS@LPC
+#------------------------------------------------------------------------------
+import os, sys
+import numpy as np
+from selection import compileSelection
+#------------------------------------------------------------------------------
+MAXCUTS = 64 # number of bits in the per-event mask
+#------------------------------------------------------------------------------
+class CutFlow:
+    '''
+    Cut flow of a sample given a dictionary of columns and the event
+    weights (unit weights if weights is None).
+    '''
+    def __init__(self, columns, weights=None):
+        self.columns = columns
+        self.nrows = len(columns.values()[0]) if len(columns) > 0 else 0
+        if weights is None:
+            weights = np.ones(self.nrows)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        if len(self.weights) != self.nrows:
+            sys.exit('** CutFlow: %d weights for %d rows' % \
+                     (len(self.weights), self.nrows))
+        self.names = []
+        self.cuts  = {}
+        self.bits  = np.zeros(self.nrows, dtype=np.uint64)
+        self.patterns = None
+
+    def _evaluate(self, index, expr):
+        select = compileSelection(expr)
+        for name in select.names:
+            if name not in self.columns:
+                sys.exit("** CutFlow: can't find column %s for cut %s" % \
+                         (name, expr))
+        bit = np.uint64(1) << np.uint64(index)
+        passed = select.mask(self.columns, self.nrows)
+        self.bits &= ~bit
+        self.bits |= passed.astype(np.uint64) << np.uint64(index)
+        self.patterns = None
+
+    def add(self, name, expr):
+        '''
+        Add the cut named name, defined by the selection string expr.
+        '''
+        if name in self.cuts:
+            sys.exit('** CutFlow: cut %s already defined' % name)
+        if len(self.names) >= MAXCUTS:
+            sys.exit('** CutFlow: at most %d cuts' % MAXCUTS)
+        self.names.append(name)
+        self.cuts[name] = expr
+        self._evaluate(len(self.names)-1, expr)
+
+    def set(self, name, expr):
+        '''
+        Redefine the cut named name. Only that cut is re-evaluated.
+        '''
+        if name not in self.cuts:
+            sys.exit('** CutFlow: unknown cut %s' % name)
+        self.cuts[name] = expr
+        self._evaluate(self.names.index(name), expr)
+
+    def _summarize(self):
+        # weighted and unweighted counts per distinct bit pattern
+        if self.patterns is None:
+            patterns, inverse = np.unique(self.bits, return_inverse=True)
+            self.patterns = patterns
+            self.counts = np.bincount(inverse, minlength=len(patterns))
+            self.sumw   = np.bincount(inverse, self.weights,
+                                      minlength=len(patterns))
+        return (self.patterns, self.counts, self.sumw)
+
+    def mask(self, names=None):
+        '''
+        Return the integer with the bits of the named cuts (all by default).
+        '''
+        if names is None: names = self.names
+        m = 0
+        for name in names:
+            m |= 1 << self.names.index(name)
+        return np.uint64(m)
+
+    def yields(self, names=None):
+        '''
+        Return (count, sum of weights) of the events that pass the named
+        cuts (all by default).
+        '''
+        patterns, counts, sumw = self._summarize()
+        m = self.mask(names)
+        ok = (patterns & m) == m
+        return (int(counts[ok].sum()), sumw[ok].sum())
+
+    def passed(self, names=None):
+        '''
+        Return a boolean array of the events that pass the named cuts.
+        '''
+        m = self.mask(names)
+        return (self.bits & m) == m
+
+    def cumulative(self):
+        '''
+        Return a list of (name, count, sum of weights) after no cuts and
+        after each cut in turn, applied in the order they were added.
+        '''
+        flow = [('no cuts',) + self.yields([])]
+        for ii, name in enumerate(self.names):
+            flow.append((name,) + self.yields(self.names[:ii+1]))
+        return flow
+
+    def nMinusOne(self):
+        '''
+        Return a list of (name, count, sum of weights) of the events that
+        pass all cuts except the named one.
+        '''
+        return [(name,) + self.yields([n for n in self.names if n != name])
+                for name in self.names]
+
+    def printTable(self, nminus1=True):
+        print "cut flow"
+        for name, count, sumw in self.cumulative():
+            print "\t%-24s %10.3f (%d)" % (name+':', sumw, count)
+        if nminus1 and len(self.names) > 1:
+            print "N-1"
+            for name, count, sumw in self.nMinusOne():
+                print "\t%-24s %10.3f (%d)" % ('all but '+name+':',
+                                               sumw, count)
+        print
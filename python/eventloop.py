@@ -0,0 +1,164 @@
+#------------------------------------------------------------------------------
+# File: eventloop.py
+# Description: a single pass over an ntuple that feeds several consumers.
+#
+#   Consumers (histograms, counters, ...) are registered with an EventLoop,
+#   which reads, a chunk at a time, the union of the columns they need,
+#   applies the selection once per chunk and passes the selected rows of
+#   the chunk to every consumer (chunks with no selected rows are skipped):
+#
+#     loop = EventLoop(filename, treename, "f_massjj>0", start=5000)
+#     loop.add(Histogram2D(hsig, 'f_deltajj', 'f_massjj', 'f_weight'))
+#     loop.add(Histogram1D(hD, mva, 'f_weight', columns=mva.varnames))
+#     count = loop.add(Counter('f_weight'))
+#     loop.run()
+#
+#   A consumer is any object with a list of column names (columns) and the
+#   methods process(chunk), called with a dictionary of arrays, one per
+#   column, and finish(), called at the end of the pass.
+#
+# Created: 17-Oct-2026 HATS@LPC
+#------------------------------------------------------------------------------
+import os, sys
+import numpy as np
+from columnutil import CHUNKSIZE
+from columncache import readSelected
+from arrayhist import histogram1d, histogram2d, setContent
+#------------------------------------------------------------------------------
+def _values(x, chunk):
+    # x is a column name or a function of the chunk
+    if callable(x): return x(chunk)
+    return chunk[x]
+
+def _weights(weightname, chunk, n):
+    if weightname is None: return np.ones(n)
+    return np.asarray(chunk[weightname], dtype=np.float64)
+#------------------------------------------------------------------------------
+class Histogram1D:
+    '''
+    Fill the ROOT 1-D histogram h with x, a column name or a function that
+    maps a chunk to an array of values (in which case columns lists the
+    columns it needs), weighted by the column weightname, if given.
+    '''
+    def __init__(self, h, x, weightname=None, columns=None):
+        self.h = h
+        self.x = x
+        self.weightname = weightname
+        self.columns = list(columns or [])
+        if not callable(x): self.columns.append(x)
+        if weightname is not None: self.columns.append(weightname)
+        self.binning = (h.GetNbinsX(),
+                        h.GetXaxis().GetXmin(), h.GetXaxis().GetXmax())
+        self.sumw  = np.zeros(self.binning[0]+2)
+        self.sumw2 = np.zeros(self.binning[0]+2)
+        self.entries = 0
+
+    def process(self, chunk):
+        x = _values(self.x, chunk)
+        w = _weights(self.weightname, chunk, len(x))
+        self.sumw  += histogram1d(x, w, *self.binning)
+        self.sumw2 += histogram1d(x, w*w, *self.binning)
+        self.entries += len(x)
+
+    def finish(self):
+        setContent(self.h, self.sumw, self.entries, self.sumw2)
+#------------------------------------------------------------------------------
+class Histogram2D:
+    '''
+    Fill the ROOT 2-D histogram h with (x, y), each a column name or a
+    function of the chunk, weighted by the column weightname, if given.
+    '''
+    def __init__(self, h, x, y, weightname=None, columns=None):
+        self.h = h
+        self.x = x
+        self.y = y
+        self.weightname = weightname
+        self.columns = list(columns or [])
+        for v in [x, y]:
+            if not callable(v): self.columns.append(v)
+        if weightname is not None: self.columns.append(weightname)
+        self.binning = (h.GetNbinsX(),
+                        h.GetXaxis().GetXmin(), h.GetXaxis().GetXmax(),
+                        h.GetNbinsY(),
+                        h.GetYaxis().GetXmin(), h.GetYaxis().GetXmax())
+        shape = (self.binning[0]+2, self.binning[3]+2)
+        self.sumw  = np.zeros(shape)
+        self.sumw2 = np.zeros(shape)
+        self.entries = 0
+
+    def process(self, chunk):
+        x = _values(self.x, chunk)
+        y = _values(self.y, chunk)
+        w = _weights(self.weightname, chunk, len(x))
+        self.sumw  += histogram2d(x, y, w, *self.binning)
+        self.sumw2 += histogram2d(x, y, w*w, *self.binning)
+        self.entries += len(x)
+
+    def finish(self):
+        setContent(self.h, self.sumw, self.entries, self.sumw2)
+#------------------------------------------------------------------------------
+class Counter:
+    '''
+    Count the selected events and sum their weights (column weightname).
+    '''
+    def __init__(self, weightname=None):
+        self.weightname = weightname
+        self.columns = []
+        if weightname is not None: self.columns.append(weightname)
+        self.count = 0
+        self.sumw  = 0.0
+
+    def process(self, chunk):
+        n = len(chunk.values()[0])
+        self.count += n
+        if self.weightname is not None:
+            self.sumw += chunk[self.weightname].sum()
+        else:
+            self.sumw += n
+
+    def finish(self):
+        pass
+#------------------------------------------------------------------------------
+class EventLoop:
+    '''
+    Read rows [start, start+numrows) of the specified tree once, a chunk
+    at a time, and pass the rows that satisfy the selection to every
+    registered consumer.
+    '''
+    def __init__(self, filename, treename, selection='', start=0,
+                 numrows=None, chunksize=CHUNKSIZE):
+        self.filename  = filename
+        self.treename  = treename
+        self.selection = selection
+        self.start     = start
+        self.numrows   = numrows
+        self.chunksize = chunksize
+        self.consumers = []
+
+    def add(self, consumer):
+        self.consumers.append(consumer)
+        return consumer
+
+    def run(self):
+        '''
+        Return the number of selected rows.
+        '''
+        columns = []
+        for consumer in self.consumers:
+            for name in consumer.columns:
+                if name not in columns: columns.append(name)
+        if len(columns) == 0:
+            sys.exit('** EventLoop: no columns requested')
+
+        # chunks in which no row passes the selection are skipped
+        # (see columncache.py)
+        nrows = 0
+        for chunk in readSelected(self.filename, self.treename, columns,
+                                  self.selection, self.start, self.numrows,
+                                  self.chunksize):
+            nrows += len(chunk[columns[0]])
+            for consumer in self.consumers:
+                consumer.process(chunk)
+        for consumer in self.consumers:
+            consumer.finish()
+        return nrows
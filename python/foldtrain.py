@@ -0,0 +1,182 @@
+#------------------------------------------------------------------------------
+# File: foldtrain.py
+# Description: train the cross-validation folds of a keras model in parallel.
+#
+#   Each fold is trained in its own worker process, each process using
+#   few threads (THREADS by default), so that the folds share the cores of
+#   the machine rather than being trained one after the other. The
+#   training history, the predictions for the test events and the trained
+#   weights of each fold are sent back to the parent process:
+#
+#     folds   = list(kfold.split(X, Y))
+#     results = trainFolds(create_baseline, X, Y, folds, nworkers=5,
+#                          nb_epoch=100, batch_size=32, verbose=0,
+#                          callbacks=[early_stopping])
+#     mean_tpr, mean_auc = rocSummary(Y, folds, results, mean_fpr)
+#
+#   A worker is not forked from the parent, whose keras backend (e.g., the
+#   TensorFlow runtime) would not survive the fork, but is a new python
+#   process that runs this file. The model of each fold is built in the
+#   parent, by create_model(), and saved (model.save) with the data and the
+#   fit arguments in a temporary directory, from which the worker loads
+#   them. The numerical libraries of a worker (OpenMP, MKL, OpenBLAS) and
+#   its TensorFlow session are limited to threads threads by setting
+#   OMP_NUM_THREADS, MKL_NUM_THREADS and OPENBLAS_NUM_THREADS in the
+#   environment of the worker only; the parent is left as it is.
+#
+#   The fit arguments (e.g., callbacks) must therefore be picklable and the
+#   model must be one that keras.models.load_model can read back.
+#
+# Created: 17-Oct-2026 HATS@LPC
+#------------------------------------------------------------------------------
+import os, sys, shutil, tempfile
+import cPickle as pickle
+import numpy as np
+from subprocess import Popen, PIPE, STDOUT
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+#------------------------------------------------------------------------------
+THREADS = 1 # threads per worker process
+THREADVARS = ['OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS']
+#------------------------------------------------------------------------------
+def _newSession(threads):
+    # limit the threads of the backend (TensorFlow) in this process
+    from keras import backend as K
+    if K.backend() == 'tensorflow':
+        import tensorflow as tf
+        if hasattr(K, 'clear_session'): K.clear_session()
+        config = tf.ConfigProto(intra_op_parallelism_threads=threads,
+                                inter_op_parallelism_threads=1)
+        K.set_session(tf.Session(config=config))
+
+def _fit(model, X, Y, train, test, fitargs):
+    history = model.fit(X[train], Y[train],
+                        validation_data=(X[test], Y[test]), **fitargs)
+    return {'history': history.history,
+            'score':   np.ravel(model.predict(X[test])),
+            'weights': model.get_weights()}
+#------------------------------------------------------------------------------
+def _worker(workdir, k):
+    # train fold k from the files written by trainFolds to workdir
+    task = pickle.load(open(os.path.join(workdir, 'task%d.pkl' % k), 'rb'))
+    _newSession(task['threads'])
+    if task['seed'] is not None:
+        np.random.seed(task['seed'] + k)
+    from keras.models import load_model
+    model = load_model(os.path.join(workdir, 'model%d.h5' % k))
+    X = np.load(os.path.join(workdir, 'X.npy'), mmap_mode='r')
+    Y = np.load(os.path.join(workdir, 'Y.npy'), mmap_mode='r')
+    result = _fit(model, X, Y, task['train'], task['test'], task['fitargs'])
+
+    # write, then rename, so that the parent never reads a partial file
+    resultname = os.path.join(workdir, 'result%d.pkl' % k)
+    out = open(resultname + '.tmp', 'wb')
+    try:
+        pickle.dump(result, out, pickle.HIGHEST_PROTOCOL)
+    finally:
+        out.close()
+    os.rename(resultname + '.tmp', resultname)
+#------------------------------------------------------------------------------
+def trainFolds(create_model, X, Y, folds, nworkers=None, threads=THREADS,
+               seed=None, **fitargs):
+    '''
+    Train a model, built by create_model(), on each fold (train, test) of
+    folds, with model.fit(X[train], Y[train], validation_data=(X[test],
+    Y[test]), **fitargs). The folds are trained in nworkers processes (by
+    default, one per fold, but no more than the number of cores divided by
+    threads), each limited to threads threads. If nworkers is 1, the folds
+    are trained one after the other in this process, with its own thread
+    settings. If seed is given, the numpy random seed is set to seed + k
+    before the model of fold k is built and again before it is trained.
+
+    Return a list with, for each fold, a dictionary with the training
+    history (history.history), the predictions for the test events (score)
+    and the trained weights (weights; see model.set_weights).
+    '''
+    folds = list(folds)
+    if nworkers is None:
+        nworkers = min(len(folds), max(1, cpu_count() // (threads or 1)))
+    nworkers = max(1, min(nworkers, len(folds)))
+
+    if nworkers == 1:
+        results = []
+        for k, (train, test) in enumerate(folds):
+            if seed is not None: np.random.seed(seed + k)
+            results.append(_fit(create_model(), X, Y, train, test, fitargs))
+        return results
+
+    workdir = tempfile.mkdtemp(prefix='foldtrain')
+    try:
+        np.save(os.path.join(workdir, 'X.npy'), np.asarray(X))
+        np.save(os.path.join(workdir, 'Y.npy'), np.asarray(Y))
+        for k, (train, test) in enumerate(folds):
+            if seed is not None: np.random.seed(seed + k)
+            create_model().save(os.path.join(workdir, 'model%d.h5' % k))
+            task = {'train': train, 'test': test, 'threads': threads,
+                    'seed': seed, 'fitargs': fitargs}
+            try:
+                pickle.dump(task, open(os.path.join(workdir,
+                                                    'task%d.pkl' % k), 'wb'),
+                            pickle.HIGHEST_PROTOCOL)
+            except (pickle.PicklingError, TypeError), e:
+                sys.exit('** foldtrain: cannot pass the fit arguments to '\
+                         'the workers: %s' % e)
+
+        # the thread limits apply to the workers only
+        env = dict(os.environ)
+        for name in THREADVARS:
+            env[name] = '%d' % threads
+        script  = os.path.splitext(os.path.abspath(__file__))[0] + '.py'
+        command = [sys.executable, script, workdir]
+
+        def run(k):
+            # the threads of this pool only wait for the workers
+            worker = Popen(command + ['%d' % k], env=env,
+                           stdout=PIPE, stderr=STDOUT)
+            output = worker.communicate()[0]
+            return (worker.returncode, output)
+
+        pool = ThreadPool(nworkers)
+        try:
+            status = pool.map(run, range(len(folds)), chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+        results = []
+        for k, (returncode, output) in enumerate(status):
+            if output:
+                print "==> fold %d" % k
+                print output
+            resultname = os.path.join(workdir, 'result%d.pkl' % k)
+            if returncode != 0 or not os.path.exists(resultname):
+                sys.exit('** foldtrain: training of fold %d failed' % k)
+            results.append(pickle.load(open(resultname, 'rb')))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+#------------------------------------------------------------------------------
+def rocSummary(Y, folds, results, mean_fpr=None):
+    '''
+    Add the ROC curve (fpr, tpr) and its area (auc) of each fold to its
+    results and return (mean_tpr, mean_auc), the true positive rate,
+    averaged over folds, at the false positive rates mean_fpr (by default,
+    100 points in [0, 1]) and its area.
+    '''
+    from sklearn.metrics import roc_curve, auc
+    if mean_fpr is None: mean_fpr = np.linspace(0, 1, 100)
+    mean_tpr = np.zeros(len(mean_fpr))
+    for (train, test), result in zip(folds, results):
+        fpr, tpr, thresholds = roc_curve(Y[test], result['score'])
+        result['fpr'] = fpr
+        result['tpr'] = tpr
+        result['auc'] = auc(fpr, tpr)
+        mean_tpr += np.interp(mean_fpr, fpr, tpr)
+        mean_tpr[0] = 0.0
+    mean_tpr /= len(results)
+    mean_tpr[-1] = 1.0
+    return (mean_tpr, auc(mean_fpr, mean_tpr))
+#------------------------------------------------------------------------------
+if __name__ == '__main__':
+    # a worker process started by trainFolds
+    _worker(sys.argv[1], int(sys.argv[2]))
@@ -0,0 +1,186 @@
+#------------------------------------------------------------------------------
+# File: ladderhull.py
+# Description: outer boundary (staircase) of ladder cuts.
+#
+#   A ladder cut is the OR of n cut-points, each of which is the AND of two
+#   one-sided cuts, e.g., (deltajj < x_k) AND (massjj > y_k). The region
+#   selected by a cut-point is a quadrant and the region selected by the
+#   ladder is a union of quadrants, whose boundary is a staircase. Only the
+#   cut-points that are not inside the quadrant of another cut-point lie on
+#   the staircase.
+#
+#   After flipping the sign of any variable with a '>' cut, every quadrant
+#   has the form X < X_k, Y < Y_k and cut-point j is redundant if there is
+#   a cut-point k with X_k >= X_j and Y_k >= Y_j. The staircase is found by
+#   sorting the cut-points in decreasing X and keeping those whose Y exceeds
+#   the largest Y seen so far, i.e., in O(n log n) operations. The sort and
+#   the running maximum are done for all ladders at once.
+#
+# Created: 17-Oct-2026 HATS@LPC
+#------------------------------------------------------------------------------
+import os, sys
+import numpy as np
+#------------------------------------------------------------------------------
+def signs(cutdirs):
+    # +1 for '<' cuts, -1 for '>' cuts
+    s = []
+    for name, cutdir in cutdirs:
+        if cutdir not in ['<', '>']:
+            sys.exit('** ladder cut %s %s is not one-sided' % (name, cutdir))
+        if cutdir == '<':
+            s.append(1.0)
+        else:
+            s.append(-1.0)
+    return s
+#------------------------------------------------------------------------------
+def staircases(x, y, cutdirs):
+    '''
+    Given arrays x and y of shape (nladders, n) of the cut values of
+    nladders ladders of n cut-points, return (order, onhull), where
+    order[i] lists the cut-points of ladder i in decreasing order of X
+    (the signed x) and onhull[i] flags the ones on the staircase.
+    '''
+    x = np.atleast_2d(np.asarray(x, dtype=np.float64))
+    y = np.atleast_2d(np.asarray(y, dtype=np.float64))
+    sx, sy = signs(cutdirs)
+    X = sx * x
+    Y = sy * y
+
+    # sort each ladder by decreasing X, then decreasing Y
+    nladders, n = X.shape
+    rows  = np.repeat(np.arange(nladders), n).reshape(nladders, n)
+    order = np.lexsort((-Y.ravel(), -X.ravel(), rows.ravel()))
+    order = order.reshape(nladders, n) - rows * n
+    Y = Y[rows, order]
+
+    # keep points above the running maximum of Y
+    ymax = np.maximum.accumulate(Y, axis=1)
+    onhull = np.ones((nladders, n), dtype=bool)
+    onhull[:, 1:] = Y[:, 1:] > ymax[:, :-1]
+    return (order, onhull)
+#------------------------------------------------------------------------------
+class LadderHull:
+    '''
+    Collect ladder cuts and their figures of merit, and return the staircase
+    of any ladder, the ladders being ranked in decreasing order of the
+    figure of merit:
+
+      hull = LadderHull(xmin, xmax, ymin, ymax, cutdirs)
+      hull.add(Z, x, y)           # one ladder at a time, or
+      hull.addAll(Z, X, Y)        # all ladders at once
+      Z, outerhull, cutpoints = hull(0)   # best ladder
+
+    where cutdirs is [(xname, '<' or '>'), (yname, '<' or '>')] and
+    outerhull and cutpoints are lists of (x, y) pairs.
+    '''
+    def __init__(self, xmin, xmax, ymin, ymax, cutdirs):
+        self.xmin = xmin
+        self.xmax = xmax
+        self.ymin = ymin
+        self.ymax = ymax
+        self.cutdirs = cutdirs
+        self.sx, self.sy = signs(cutdirs)
+        self.Zs = []
+        self.xs = []
+        self.ys = []
+        self.Z  = None
+        self.objects = []
+
+    def add(self, Z, x, y):
+        self.Zs.append(Z)
+        self.xs.append(np.array(x, dtype=np.float64))
+        self.ys.append(np.array(y, dtype=np.float64))
+        self.Z = None
+
+    def addAll(self, Z, x, y):
+        x = np.atleast_2d(x)
+        y = np.atleast_2d(y)
+        self.Zs.extend(np.asarray(Z).tolist())
+        self.xs.extend(x)
+        self.ys.extend(y)
+        self.Z = None
+
+    def __len__(self):
+        return len(self.Zs)
+
+    def _build(self):
+        # compute the staircases of all ladders at once
+        self.Z = np.array(self.Zs, dtype=np.float64)
+        self.x = np.array(self.xs)
+        self.y = np.array(self.ys)
+        self.order, self.onhull = staircases(self.x, self.y, self.cutdirs)
+        self.rank = np.argsort(-self.Z, kind='mergesort')
+
+    def __call__(self, index=0):
+        '''
+        Return (Z, outerhull, cutpoints) for the ladder with the index-th
+        largest figure of merit.
+        '''
+        if self.Z is None: self._build()
+        if index < 0 or index >= len(self.Z):
+            sys.exit('** ladder index %d out of range' % index)
+        row = self.rank[index]
+        hull = self.order[row][self.onhull[row]]
+        # list hull points in increasing x
+        hull = hull[np.argsort(self.x[row][hull], kind='mergesort')]
+        outerhull = zip(self.x[row][hull], self.y[row][hull])
+        cutpoints = zip(self.x[row], self.y[row])
+        return (self.Z[row], outerhull, cutpoints)
+
+    def staircase(self, outerhull):
+        '''
+        Return the x and y coordinates of the boundary of the region
+        selected by the ladder whose staircase is outerhull.
+        '''
+        sx, sy = self.sx, self.sy
+        # order corners by decreasing X (increasing Y)
+        corners = sorted(outerhull, key=lambda p: -sx*p[0])
+        # the boundary starts at the edge where Y is unbounded below and
+        # ends at the edge where X is unbounded below
+        yedge = self.ymin if sy > 0 else self.ymax
+        xedge = self.xmin if sx > 0 else self.xmax
+        x = [corners[0][0]]
+        y = [yedge]
+        for k, (xk, yk) in enumerate(corners):
+            x.append(xk)
+            y.append(yk)
+            if k+1 < len(corners):
+                x.append(corners[k+1][0])
+            else:
+                x.append(xedge)
+            y.append(yk)
+        return (x, y)
+
+    def draw(self, cut, hullcolor=1, plotall=False):
+        '''
+        Draw the staircase of the ladder cut = (Z, outerhull, cutpoints)
+        on the current pad and, if plotall is True, all its cut-points.
+        '''
+        from ROOT import TGraph
+        from array import array
+        Z, outerhull, cutpoints = cut
+        if plotall:
+            g = TGraph(len(cutpoints),
+                       array('d', [p[0] for p in cutpoints]),
+                       array('d', [p[1] for p in cutpoints]))
+            g.SetMarkerStyle(20)
+            g.SetMarkerSize(0.8)
+            g.SetMarkerColor(hullcolor)
+            g.Draw('p same')
+            self.objects.append(g)
+
+        x, y = self.staircase(outerhull)
+        g = TGraph(len(x), array('d', x), array('d', y))
+        g.SetLineColor(hullcolor)
+        g.SetLineWidth(2)
+        g.Draw('l same')
+        self.objects.append(g)
+
+        g = TGraph(len(outerhull),
+                   array('d', [p[0] for p in outerhull]),
+                   array('d', [p[1] for p in outerhull]))
+        g.SetMarkerStyle(20)
+        g.SetMarkerSize(1.0)
+        g.SetMarkerColor(hullcolor)
+        g.Draw('p same')
+        self.objects.append(g)
@@ -0,0 +1,612 @@
+#------------------------------------------------------------------------------
+# File: mvautil.py
+# Description: evaluate the TMVA discriminants created in 4_nonlinear
+#              on batches of events.
+#
+#   The standalone class code written by TMVA (weights/HATS_*.class.C)
+#   evaluates one event per call. BatchMVA compiles, alongside the class,
+#   a small C++ loop that evaluates a whole (N, nvar) array of inputs, so
+#   that we cross from Python into C++ once per batch rather than once
+#   per event.
+#
+#   BDTForest and MLPNetwork read the BDT and the MLP into numpy arrays
+#   and evaluate them without ROOT. They are used by default; BatchMVA is
+#   the fallback for class code they cannot read (maketree.py ... root).
+#   ROOT is loaded, and the class compiled, only when a BatchMVA is
+#   created.
+#
+# Created: 17-Oct-2026 HATS@LPC
+#------------------------------------------------------------------------------
+import os, sys, re
+import numpy as np
+#------------------------------------------------------------------------------
+MAXTABLE = 2**22 # maximum number of cells in the BDT lookup table
+#------------------------------------------------------------------------------
+def getTreeWeights(code):
+    # hack to get tree weights from TMVA class code
+    get = re.compile('(?<=fBoostWeights[.]push_back\().*?(?=\);)', re.DOTALL)
+    rec = get.findall(code)
+    if len(rec) == 0:
+        sys.exit('** cannot get weights from BDT class code')
+    return [float(t) for t in rec]
+#------------------------------------------------------------------------------
+def getVarnames(code):
+    # hack to get variables from TMVA class code
+    # get lines from NVar to NSpec
+    get = re.compile('(?s)NVar(.*?)NSpec', re.M)
+    rec = get.findall(code)
+    if len(rec) == 0:
+        sys.exit('** cannot get variable names from class code')
+    # split at newline (skip first line)
+    rec = rec[0].strip().split('\n')[1:]
+
+    # first field of each line is the variable name
+    return [t.split()[0] for t in rec]
+#------------------------------------------------------------------------------
+def getClassname(code):
+    get = re.compile('(?<=class )Read\w+(?=\s*:\s*public\s+IClassifierReader)')
+    rec = get.findall(code)
+    if len(rec) == 0:
+        sys.exit('** cannot get class name from class code')
+    return rec[0]
+#------------------------------------------------------------------------------
+class BatchMVA:
+    '''
+    Wrapper of a TMVA standalone class (weights/HATS_*.class.C) that
+    evaluates the discriminant for an (N, nvar) array of inputs:
+
+        mva = BatchMVA('weights/HATS_MLP.class.C')
+        D   = mva(X)
+
+    The columns of X must be in the order given by mva.varnames. If
+    calibrate is True, the output of a BDT is mapped to [0, 1] using
+
+        D = 1/(1 + exp(-2*summedalpha*D))
+
+    where summedalpha is the sum of the AdaBoost tree weights.
+    '''
+    def __init__(self, codename, calibrate=False):
+        from ROOT import gROOT, vector
+        import ROOT
+
+        if not os.path.exists(codename):
+            sys.exit('** file %s NOT found\n'\
+                     '** run ../4_nonlinear/train.py to create it\n' % codename)
+        self.code = open(codename).read()
+        self.classname = getClassname(self.code)
+        self.varnames  = getVarnames(self.code)
+
+        print "=> compiling %s" % codename
+        gROOT.ProcessLine(self.code)
+
+        # a loop over events compiled next to the class, one per class
+        evaluate = 'evaluate%s' % self.classname
+        if not hasattr(ROOT, evaluate):
+            gROOT.ProcessLine('''
+            void %(evaluate)s(%(classname)s& reader,
+                              int nrows, int nvar,
+                              const double* X, double* D)
+            {
+              std::vector<double> x(nvar);
+              for(int i=0; i < nrows; i++)
+                {
+                  for(int j=0; j < nvar; j++) x[j] = X[i*nvar+j];
+                  D[i] = reader.GetMvaValue(x);
+                }
+            }''' % {'evaluate': evaluate, 'classname': self.classname})
+
+        inputnames = vector('string')()
+        for name in self.varnames:
+            inputnames.push_back(name)
+        self.reader   = getattr(ROOT, self.classname)(inputnames)
+        self.evaluate = getattr(ROOT, evaluate)
+
+        self.summedalpha = None
+        self.calibrate   = calibrate
+        if calibrate:
+            self.summedalpha = sum(getTreeWeights(self.code))
+
+    def __call__(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        nrows, nvar = X.shape
+        if nvar != len(self.varnames):
+            sys.exit('** %s expects %d inputs, got %d' % \
+                     (self.classname, len(self.varnames), nvar))
+        D = np.zeros(nrows)
+        if nrows > 0:
+            self.evaluate(self.reader, nrows, nvar, X, D)
+        if self.calibrate:
+            D = 1.0/(1 + np.exp(-2*self.summedalpha*D))
+        return D
+#------------------------------------------------------------------------------
+# Native (numpy) evaluation of the BDT
+#------------------------------------------------------------------------------
+def _parseForestCode(code):
+    # The forest is written as nested constructor calls, one per tree,
+    #   fForest.push_back( NN( left, right, ..., selector, cutValue,
+    #                          cutType, nodeType, purity, response) );
+    # where NN is "new BDTNode" and a null child is written as 0. We
+    # flatten the nodes into a list, children before parents, so that
+    # the root of a tree is the last node created for it.
+    text = code[code.find('fForest.push_back'):]
+    token = re.compile('NN\s*\(|\(|\)|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+    nodes = []
+    roots = []
+    for tree in text.split('fForest.push_back')[1:]:
+        tree  = tree[:tree.find(';')]
+        stack = []
+        for t in token.findall(tree):
+            if t[0] == 'N':
+                stack.append([])
+            elif t == ')':
+                if len(stack) == 0: break
+                args = stack.pop()
+                left, right = args[0], args[1]
+                selector, cut, cuttype, nodetype, purity = args[-6:-1]
+                nodes.append((left, right, int(selector), cut,
+                              int(cuttype), int(nodetype), purity))
+                node = ('node', len(nodes)-1)
+                if len(stack) > 0:
+                    stack[-1].append(node)
+                else:
+                    roots.append(node[1])
+                    break
+            elif t == '(':
+                continue
+            elif len(stack) > 0:
+                stack[-1].append(float(t))
+    if len(roots) == 0:
+        sys.exit('** cannot get trees from BDT class code')
+    return (nodes, roots)
+#------------------------------------------------------------------------------
+def _parseForestXML(filename):
+    # TMVA weight file: one <BinaryTree boostWeight="..."> per tree, with
+    # nested <Node pos="l|r" IVar=".." Cut=".." cType=".." nType="..">
+    import xml.etree.ElementTree as ET
+    root = ET.parse(filename).getroot()
+
+    varnames = [v.get('Expression') for v in root.iter('Variable')]
+    nodes   = []
+    roots   = []
+    weights = []
+
+    def flatten(element):
+        children = {}
+        for child in element.findall('Node'):
+            children[child.get('pos')] = flatten(child)
+        left  = children.get('l', 0)
+        right = children.get('r', 0)
+        nodes.append((left, right,
+                      int(element.get('IVar')),
+                      float(element.get('Cut')),
+                      int(element.get('cType')),
+                      int(element.get('nType')),
+                      float(element.get('purity'))))
+        return ('node', len(nodes)-1)
+
+    for tree in root.iter('BinaryTree'):
+        weights.append(float(tree.get('boostWeight')))
+        roots.append(flatten(tree.find('Node'))[1])
+    if len(roots) == 0:
+        sys.exit('** cannot get trees from BDT weight file')
+    return (nodes, roots, weights, varnames)
+#------------------------------------------------------------------------------
+class BDTForest:
+    '''
+    Numpy version of a TMVA (AdaBoost) BDT, read either from the standalone
+    class code (weights/HATS_BDT.class.C) or from the weight file
+    (weights/HATS_BDT.weights.xml):
+
+        bdt = BDTForest('weights/HATS_BDT.class.C')
+        D   = bdt(X)
+
+    The forest is stored as flat node arrays,
+
+        feature[node]    index of variable cut on (-1 for a leaf)
+        threshold[node]  cut value
+        left[node]       index of left child (leaf points to itself)
+        right[node]      index of right child (leaf points to itself)
+        value[node]      leaf value (+1 signal, -1 background)
+        roots[tree]      index of root node of each tree
+        weights[tree]    boost weight of each tree
+
+    and all events of a batch are passed through all trees at once, one
+    tree level per step. The response, as in the TMVA class, is
+
+        D = sum_t weights[t] * value(leaf_t) / sum_t weights[t]
+
+    Since the response of the full forest is constant within each cell of
+    the grid formed by the cuts, it is tabulated on that grid the first
+    time it is needed (provided the grid has at most MAXTABLE cells) and
+    evaluated thereafter by a search and a lookup per event.
+
+    If calibrate is True, D is mapped to [0, 1] using
+
+        D = 1/(1 + exp(-2*summedalpha*D))
+    '''
+    def __init__(self, filename, calibrate=False, batchsize=10000):
+        if not os.path.exists(filename):
+            sys.exit('** file %s NOT found\n'\
+                     '** run ../4_nonlinear/train.py to create it\n' % filename)
+        if filename.endswith('.xml'):
+            nodes, roots, weights, varnames = _parseForestXML(filename)
+        else:
+            code = open(filename).read()
+            nodes, roots = _parseForestCode(code)
+            weights  = getTreeWeights(code)
+            varnames = getVarnames(code)
+        if len(weights) != len(roots):
+            sys.exit('** found %d trees, but %d boost weights' % \
+                     (len(roots), len(weights)))
+
+        nnodes = len(nodes)
+        self.varnames  = varnames
+        self.feature   = np.zeros(nnodes, dtype=np.intp)
+        self.threshold = np.zeros(nnodes)
+        self.left      = np.arange(nnodes, dtype=np.intp)
+        self.right     = np.arange(nnodes, dtype=np.intp)
+        self.value     = np.zeros(nnodes)
+        self.purity    = np.zeros(nnodes)
+        self.internal  = np.zeros(nnodes, dtype=bool)
+        self.roots     = np.array(roots, dtype=np.intp)
+        self.weights   = np.array(weights)
+        self.summedalpha = self.weights.sum()
+        self.calibrate = calibrate
+        self.batchsize = batchsize
+
+        cuttype = np.ones(nnodes, dtype=bool)
+        for i, (left, right, selector, cut, ctype, ntype, purity) \
+          in enumerate(nodes):
+            self.purity[i] = purity
+            if ntype == 0 and left != 0 and right != 0:
+                # intermediate node
+                self.internal[i]  = True
+                self.feature[i]   = selector
+                self.threshold[i] = cut
+                self.left[i]      = left[1]
+                self.right[i]     = right[1]
+                cuttype[i]        = ctype != 0
+            else:
+                self.feature[i]   = -1
+                self.value[i]     = ntype
+        # a node sends an event right if (x > cut) == cutType. For
+        # evaluation, store the children of each node in the order
+        # (x <= cut, x > cut) so that the next node is
+        #   children[2*node + (x > cut)]
+        # A leaf is its own child, so events that reach a leaf stay there.
+        self.children = np.empty(2*nnodes, dtype=np.intp)
+        self.children[0::2] = np.where(cuttype, self.left, self.right)
+        self.children[1::2] = np.where(cuttype, self.right, self.left)
+        self.cuttype = cuttype
+        self._feature = np.where(self.internal, self.feature, 0)
+
+        # depth of deepest tree = number of steps needed to reach
+        # every leaf
+        depth = np.zeros(nnodes, dtype=np.intp)
+        for i in xrange(nnodes-1, -1, -1):
+            if self.internal[i]:
+                depth[self.left[i]]  = depth[i] + 1
+                depth[self.right[i]] = depth[i] + 1
+        self.maxdepth = depth.max()
+
+    def __len__(self):
+        return len(self.roots)
+
+    def leaves(self, X, firstTree=0, lastTree=None):
+        '''
+        Return the (N, ntrees) array of leaf indices reached by each event
+        (row of X) in trees firstTree to lastTree (inclusive).
+        '''
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if lastTree is None: lastTree = len(self.roots)-1
+        roots = self.roots[firstTree:lastTree+1]
+        nrows, nvar = X.shape
+        # offset of each event in the flattened input array
+        offset = (np.arange(nrows, dtype=np.intp) * nvar)[:, np.newaxis]
+        node = np.repeat(roots[np.newaxis, :], nrows, axis=0)
+        x = X.ravel()
+        for depth in xrange(self.maxdepth):
+            goright = x.take(offset + self._feature.take(node)) \
+              > self.threshold.take(node)
+            node = self.children.take(2*node + goright)
+        return node
+
+    def treeValues(self, X, firstTree=0, lastTree=None):
+        '''
+        Return the (N, ntrees) array of weighted leaf values, that is, the
+        contribution of each tree to the (unnormalized) response.
+        '''
+        if lastTree is None: lastTree = len(self.roots)-1
+        weights = self.weights[firstTree:lastTree+1]
+        return self.value[self.leaves(X, firstTree, lastTree)] * weights
+
+    def responses(self, X, ranges):
+        '''
+        Return the (N, len(ranges)) array of responses of sub-forests.
+        Each element of ranges is either a number of trees n, meaning the
+        first n trees, or a pair (firstTree, lastTree) (inclusive). The
+        contribution of each tree is computed once per event and the
+        response of every sub-forest is obtained from running sums, so
+
+            bdt.responses(X, range(1, len(bdt)+1))
+
+        (forest growth, one tree at a time) costs about the same as one
+        evaluation of the full forest.
+        '''
+        X = np.asarray(X, dtype=np.float64)
+        first = []
+        last  = []
+        for r in ranges:
+            if type(r) in (tuple, list):
+                first.append(r[0])
+                last.append(r[1])
+            else:
+                first.append(0)
+                last.append(r-1)
+        first = np.array(first, dtype=np.intp)
+        last  = np.array(last,  dtype=np.intp)
+        if len(first) > 0 and \
+          (first.min() < 0 or last.max() >= len(self.roots) or \
+           (first > last).any()):
+            sys.exit('** tree ranges must lie within [0, %d]' % \
+                     (len(self.roots)-1))
+
+        # running sums, with a leading zero so that the sum over trees
+        # first to last is cum[last+1] - cum[first]
+        cumw = np.concatenate(([0.0], np.cumsum(self.weights)))
+        norm = cumw[last+1] - cumw[first]
+
+        D = np.empty((X.shape[0], len(first)))
+        for start in xrange(0, X.shape[0], self.batchsize):
+            end = start + self.batchsize
+            values = self.treeValues(X[start:end])
+            cum = np.zeros((len(values), len(self.roots)+1))
+            np.cumsum(values, axis=1, out=cum[:, 1:])
+            D[start:end] = (cum[:, last+1] - cum[:, first]) / norm
+        if self.calibrate:
+            D = 1.0/(1 + np.exp(-2*self.summedalpha*D))
+        return D
+
+    def _evaluate(self, X, firstTree, lastTree):
+        # pass events through the trees, a batch at a time
+        norm = self.weights[firstTree:lastTree+1].sum()
+        D = np.empty(X.shape[0])
+        for first in xrange(0, X.shape[0], self.batchsize):
+            last = first + self.batchsize
+            D[first:last] = self.treeValues(X[first:last],
+                                            firstTree,
+                                            lastTree).sum(axis=1) / norm
+        return D
+
+    def _cells(self, X):
+        # index of the cell of the cut grid that contains each event.
+        # Along each variable, cell k is the interval (cut[k-1], cut[k]]
+        # so that (x > cut) is the same for every x in the cell.
+        k = [np.searchsorted(cuts, X[:, j], side='left')
+             for j, cuts in enumerate(self.cuts)]
+        return np.ravel_multi_index(k, self.shape)
+
+    def _buildTable(self):
+        # The response of the forest is constant within each cell of the
+        # grid formed by all the cuts along each variable. If the grid
+        # is small enough, tabulate the response once so that
+        # evaluation reduces to a search and a lookup per event.
+        self.table = None
+        self.cuts  = []
+        for j in xrange(len(self.varnames)):
+            select = self.internal & (self.feature == j)
+            self.cuts.append(np.unique(self.threshold[select]))
+        self.shape = tuple([len(cuts)+1 for cuts in self.cuts])
+        ncells = np.prod(self.shape, dtype=np.float64)
+        if ncells > MAXTABLE: return
+
+        # one point per cell: the upper edge of the cell, or a value
+        # above the largest cut for the last cell
+        points = []
+        for cuts in self.cuts:
+            if len(cuts) > 0:
+                last = cuts[-1] + max(1.0, abs(cuts[-1]))
+            else:
+                last = 0.0
+            points.append(np.append(cuts, last))
+        grid = np.meshgrid(*points, indexing='ij')
+        P = np.column_stack([g.ravel() for g in grid])
+        self.table = self._evaluate(P, 0, len(self.roots)-1)
+
+    def __call__(self, X, firstTree=0, lastTree=None):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(self.varnames):
+            sys.exit('** BDTForest expects an (N, %d) array of inputs' % \
+                     len(self.varnames))
+        if lastTree is None: lastTree = len(self.roots)-1
+
+        if firstTree == 0 and lastTree == len(self.roots)-1:
+            if not hasattr(self, 'table'): self._buildTable()
+        if firstTree == 0 and lastTree == len(self.roots)-1 \
+          and self.table is not None:
+            D = self.table[self._cells(X)]
+        else:
+            D = self._evaluate(X, firstTree, lastTree)
+
+        if self.calibrate:
+            D = 1.0/(1 + np.exp(-2*self.summedalpha*D))
+        return D
+#------------------------------------------------------------------------------
+# Native (numpy) evaluation of the MLP
+#------------------------------------------------------------------------------
+def _rationalTanh(x):
+    # the fast tanh of newer TMVA versions: a rational approximation,
+    # clipped to +/-1 for |x| > 4.97, computed as in the class, i.e.,
+    #   float x2 = x*x;  float a = x*(...);  float b = ...;  return a/b;
+    x  = np.asarray(x, dtype=np.float64)
+    x2 = (x*x).astype(np.float32)
+    a  = (x * (np.float32(135135.0) + x2*(np.float32(17325.0) +
+               x2*(np.float32(378.0) + x2)))).astype(np.float32)
+    b  = np.float32(135135.0) + x2*(np.float32(62370.0) +
+         x2*(np.float32(3150.0) + x2*np.float32(28.0)))
+    y  = (a / b).astype(np.float64)
+    return np.where(x > 4.97, 1.0, np.where(x < -4.97, -1.0, y))
+
+# neuron activation functions, identified by the body of the corresponding
+# method of the TMVA class
+ACTIVATIONS = [('135135.0',      _rationalTanh),
+               ('tanh(',         lambda x: np.tanh(x)),
+               ('exp(-x*x/2.0)', lambda x: np.exp(-x*x/2.0)),
+               ('1.0/(1.0+exp(-x))', lambda x: 1.0/(1.0+np.exp(-x))),
+               ('max(0.0,x)',    lambda x: np.maximum(0.0, x)),
+               ('max(0,x)',      lambda x: np.maximum(0.0, x)),
+               ('returnx;',      lambda x: x)]
+
+# the same, identified by the NeuronType option of the TMVA weight file
+NEURONTYPES = {'tanh':    lambda x: np.tanh(x),
+               'radial':  lambda x: np.exp(-x*x/2.0),
+               'sigmoid': lambda x: 1.0/(1.0+np.exp(-x)),
+               'ReLU':    lambda x: np.maximum(0.0, x),
+               'linear':  lambda x: x}
+#------------------------------------------------------------------------------
+def _getNeuronType(xmlname):
+    # <Option name="NeuronType" ...>tanh</Option> of the TMVA weight file
+    if xmlname is None or not os.path.exists(xmlname):
+        return None
+    import xml.etree.ElementTree as ET
+    for option in ET.parse(xmlname).getroot().iter('Option'):
+        if option.get('name') == 'NeuronType':
+            return (option.text or '').strip()
+    return None
+#------------------------------------------------------------------------------
+def _getActivation(code, name, xmlname=None):
+    get = re.compile('(?<!\w)%s\s*\(\s*double\s+x\s*\)\s*const\s*\{(.*?)\}'\
+                     % name, re.DOTALL)
+    rec = get.findall(code)
+    if len(rec) == 0:
+        sys.exit('** cannot get %s from MLP class code' % name)
+    # strip comments and white space
+    body = re.sub('//[^\n]*', '', rec[0])
+    body = re.sub('\s+', '', body)
+    for key, function in ACTIVATIONS:
+        if key.replace(' ', '') in body:
+            return (key, function)
+    # fall back to the activation function named in the weight file
+    # (that of the hidden layers)
+    neurontype = _getNeuronType(xmlname)
+    if name == 'ActivationFnc' and neurontype in NEURONTYPES:
+        return (neurontype, NEURONTYPES[neurontype])
+    sys.exit('** unknown activation function %s in MLP class code' % body)
+#------------------------------------------------------------------------------
+def _getMatrix(code, name):
+    # entries of the form name[i][j] = value;
+    get = re.compile('%s\[(\d+)\]\[(\d+)\]\s*=\s*([^;]+);' % name)
+    rec = get.findall(code)
+    if len(rec) == 0: return None
+    nrows = max([int(i) for i, j, v in rec]) + 1
+    ncols = max([int(j) for i, j, v in rec]) + 1
+    M = np.zeros((nrows, ncols))
+    for i, j, v in rec:
+        M[int(i), int(j)] = float(v)
+    return M
+#------------------------------------------------------------------------------
+class MLPNetwork:
+    '''
+    Numpy version of a TMVA MLP, read from the standalone class code
+    (weights/HATS_MLP.class.C):
+
+        mlp = MLPNetwork('weights/HATS_MLP.class.C')
+        D   = mlp(X)
+
+    The class code provides the layer sizes (each layer, except the
+    output layer, has an extra bias node fixed to 1), the weight matrices
+    fWeightMatrix<l>to<l+1>[o][i] and the activation functions of the
+    hidden and output layers. tanh may also be the rational approximation
+    written by newer TMVA versions; a hidden layer activation not
+    recognized in the class is taken from the NeuronType option of the
+    weight file (weights/HATS_MLP.weights.xml). If the MLP was trained
+    with VarTransform=N, the inputs are first mapped to [-1, 1] using the
+    ranges fMin_1, fMax_1 for all classes combined, exactly as in the
+    class.
+
+    The network is evaluated as one matrix product per layer for a batch
+    of events, with the sum over inputs done in the same order as in the
+    class, so the results agree with GetMvaValue to rounding.
+    '''
+    def __init__(self, codename, batchsize=100000):
+        if not os.path.exists(codename):
+            sys.exit('** file %s NOT found\n'\
+                     '** run ../4_nonlinear/train.py to create it\n' % codename)
+        code = open(codename).read()
+        self.varnames  = getVarnames(code)
+        self.batchsize = batchsize
+
+        get = re.compile('fLayerSize\[(\d+)\]\s*=\s*(\d+)')
+        rec = get.findall(code)
+        if len(rec) == 0:
+            sys.exit('** cannot get layer sizes from MLP class code')
+        self.layersizes = [int(n) for l, n in sorted(rec, key=lambda t: int(t[0]))]
+        nlayers = len(self.layersizes)
+        if self.layersizes[0]-1 != len(self.varnames):
+            sys.exit('** MLP has %d inputs, but %d variables' % \
+                     (self.layersizes[0]-1, len(self.varnames)))
+
+        # weight matrices, one per pair of adjacent layers. For all but
+        # the output layer, the weights of the bias node are not needed.
+        self.weights = []
+        for l in xrange(nlayers-1):
+            W = _getMatrix(code, 'fWeightMatrix%dto%d' % (l, l+1))
+            if W is None:
+                sys.exit('** cannot get weight matrix %d to %d '\
+                         'from MLP class code' % (l, l+1))
+            nout = self.layersizes[l+1]
+            if l < nlayers-2: nout -= 1
+            self.weights.append(W[:nout, :self.layersizes[l]])
+
+        # the weight file, if any, written by TMVA next to the class code
+        xmlname = None
+        if codename.endswith('.class.C'):
+            xmlname = codename[:-len('.class.C')] + '.weights.xml'
+        self.activation = _getActivation(code, 'ActivationFnc', xmlname)
+        self.outputActivation = _getActivation(code, 'OutputActivationFnc')
+
+        # input normalization (VarTransform=N)
+        self.offset = None
+        self.scale  = None
+        if re.search('Transform_2', code):
+            sys.exit('** only the normalization transformation '\
+                     'of the MLP inputs is supported')
+        fmin = _getMatrix(code, 'fMin_1')
+        fmax = _getMatrix(code, 'fMax_1')
+        if fmin is not None and fmax is not None:
+            # the last row holds the ranges for all classes combined
+            self.offset = fmin[-1]
+            self.scale  = 1.0/(fmax[-1] - fmin[-1])
+
+    def transform(self, X):
+        X = np.array(X, dtype=np.float64)
+        if self.offset is not None:
+            X = (X - self.offset)*self.scale * 2 - 1
+        return X
+
+    def _evaluate(self, X):
+        A = self.transform(X)
+        nlayers = len(self.layersizes)
+        for l, W in enumerate(self.weights):
+            # add bias node
+            A = np.column_stack((A, np.ones(len(A))))
+            Z = np.zeros((len(A), W.shape[0]))
+            for i in xrange(W.shape[1]):
+                Z += W[:, i] * A[:, i:i+1]
+            if l < nlayers-2:
+                A = self.activation[1](Z)
+            else:
+                A = self.outputActivation[1](Z)
+        return A[:, 0]
+
+    def __call__(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(self.varnames):
+            sys.exit('** MLPNetwork expects an (N, %d) array of inputs' % \
+                     len(self.varnames))
+        D = np.empty(X.shape[0])
+        for first in xrange(0, X.shape[0], self.batchsize):
+            last = first + self.batchsize
+            D[first:last] = self._evaluate(X[first:last])
+        return D
@@ -0,0 +1,65 @@
+#------------------------------------------------------------------------------
+# File: parallel.py
+# Description: map a function over tasks with a pool of forked processes.
+#
+#   The large, read-only arguments shared by all tasks (event arrays, a
+#   template workspace, ...) are placed in a module variable before the
+#   worker processes are forked, so that the workers inherit them rather
+#   than receive a pickled copy with each task. Only the tasks and the
+#   results are pickled:
+#
+#     def countShard(task, events, cuts):
+#         first, last = task
+#         ...
+#     counts = parallelMap(countShard, tasks, nworkers,
+#                          events=events, cuts=cuts)
+#
+#   The results are returned in the order of the tasks, so they do not
+#   depend on the number of workers. A worker that calls sys.exit does not
+#   leave the pool waiting: its message is passed back and the parent
+#   exits with it.
+#
+# Created: 17-Oct-2026 HATS@LPC
+#------------------------------------------------------------------------------
+import os, sys
+from multiprocessing import Pool, cpu_count
+#------------------------------------------------------------------------------
+class WorkerExit(Exception):
+    '''
+    sys.exit called in a worker process, with its message.
+    '''
+    pass
+
+# the function and shared arguments, inherited by the worker processes
+_shared = {}
+
+def _call(task):
+    try:
+        return _shared['func'](task, **_shared['args'])
+    except SystemExit, e:
+        # otherwise the worker dies and the pool waits for it forever
+        raise WorkerExit(str(e.code))
+#------------------------------------------------------------------------------
+def parallelMap(func, tasks, nworkers=1, **shared):
+    '''
+    Return [func(task, **shared) for task in tasks], computed by nworkers
+    forked processes (at most one per task), or in this process if
+    nworkers is 1.
+    '''
+    tasks = list(tasks)
+    nworkers = max(1, min(nworkers, len(tasks)))
+    if nworkers == 1:
+        return [func(task, **shared) for task in tasks]
+
+    _shared.update(func=func, args=shared)
+    try:
+        pool = Pool(nworkers)
+        try:
+            return pool.map(_call, tasks, chunksize=1)
+        except WorkerExit, e:
+            sys.exit(e.args[0])
+        finally:
+            pool.close()
+            pool.join()
+    finally:
+        _shared.clear()
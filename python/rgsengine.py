@@ -0,0 +1,484 @@
+#------------------------------------------------------------------------------
+# File: rgsengine.py
+# Description: numpy implementation of the random grid search (RGS).
+#
+#   Definitions:
+#     1. A cut is a threshold on a single variable, e.g., x > xcut.
+#     2. A cut-point is the AND of a sequence of cuts.
+#     3. A box cut is a two-sided threshold, e.g., (x > xlow) and (x < xhigh)
+#     4. A ladder cut is the OR of cut-points.
+#
+#   As in libRGS, the cut values are taken from the events of a cut-point
+#   file and, for every cut-point, we compute the weighted count and the
+#   fraction of events of each sample that pass it. The RGS class mirrors
+#   the interface of the libRGS class:
+#
+#     rgs = RGS(cutdatafilename, start, maxcuts, treename, weightname,
+#               selection)
+#     rgs.add(filename, start, numrows, "_b", weight)
+#     rgs.run("rgs.cuts")
+#     rgs.save("rgs.root")
+#
+#   but, rather than looping over events for every cut-point, the counts
+#   are obtained as follows. Each variable is replaced by the rank of its
+#   value among the distinct values in the sample, so that every cut
+#   becomes a range of ranks, lo <= rank < hi. Then
+#
+#     one variable:  count = P(hi) - P(lo), where P is the cumulative sum
+#                    of weights over ranks.
+#     two variables: a cut-point is a rectangle in rank space, whose count
+#                    is F(hx, hy) - F(lx, hy) - F(hx, ly) + F(lx, ly), where
+#                    F(a, b) is the total weight of events with rank_x < a
+#                    and rank_y < b. A ladder of one-sided cuts is a
+#                    staircase, which is a union of disjoint rectangles,
+#                    two F terms per cut-point of the ladder. All F terms
+#                    for all cut-points are computed together with a single
+#                    sweep over the events (see dominance2d) or, for
+#                    rectangles, looked up in a summed-area table of F
+#                    (see summedArea), whichever is cheaper. The table of
+#                    each sample is built once, on the grid of event ranks
+#                    (or, if that grid is too large, on the grid of rank
+#                    bounds of the cut-points), and shared by the workers.
+#
+#   For more than two variables, the counts are computed by comparing
+#   blocks of events against blocks of cut-points.
+#
+#   The cut-points can be split into shards, which are counted in parallel
+#   by a pool of processes that share the (read-only) event arrays (see
+#   parallel.py):
+#
+#     rgs.run("rgs.cuts", nworkers=cpu_count())
+#
+#   The shards are merged in the original cut-point order, so the results
+#   do not depend on the number of workers.
+#
+#   Format of the cuts file (e.g., rgs.cuts):
+#
+#     # comment
+#     variable-name  cut-type      (one of >, <, <>, |>, |<, ==)
+#     \ladder n                    (start of a ladder of n cut-points)
+#     variable-name  cut-type
+#     \end                         (end of ladder)
+#
+# Created: 17-Oct-2026 HATS@LPC
+#------------------------------------------------------------------------------
+import os, sys, re
+import numpy as np
+from time import time
+from parallel import parallelMap, cpu_count
+from columnutil import writeColumns, h5name
+from columncache import readCached
+#------------------------------------------------------------------------------
+CUTTYPES  = ['>', '<', '<>', '|>', '|<', '==']
+BLOCKSIZE = 2**24 # number of (event, cut-point) pairs per block (brute force)
+SHARDS_PER_WORKER = 4 # number of shards of cut-points per worker process
+MAXTABLE  = 2**22 # maximum number of cells of a summed-area table
+CELLS_PER_QUERY = 100 # table cells that cost about as much as one sweep entry
+#------------------------------------------------------------------------------
+def readCuts(varfilename):
+    '''
+    Return (cuts, laddersize), where cuts is a list of (variable, cut-type)
+    and laddersize is the number of cut-points per ladder (0 if the cuts
+    do not define a ladder cut).
+    '''
+    if not os.path.exists(varfilename):
+        sys.exit("** can't open variables file %s" % varfilename)
+    cuts = []
+    laddersize = 0
+    inladder = False
+    for line in open(varfilename):
+        line = line.strip()
+        if line == '' or line[0] == '#': continue
+        t = line.split()
+        if t[0] == '\\ladder':
+            if len(t) < 2:
+                sys.exit('** \\ladder requires a number of cut-points')
+            laddersize = int(t[1])
+            inladder = True
+            continue
+        if t[0] == '\\end':
+            inladder = False
+            continue
+        if len(t) < 2 or t[1] not in CUTTYPES:
+            sys.exit('** bad cut "%s" in %s' % (line, varfilename))
+        if laddersize > 0 and not inladder:
+            sys.exit('** cuts outside a ladder are not supported '\
+                     'in a ladder search')
+        cuts.append((t[0], t[1]))
+    if len(cuts) == 0:
+        sys.exit('** no cuts found in %s' % varfilename)
+    if laddersize > 0:
+        for name, cuttype in cuts:
+            if cuttype in ['<>', '==']:
+                sys.exit('** ladder cuts must be one-sided')
+    return (cuts, laddersize)
+#------------------------------------------------------------------------------
+def dominance2d(rx, ry, w, A, B):
+    '''
+    Return F[q] = sum of w[i] over events i with rx[i] < A[q] and
+    ry[i] < B[q], for every query q.
+
+    The events and queries are sorted by x, so that the events that satisfy
+    rx < A precede query (A, B), and the condition ry < B is then handled
+    one bit of the y rank at a time, from the most significant bit down:
+    at each step, elements are grouped by the bits of y already processed
+    (keeping the x order within a group), and a query whose current bit is
+    1 collects the weight of the preceding events in its group whose
+    current bit is 0. The cost is O((N + Q) log(N + Q) log(ny)).
+    '''
+    ne = len(rx)
+    nq = len(A)
+    F  = np.zeros(nq)
+    if ne == 0 or nq == 0: return F
+
+    # event rx < A  <=>  2*rx+1 < 2*A
+    xkey = np.concatenate((2*np.asarray(rx, dtype=np.int64)+1,
+                           2*np.asarray(A,  dtype=np.int64)))
+    ykey = np.concatenate((np.asarray(ry, dtype=np.int64),
+                           np.asarray(B,  dtype=np.int64)))
+    isquery = np.concatenate((np.zeros(ne, dtype=bool),
+                              np.ones(nq, dtype=bool)))
+    weight  = np.concatenate((np.asarray(w, dtype=np.float64),
+                              np.zeros(nq)))
+
+    order = np.argsort(xkey, kind='mergesort')
+    nbits = max(int(ykey.max()).bit_length(), 1)
+    index = np.arange(ne+nq)
+    for level in xrange(nbits-1, -1, -1):
+        y   = ykey[order]
+        bit = (y >> level) & 1
+        e   = np.where(bit == 0, weight[order], 0.0)
+        cum = np.cumsum(e) - e # weight of preceding events with bit 0
+
+        # first position of each group
+        prefix = y >> (level+1)
+        first  = np.ones(len(y), dtype=bool)
+        first[1:] = prefix[1:] != prefix[:-1]
+        start  = np.maximum.accumulate(np.where(first, index, 0))
+
+        q = isquery[order] & (bit == 1)
+        F[order[q]-ne] += cum[q] - cum[start[q]]
+
+        # split each group by the current bit, keeping the x order
+        order = order[np.argsort(y >> level, kind='mergesort')]
+    return F
+#------------------------------------------------------------------------------
+def summedArea(rx, ry, w, xedges, yedges):
+    '''
+    Return the summed-area table T[i, j] = sum of w[k] over events k with
+    rx[k] < xedges[i] and ry[k] < yedges[j], where xedges and yedges are
+    increasing rank bounds.
+
+    Each event is assigned to the cell (i, j) of the smallest xedges[i] >
+    rx and yedges[j] > ry, and T is the 2-D cumulative sum of the weighted
+    cell counts. The cost is O(N log N + nx*ny), after which F(a, b), for
+    any bounds a in xedges and b in yedges, is a single lookup.
+    '''
+    nx = len(xedges)
+    ny = len(yedges)
+    cx = np.searchsorted(xedges, rx, 'right')
+    cy = np.searchsorted(yedges, ry, 'right')
+    # events in cells nx or ny are never counted
+    keep = (cx < nx) & (cy < ny)
+    T = np.bincount(cx[keep] * ny + cy[keep],
+                    np.asarray(w, dtype=np.float64)[keep],
+                    minlength=nx*ny)
+    return T.reshape(nx, ny).cumsum(axis=1).cumsum(axis=0)
+#------------------------------------------------------------------------------
+def _countShard(task, rgs, events, lower, upper):
+    # count events of sample i that pass cut-points [first, last)
+    i, first, last = task
+    ranks, w, table = events[i]
+    low  = dict([(name, x[first:last]) for name, x in lower.items()])
+    high = dict([(name, x[first:last]) for name, x in upper.items()])
+    return rgs._count(ranks, w, low, high, table)
+#------------------------------------------------------------------------------
+class RGS:
+    '''
+    Random grid search. See the description at the top of this file.
+    '''
+    def __init__(self, cutdatafilename, start, maxcuts, treename,
+                 weightname='', selection=''):
+        self.cutdatafilename = cutdatafilename
+        self.start     = start
+        self.maxcuts   = maxcuts
+        self.treename  = treename
+        self.weightname= weightname
+        self.selection = selection
+        self.samples   = []
+        self.results   = None
+
+    def _read(self, filename, start, numrows, varnames):
+        # read selected rows of the columns (see columncache.py)
+        names = list(varnames)
+        if self.weightname != '':
+            names.append(self.weightname)
+        return readCached(filename, self.treename, names, self.selection,
+                          start, numrows)
+
+    def add(self, filename, start=0, numrows=None, suffix=None, weight=1.0):
+        '''
+        Add a sample of numrows events, starting at row start. The counts
+        and fractions of this sample are named count<suffix> and
+        fraction<suffix> (by default, the suffix is the index of the sample).
+        Each event is weighted by weight times the value of the field
+        weightname, if given.
+        '''
+        if not os.path.exists(h5name(filename)):
+            sys.exit("** can't open file %s" % h5name(filename))
+        if suffix is None: suffix = '%d' % len(self.samples)
+        self.samples.append((filename, start, numrows, suffix, weight))
+
+    def run(self, varfilename, nworkers=1):
+        '''
+        Compute the count and fraction of events of each sample that pass
+        each cut-point defined by the cuts in varfilename. If nworkers > 1,
+        the cut-points are split into shards that are counted by a pool of
+        nworkers processes.
+        '''
+        cuts, laddersize = readCuts(varfilename)
+        self.cuts = cuts
+        self.laddersize = laddersize
+        varnames = [name for name, cuttype in cuts]
+
+        # ---------------------------------------------------------------
+        # get cut values from cut-point file
+        # ---------------------------------------------------------------
+        print "=> RGS: reading cut-points from %s" % self.cutdatafilename
+        cutdata = self._read(self.cutdatafilename, self.start, self.maxcuts,
+                             varnames)
+        ncuts = len(cutdata[varnames[0]])
+        if laddersize > 0:
+            ncuts = ncuts // laddersize
+        if ncuts == 0:
+            sys.exit('** no cut-points selected from %s' % \
+                     self.cutdatafilename)
+
+        # cut values per variable: an array of shape (ncuts, n) where n is
+        # the number of cut-points per ladder (1 if no ladder), and, for
+        # box cuts, lower and upper values
+        self.cutvalues = {}
+        lower = {}
+        upper = {}
+        for name, cuttype in cuts:
+            x = cutdata[name]
+            if cuttype in ['|>', '|<']: x = np.abs(x)
+            if cuttype == '<>':
+                # the two values of a box cut come from successive
+                # cut-point events
+                y = np.roll(x, -1)
+                lower[name] = np.minimum(x, y)[:ncuts, np.newaxis]
+                upper[name] = np.maximum(x, y)[:ncuts, np.newaxis]
+                self.cutvalues[name] = np.column_stack((lower[name],
+                                                        upper[name]))
+            else:
+                n = max(laddersize, 1)
+                lower[name] = x[:ncuts*n].reshape(ncuts, n)
+                upper[name] = lower[name]
+                if laddersize > 0:
+                    self.cutvalues[name] = lower[name]
+                else:
+                    self.cutvalues[name] = lower[name][:, 0]
+
+        # ---------------------------------------------------------------
+        # read samples and replace values by their ranks
+        # ---------------------------------------------------------------
+        self.results = {}
+        for name in varnames:
+            self.results[name] = self.cutvalues[name]
+        self.totals  = {}
+        events = []
+        for filename, start, numrows, suffix, weight in self.samples:
+            data = self._read(filename, start, numrows, varnames)
+            w = weight * np.ones(len(data[varnames[0]]))
+            if self.weightname != '':
+                w *= data[self.weightname]
+            self.totals[suffix] = w.sum()
+            ranks = self._ranks(data)
+            events.append((ranks, w, self._table(ranks, w, lower, upper)))
+
+        # ---------------------------------------------------------------
+        # count events that pass each cut-point. The cut-points are split
+        # into shards, which are counted in parallel if nworkers > 1.
+        # ---------------------------------------------------------------
+        t0 = time()
+        if nworkers > 1:
+            nshards = SHARDS_PER_WORKER * nworkers
+        else:
+            nshards = 1
+        bounds = np.linspace(0, ncuts, min(nshards, ncuts)+1).astype(int)
+        tasks  = [(i, first, last)
+                  for i in xrange(len(events))
+                  for first, last in zip(bounds[:-1], bounds[1:])]
+
+        # the worker processes inherit (and do not modify) the event arrays
+        counts = parallelMap(_countShard, tasks, nworkers, rgs=self,
+                             events=events, lower=lower, upper=upper)
+
+        # merge shards in cut-point order
+        nshards = len(bounds) - 1
+        for i, (filename, start, numrows, suffix, weight) in \
+          enumerate(self.samples):
+            count = np.concatenate(counts[i*nshards:(i+1)*nshards])
+            total = self.totals[suffix]
+            self.results['count%s' % suffix] = count
+            if total > 0:
+                self.results['fraction%s' % suffix] = count / total
+            else:
+                self.results['fraction%s' % suffix] = np.zeros(len(count))
+            print "=> RGS: %-30s %8d events %8d cut-points" % \
+              (filename, len(events[i][1]), len(count))
+        print "=> RGS: counting time %8.1f s (%d shards, %d workers)" % \
+          (time()-t0, nshards, max(nworkers, 1))
+        return self.results
+
+    def _ranks(self, data):
+        # rank of each value among the distinct values of each cut variable
+        ranks = []
+        for name, cuttype in self.cuts:
+            x = data[name]
+            if cuttype in ['|>', '|<']: x = np.abs(x)
+            u = np.unique(x)
+            ranks.append((np.searchsorted(u, x), u))
+        return ranks
+
+    def _ranges(self, u, cuttype, low, high):
+        # rank range [lo, hi) of events that pass each cut
+        if cuttype in ['>', '|>']:
+            lo = np.searchsorted(u, low, 'right')
+            hi = np.full(low.shape, len(u), dtype=np.intp)
+        elif cuttype in ['<', '|<']:
+            lo = np.zeros(low.shape, dtype=np.intp)
+            hi = np.searchsorted(u, high, 'left')
+        elif cuttype == '<>':
+            lo = np.searchsorted(u, low,  'right')
+            hi = np.searchsorted(u, high, 'left')
+        else:
+            lo = np.searchsorted(u, low,  'left')
+            hi = np.searchsorted(u, high, 'right')
+        return (lo, np.maximum(lo, hi))
+
+    def _table(self, events, w, lower, upper):
+        # summed-area table (T, xedges, yedges) of a sample for rectangle
+        # cut-points (see summedArea), or None if the sweep is cheaper. The
+        # table is built on the full grid of event ranks if it has at most
+        # MAXTABLE cells, otherwise on the coarser grid of the distinct rank
+        # bounds of the cut-points, which is still exact for every lookup.
+        if len(self.cuts) != 2 or self.laddersize > 0: return None
+        (rx, ux), (ry, uy) = events
+        (lx, hx), (ly, hy) = [self._ranges(u, cuttype, lower[name],
+                                           upper[name])
+                              for (name, cuttype), (r, u) in \
+                                zip(self.cuts, events)]
+        xedges = np.arange(len(ux)+1)
+        yedges = np.arange(len(uy)+1)
+        if len(xedges) * len(yedges) > MAXTABLE:
+            xedges = np.unique(np.concatenate((lx.ravel(), hx.ravel())))
+            yedges = np.unique(np.concatenate((ly.ravel(), hy.ravel())))
+        ncells = len(xedges) * len(yedges)
+        # the table is cheaper when there are many more cut-points than
+        # events (4 queries per cut-point for the sweep)
+        if ncells > MAXTABLE or \
+          ncells > CELLS_PER_QUERY * (len(rx) + 4*len(lx)):
+            return None
+        return (summedArea(rx, ry, w, xedges, yedges), xedges, yedges)
+
+    def _count(self, events, w, lower, upper, table=None):
+        # events: list of (ranks, distinct values), one per cut
+        # table:  summed-area table of the events, if any (see _table)
+        ranks  = []
+        ranges = []
+        for (name, cuttype), (r, u) in zip(self.cuts, events):
+            ranks.append((r, len(u)))
+            ranges.append(self._ranges(u, cuttype, lower[name], upper[name]))
+
+        nvar = len(self.cuts)
+        if nvar == 1 and self.laddersize == 0:
+            r, n = ranks[0]
+            lo, hi = ranges[0]
+            P = np.concatenate(([0.0], np.cumsum(np.bincount(r, w,
+                                                             minlength=n))))
+            return P[hi[:, 0]] - P[lo[:, 0]]
+
+        if nvar == 2 and self.laddersize == 0:
+            # rectangle: four dominance terms per cut-point
+            (rx, nx), (ry, ny) = ranks
+            (lx, hx), (ly, hy) = ranges
+            lx, hx, ly, hy = lx[:, 0], hx[:, 0], ly[:, 0], hy[:, 0]
+            if table is not None:
+                # four corners of each rectangle in the table
+                T, xedges, yedges = table
+                lx, hx = [np.searchsorted(xedges, x) for x in (lx, hx)]
+                ly, hy = [np.searchsorted(yedges, y) for y in (ly, hy)]
+                return T[hx, hy] - T[lx, hy] - T[hx, ly] + T[lx, ly]
+            F = dominance2d(rx, ry, w, np.concatenate((hx, lx, hx, lx)),
+                            np.concatenate((hy, hy, ly, ly)))
+            F = F.reshape(4, -1)
+            return F[0] - F[1] - F[2] + F[3]
+
+        if nvar == 2:
+            return self._countLadder(ranks, ranges, w)
+
+        return self._countBlocks(ranks, ranges, w)
+
+    def _countLadder(self, ranks, ranges, w):
+        # Flip the ranks of variables with a lower threshold so that every
+        # cut is of the form rank < bound. A ladder is then the union of
+        # the quadrants [0, A_k) x [0, B_k). Sorting its cut-points in
+        # decreasing order of A, the union is the disjoint union of the
+        # strips [A_(k+1), A_(k)) x [0, max(B_(1),...,B_(k))).
+        r = []
+        bound = []
+        for (rank, n), (lo, hi), (name, cuttype) in zip(ranks, ranges,
+                                                        self.cuts):
+            if cuttype in ['>', '|>']:
+                r.append(n-1-rank)
+                bound.append(n-lo)
+            else:
+                r.append(rank)
+                bound.append(hi)
+        A, B = bound
+        ncuts, n = A.shape
+        order = np.argsort(-A, axis=1, kind='mergesort')
+        rows  = np.arange(ncuts)[:, np.newaxis]
+        A = A[rows, order]
+        B = np.maximum.accumulate(B[rows, order], axis=1)
+        Anext = np.column_stack((A[:, 1:], np.zeros(ncuts, dtype=A.dtype)))
+        F = dominance2d(r[0], r[1], w,
+                        np.concatenate((A.ravel(), Anext.ravel())),
+                        np.concatenate((B.ravel(), B.ravel())))
+        F = F.reshape(2, ncuts, n)
+        return (F[0] - F[1]).sum(axis=1)
+
+    def _countBlocks(self, ranks, ranges, w):
+        # compare blocks of events with blocks of cut-points
+        nevents = len(w)
+        ncuts, n = ranges[0][0].shape
+        count = np.zeros(ncuts)
+        if nevents == 0: return count
+        step = max(1, BLOCKSIZE // (nevents * n))
+        for first in xrange(0, ncuts, step):
+            last = min(first + step, ncuts)
+            passed = np.zeros((nevents, last-first), dtype=bool)
+            for k in xrange(n):
+                p = np.ones((nevents, last-first), dtype=bool)
+                for (rank, nr), (lo, hi) in zip(ranks, ranges):
+                    r = rank[:, np.newaxis]
+                    p &= (r >= lo[first:last, k]) & (r < hi[first:last, k])
+                passed |= p
+            count[first:last] = np.dot(w, passed)
+        return count
+
+    def save(self, filename):
+        '''
+        Write the results to a ROOT file (if filename ends in .root) or to
+        an HDF5 file, as a table named RGS with one row per cut-point.
+        '''
+        if self.results is None:
+            sys.exit('** RGS.run must be called before RGS.save')
+        names = [name for name, cuttype in self.cuts]
+        for filename_, start, numrows, suffix, weight in self.samples:
+            names += ['count%s' % suffix, 'fraction%s' % suffix]
+        print "=> RGS: writing %s" % filename
+        writeColumns(filename, 'RGS', names, self.results,
+                     title='RGS results')
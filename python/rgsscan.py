@@ -0,0 +1,101 @@
+#------------------------------------------------------------------------------
+# File: rgsscan.py
+# Description: scan the results of a random grid search (RGS) with numpy.
+#
+#   The RGS results file (rgs.root) has one row per cut-point with the cut
+#   values and, for each sample, the weighted count (count_*) and fraction
+#   (fraction_*) of events that pass the cut-point. Here the columns are
+#   loaded as arrays, a figure of merit is computed for all cut-points in
+#   one expression and the best k cut-points are returned.
+#
+# Created: 17-Oct-2026 HATS@LPC
+#------------------------------------------------------------------------------
+import os, sys
+import numpy as np
+from columnutil import readTree
+#------------------------------------------------------------------------------
+def readResults(filename, treename='RGS',
+                names=('count_s', 'count_b', 'fraction_s', 'fraction_b'),
+                size=1):
+    '''
+    Return a dictionary of numpy arrays, one per name, from the RGS results
+    file. A name can be any expression understood by TTree::Draw, e.g.,
+    "f_deltajj[1]" for the upper cut of a box cut. If the file is an HDF5
+    file, the names must be column names. If size > 1, the names are arrays
+    of the given size, e.g., the cuts of a ladder, and the arrays returned
+    have shape (nrows, size).
+    '''
+    return readTree(filename, treename, names, size)
+#------------------------------------------------------------------------------
+# figures of merit. s and b are arrays of weighted signal and background
+# counts.
+#------------------------------------------------------------------------------
+def poissonZ(s, b):
+    '''
+    Z = sign(LR) * sqrt(2*|LR|)
+    where LR = log(Poisson(s+b|s+b)/Poisson(s+b|b)). Z = 0 if b <= 1.
+    '''
+    s, b = np.broadcast_arrays(np.asarray(s, dtype=np.float64),
+                               np.asarray(b, dtype=np.float64))
+    Z  = np.zeros(s.shape)
+    ok = b > 1
+    s  = s[ok]
+    b  = b[ok]
+    LR = 2*((s+b)*np.log((s+b)/b)-s)
+    Z[ok] = np.sign(LR)*np.sqrt(np.abs(LR))
+    return Z
+
+def sOverRootB(s, b):
+    s, b = np.broadcast_arrays(np.asarray(s, dtype=np.float64),
+                               np.asarray(b, dtype=np.float64))
+    Z  = np.zeros(s.shape)
+    ok = b > 0
+    Z[ok] = s[ok]/np.sqrt(b[ok])
+    return Z
+
+def sOverRootSB(s, b):
+    s, b = np.broadcast_arrays(np.asarray(s, dtype=np.float64),
+                               np.asarray(b, dtype=np.float64))
+    Z  = np.zeros(s.shape)
+    ok = s + b > 0
+    Z[ok] = s[ok]/np.sqrt(s[ok]+b[ok])
+    return Z
+
+FIGURES_OF_MERIT = {'Z':           poissonZ,
+                    's/sqrt(b)':   sOverRootB,
+                    's/sqrt(s+b)': sOverRootSB}
+#------------------------------------------------------------------------------
+def bestCutPoints(values, k=1):
+    '''
+    Return the row numbers of the k largest values, in decreasing order of
+    value. Ties are broken in favor of the lower row number.
+    '''
+    values = np.asarray(values)
+    k = min(k, len(values))
+    if k <= 0: return np.empty(0, dtype=np.intp)
+    if k < len(values):
+        # k-th largest value; of the rows tied with it, keep the first ones
+        kth = -np.partition(-values, k-1)[k-1]
+        above = np.flatnonzero(values > kth)
+        tied  = np.flatnonzero(values == kth)[:k-len(above)]
+        rows  = np.concatenate((above, tied))
+    else:
+        rows = np.arange(len(values))
+    order = np.argsort(-values[rows], kind='mergesort')
+    return rows[order]
+#------------------------------------------------------------------------------
+def scan(filename, treename='RGS', k=1, fom='Z', suffixes=('_s', '_b')):
+    '''
+    Compute the figure of merit fom for every cut-point in the RGS results
+    file and return (values, rows), where rows are the row numbers of the
+    k best cut-points in decreasing order of the figure of merit, and
+    values is a dictionary containing the figure of merit (key fom) and
+    the count and fraction columns.
+    '''
+    sig, bkg = suffixes
+    names = ['count%s' % sig, 'count%s' % bkg,
+             'fraction%s' % sig, 'fraction%s' % bkg]
+    values = readResults(filename, treename, names)
+    values[fom] = FIGURES_OF_MERIT[fom](values['count%s' % sig],
+                                        values['count%s' % bkg])
+    return (values, bestCutPoints(values[fom], k))
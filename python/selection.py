@@ -0,0 +1,345 @@
+#------------------------------------------------------------------------------
+# File: selection.py
+# Description: compile selection strings into vectorized numpy functions.
+#
+#   A selection is written as a ROOT cut (TCut) string, e.g.,
+#
+#     "f_massjj > 0 && abs(f_deltajj) < 4"
+#     "110 <= f_mass4l <= 136"
+#
+#   and is parsed once into a tree of numpy operations. Supported are
+#   numbers, column names, the operators ! - * / + < <= > >= == != && ||
+#   (with their C precedence), parentheses and the functions abs, fabs,
+#   TMath::Abs, sqrt, exp and log. As in Python, a chain of comparisons,
+#   a < b < c, means a < b && b < c.
+#
+#     select = compileSelection("f_massjj > 0")
+#     select.names                  # columns used: ['f_massjj']
+#     mask = select(columns)        # boolean array
+#
+#   The selection can also be evaluated on intervals: given the minimum
+#   and maximum of each column over a chunk of rows, select.decide(stats)
+#   returns True if every row of the chunk passes, False if none does and
+#   None if the rows must be examined one by one.
+#
+# Created: 17-Oct-2026 HATS@LPC
+#------------------------------------------------------------------------------
+import os, sys, re
+import numpy as np
+#------------------------------------------------------------------------------
+TOKENS = re.compile(r'''\s*(?:
+    (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?) |
+    (?P<name>[A-Za-z_]\w*(?:::\w+)?) |
+    (?P<op>&&|\|\||==|!=|<=|>=|<|>|!|\+|-|\*|/|\(|\)|,)
+    )''', re.X)
+
+FUNCTIONS = {'abs':        (np.abs,  'abs'),
+             'fabs':       (np.abs,  'abs'),
+             'TMath::Abs': (np.abs,  'abs'),
+             'sqrt':       (np.sqrt, 'increasing'),
+             'exp':        (np.exp,  'increasing'),
+             'log':        (np.log,  'increasing')}
+
+COMPARISONS = {'<':  np.less,
+               '<=': np.less_equal,
+               '>':  np.greater,
+               '>=': np.greater_equal,
+               '==': np.equal,
+               '!=': np.not_equal}
+
+ARITHMETIC  = {'+': np.add,
+               '-': np.subtract,
+               '*': np.multiply,
+               '/': np.divide}
+
+UNKNOWN = (-np.inf, np.inf)
+#------------------------------------------------------------------------------
+def tokenize(expr):
+    tokens = []
+    position = 0
+    expr = expr.rstrip()
+    while position < len(expr):
+        m = TOKENS.match(expr, position)
+        if m is None or m.end() == position:
+            sys.exit('** selection: bad character at "%s" in "%s"' % \
+                     (expr[position:], expr))
+        position = m.end()
+        if m.group('number') is not None:
+            tokens.append(('number', float(m.group('number'))))
+        elif m.group('name') is not None:
+            tokens.append(('name', m.group('name')))
+        else:
+            tokens.append(('op', m.group('op')))
+    return tokens
+#------------------------------------------------------------------------------
+class Parser:
+    '''
+    Recursive descent parser. Each node of the tree is a tuple:
+      ('number', value)           ('name', column)
+      ('call', function, node)    ('not', node)    ('neg', node)
+      ('and', a, b)               ('or', a, b)
+      ('compare', op, a, b)       ('arith', op, a, b)
+    '''
+    def __init__(self, expr):
+        self.expr   = expr
+        self.tokens = tokenize(expr)
+        self.pos    = 0
+
+    def error(self, message):
+        sys.exit('** selection: %s in "%s"' % (message, self.expr))
+
+    def peek(self):
+        if self.pos < len(self.tokens): return self.tokens[self.pos]
+        return (None, None)
+
+    def accept(self, *ops):
+        kind, value = self.peek()
+        if kind == 'op' and value in ops:
+            self.pos += 1
+            return value
+        return None
+
+    def parse(self):
+        node = self.orExpr()
+        if self.pos < len(self.tokens):
+            self.error('unexpected "%s"' % str(self.tokens[self.pos][1]))
+        return node
+
+    def orExpr(self):
+        node = self.andExpr()
+        while self.accept('||'):
+            node = ('or', node, self.andExpr())
+        return node
+
+    def andExpr(self):
+        node = self.compare()
+        while self.accept('&&'):
+            node = ('and', node, self.compare())
+        return node
+
+    def compare(self):
+        node = self.sum()
+        op = self.accept(*COMPARISONS.keys())
+        if op is None: return node
+        # a < b < c means a < b && b < c
+        terms = []
+        left  = node
+        while op is not None:
+            right = self.sum()
+            terms.append(('compare', op, left, right))
+            left = right
+            op = self.accept(*COMPARISONS.keys())
+        node = terms[0]
+        for term in terms[1:]:
+            node = ('and', node, term)
+        return node
+
+    def sum(self):
+        node = self.product()
+        op = self.accept('+', '-')
+        while op is not None:
+            node = ('arith', op, node, self.product())
+            op = self.accept('+', '-')
+        return node
+
+    def product(self):
+        node = self.unary()
+        op = self.accept('*', '/')
+        while op is not None:
+            node = ('arith', op, node, self.unary())
+            op = self.accept('*', '/')
+        return node
+
+    def unary(self):
+        if self.accept('!'): return ('not', self.unary())
+        if self.accept('-'): return ('neg', self.unary())
+        if self.accept('+'): return self.unary()
+        return self.primary()
+
+    def primary(self):
+        kind, value = self.peek()
+        if kind == 'number':
+            self.pos += 1
+            return ('number', value)
+        if kind == 'name':
+            self.pos += 1
+            if self.accept('('):
+                if value not in FUNCTIONS:
+                    self.error('unknown function %s' % value)
+                node = self.orExpr()
+                if not self.accept(')'): self.error('missing )')
+                return ('call', value, node)
+            return ('name', value)
+        if self.accept('('):
+            node = self.orExpr()
+            if not self.accept(')'): self.error('missing )')
+            return node
+        if kind is None: self.error('unexpected end')
+        self.error('unexpected "%s"' % value)
+#------------------------------------------------------------------------------
+def _names(node, names):
+    if node[0] == 'name':
+        if node[1] not in names: names.append(node[1])
+    for child in node[1:]:
+        if type(child) == type(()): _names(child, names)
+    return names
+#------------------------------------------------------------------------------
+def _compile(node):
+    # return a function of the dictionary of columns
+    kind = node[0]
+    if kind == 'number':
+        value = node[1]
+        return lambda c: value
+    if kind == 'name':
+        name = node[1]
+        return lambda c: c[name]
+    if kind == 'call':
+        f = FUNCTIONS[node[1]][0]
+        a = _compile(node[2])
+        return lambda c: f(a(c))
+    if kind == 'not':
+        a = _compile(node[1])
+        return lambda c: np.logical_not(a(c))
+    if kind == 'neg':
+        a = _compile(node[1])
+        return lambda c: np.negative(a(c))
+    a = _compile(node[2 if kind in ['compare', 'arith'] else 1])
+    b = _compile(node[3 if kind in ['compare', 'arith'] else 2])
+    if kind == 'and':
+        return lambda c: np.logical_and(a(c), b(c))
+    if kind == 'or':
+        return lambda c: np.logical_or(a(c), b(c))
+    if kind == 'compare':
+        f = COMPARISONS[node[1]]
+    else:
+        f = ARITHMETIC[node[1]]
+    return lambda c: f(a(c), b(c))
+#------------------------------------------------------------------------------
+def _bounds(node, stats):
+    # return (lo, hi) bounds of the node given (min, max) of each column.
+    # Boolean values are 0 or 1.
+    kind = node[0]
+    if kind == 'number':
+        return (node[1], node[1])
+    if kind == 'name':
+        lo, hi = stats.get(node[1], UNKNOWN)
+        if np.isnan(lo) or np.isnan(hi): return UNKNOWN
+        return (lo, hi)
+    if kind == 'call':
+        lo, hi = _bounds(node[2], stats)
+        how = FUNCTIONS[node[1]][1]
+        if how == 'abs':
+            if lo >= 0: return (lo, hi)
+            if hi <= 0: return (-hi, -lo)
+            return (0.0, max(-lo, hi))
+        if node[1] in ['sqrt', 'log'] and lo <= 0:
+            return UNKNOWN
+        f = FUNCTIONS[node[1]][0]
+        return (f(lo), f(hi))
+    if kind == 'neg':
+        lo, hi = _bounds(node[1], stats)
+        return (-hi, -lo)
+    if kind in ['not', 'and', 'or']:
+        a = _truth(node[1], stats)
+        if kind == 'not': return (1-a[1], 1-a[0])
+        b = _truth(node[2], stats)
+        if kind == 'and': return (a[0]*b[0], a[1]*b[1])
+        return (max(a[0], b[0]), max(a[1], b[1]))
+
+    op = node[1]
+    alo, ahi = _bounds(node[2], stats)
+    blo, bhi = _bounds(node[3], stats)
+    if kind == 'compare':
+        if op in ['>', '>=']:
+            # a > b is b < a
+            alo, ahi, blo, bhi = blo, bhi, alo, ahi
+            op = {'>': '<', '>=': '<='}[op]
+        if op == '<':
+            if ahi < blo:  return (1, 1)
+            if alo >= bhi: return (0, 0)
+        elif op == '<=':
+            if ahi <= blo: return (1, 1)
+            if alo > bhi:  return (0, 0)
+        else:
+            same = alo == ahi == blo == bhi
+            apart = ahi < blo or bhi < alo
+            if op == '!=': same, apart = apart, same
+            if same:  return (1, 1)
+            if apart: return (0, 0)
+        return (0, 1)
+
+    if op == '+': return (alo + blo, ahi + bhi)
+    if op == '-': return (alo - bhi, ahi - blo)
+    if op == '/':
+        if blo <= 0 <= bhi: return UNKNOWN
+        blo, bhi = 1.0/bhi, 1.0/blo
+    p = [alo*blo, alo*bhi, ahi*blo, ahi*bhi]
+    if np.isnan(p).any(): return UNKNOWN
+    return (min(p), max(p))
+
+def _truth(node, stats):
+    # bounds of a value used as a boolean (non-zero is true)
+    lo, hi = _bounds(node, stats)
+    if lo > 0 or hi < 0: return (1, 1)
+    if lo == hi == 0:    return (0, 0)
+    return (0, 1)
+#------------------------------------------------------------------------------
+class Selection:
+    '''
+    A selection string compiled into a function of a dictionary of columns.
+    An empty selection selects everything.
+    '''
+    def __init__(self, expr):
+        self.expr = expr or ''
+        if self.expr.strip() == '':
+            self.tree = None
+            self.names = []
+            self.function = None
+        else:
+            self.tree  = Parser(self.expr).parse()
+            self.names = _names(self.tree, [])
+            self.function = _compile(self.tree)
+
+    def __call__(self, columns, nrows=None):
+        '''
+        Return a boolean array with the rows that pass the selection.
+        '''
+        if nrows is None:
+            nrows = len(columns[self.names[0]]) if self.names else 0
+        if self.tree is None:
+            return np.ones(nrows, dtype=bool)
+        mask = self.function(columns)
+        if np.ndim(mask) == 0:
+            # the selection does not depend on any column
+            return np.full(nrows, bool(mask), dtype=bool)
+        return np.asarray(mask, dtype=bool)
+
+    def decide(self, stats):
+        '''
+        Given stats, a dictionary of (min, max) of each column, return True
+        if all rows pass, False if no row passes and None otherwise.
+        '''
+        if self.tree is None: return True
+        lo, hi = _truth(self.tree, stats)
+        if lo == 1: return True
+        if hi == 0: return False
+        return None
+
+    def mask(self, columns, nrows):
+        '''
+        Return a boolean array with the nrows rows that pass the selection.
+        (The columns are in memory, so they are not first scanned for their
+        minimum and maximum; see decide and columncache.readSelected.)
+        '''
+        if nrows == 0: return np.zeros(0, dtype=bool)
+        return self(columns, nrows)
+#------------------------------------------------------------------------------
+_compiled = {}
+def compileSelection(expr):
+    '''
+    Return the compiled selection, compiling each string only once.
+    '''
+    expr = expr or ''
+    if expr not in _compiled:
+        _compiled[expr] = Selection(expr)
+    return _compiled[expr]
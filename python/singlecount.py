@@ -0,0 +1,438 @@
+#------------------------------------------------------------------------------
+# File: singlecount.py
+# Description: profile likelihood of the single count model of 5_analysis.
+#
+#   The model (see 5_analysis/createworkspace.py) is the product
+#
+#     Poisson(N  | mu*s + b1 + b2)
+#     Poisson(Q1 | q1*b1) Poisson(Q2 | q2*b2) Poisson(Q | q*s)
+#
+#   where Q = (S/dS)^2 and q = S/dS^2, and likewise for the backgrounds.
+#   For fixed mu, setting the derivatives of -log L with respect to b1, b2
+#   and s to zero gives, with r = 1 - N/n,
+#
+#     b1 = Q1/(q1 + r),  b2 = Q2/(q2 + r),  s = Q/(q + mu*r)
+#
+#   so that the profile reduces to one equation in r, whose left-hand side
+#   decreases monotonically,
+#
+#     (1 - r) * (mu*s(r) + b1(r) + b2(r)) = N
+#
+#   This is solved for all values of mu (and N, ...) at once by Newton's
+#   method, safeguarded by bisection. The maximum likelihood estimate is
+#   in closed form: r = 0, that is, mu_hat = (N - B1 - B2)/S, unless that
+#   is outside the range of mu.
+#
+#     model = SingleCount(N, B1, dB1, B2, dB2, S, dS)
+#     mu, q = model.scan()            # q(mu) = -2 log Lp(mu)/Lp(mu_hat)
+#     lower, upper = model.interval(0.683)
+#     limit = model.upperLimit(0.95)
+#     Z     = model.significance()
+#
+#   The ranges of the nuisance parameters are not imposed; only that they
+#   be positive.
+#
+#   Bayesian analysis: with the flat prior of the workspace, the nuisance
+#   parameters are gamma distributed, e.g., s ~ Gamma(Q+1, q), and each
+#   integral of a Poisson over a gamma is a negative binomial. Since a
+#   Poisson of mu*s + b1 + b2 is a convolution of three Poissons, the
+#   marginal likelihood of mu is, exactly,
+#
+#     p(N | mu) = sum_k NB(k | Q+1, q/(q+mu)) NB1*NB2(N-k)
+#
+#   which is computed for all mu of a fine grid at once:
+#
+#     posterior = model.posterior()
+#     lower, upper = posterior.central(0.683)
+#     limit = posterior.upperLimit(0.95)
+#     lower, upper = posterior.shortest(0.683)
+#
+# Created: 17-Oct-2026 HATS@LPC
+#------------------------------------------------------------------------------
+import os, sys
+from math import erf, sqrt
+import numpy as np
+#------------------------------------------------------------------------------
+PARAMETERS = ['N', 'B1', 'dB1', 'B2', 'dB2', 'S', 'dS']
+NOMINAL    = {'N': 12, 'B1': 0.04, 'dB1': 0.04, 'B2': 5.3, 'dB2': 0.53,
+              'S': 6.7, 'dS': 0.67}
+NAMESIZE = 32     # characters of a name in a table of scenarios
+NPOINTS  = 4001   # number of points in a scan of mu
+MAXITER  = 100    # maximum number of Newton (or bisection) steps
+TOLERANCE= 1e-12  # tolerance on r
+#------------------------------------------------------------------------------
+def normalQuantile(p):
+    '''
+    Return x such that P(X < x) = p for a standard normal variate X.
+    '''
+    if not 0 < p < 1:
+        sys.exit('** normalQuantile: p = %s not in (0, 1)' % p)
+    lo, hi = -40.0, 40.0
+    for i in xrange(200):
+        x = 0.5 * (lo + hi)
+        if 0.5 * (1 + erf(x / sqrt(2))) < p:
+            lo = x
+        else:
+            hi = x
+    return 0.5 * (lo + hi)
+
+def chi2Quantile1(CL):
+    '''
+    Return the quantile of the chi-squared density with one degree of
+    freedom, e.g., 1 for CL = 0.683.
+    '''
+    return normalQuantile(0.5 * (1 + CL))**2
+#------------------------------------------------------------------------------
+def effectiveCounts(B, dB):
+    '''
+    Return the effective count Q = (B/dB)^2 and scale factor q = B/dB^2 of
+    the estimate B +/- dB.
+    '''
+    B  = np.asarray(B,  dtype=np.float64)
+    dB = np.asarray(dB, dtype=np.float64)
+    return ((B/dB)**2, B/dB**2)
+#------------------------------------------------------------------------------
+def _xlogy(x, y):
+    # x*log(y), taken to be 0 if x = 0
+    return np.where(x > 0, x*np.log(np.where(x > 0, y, 1)), 0.0)
+
+def nll(mu, s, b1, b2, N, Q1, q1, Q2, q2, Q, q):
+    '''
+    Return -log L of the model, up to terms that depend only on the data.
+    '''
+    n = mu*s + b1 + b2
+    y = n - _xlogy(N, n)
+    y = y + q1*b1 - _xlogy(Q1, b1)
+    y = y + q2*b2 - _xlogy(Q2, b2)
+    y = y + q *s  - _xlogy(Q,  s)
+    return y
+
+def mle(N, Q1, q1, Q2, q2, Q, q, mumin=0.0, mumax=4.0):
+    '''
+    Return the maximum likelihood estimate of mu, in closed form:
+    mu_hat = (N - B1 - B2)/S, where B1 = Q1/q1, etc., limited to the range
+    [mumin, mumax]. The arguments may be arrays.
+    '''
+    N, Q1, q1, Q2, q2, Q, q = [np.asarray(x, dtype=np.float64)
+                               for x in (N, Q1, q1, Q2, q2, Q, q)]
+    S = Q/q
+    with np.errstate(divide='ignore', invalid='ignore'):
+        muhat = np.where(S > 0, (N - Q1/q1 - Q2/q2)/S, mumin)
+    return np.clip(muhat, mumin, mumax)
+
+def profile(mu, N, Q1, q1, Q2, q2, Q, q):
+    '''
+    Return (nll, s, b1, b2), the minimum over the nuisance parameters of
+    -log L and the values of s, b1 and b2 at the minimum, for every value
+    of the arguments, which are broadcast against each other.
+    '''
+    mu, N, Q1, q1, Q2, q2, Q, q = \
+        np.broadcast_arrays(*[np.asarray(x, dtype=np.float64)
+                              for x in (mu, N, Q1, q1, Q2, q2, Q, q)])
+
+    def h(r):
+        # (1 - r) n(r) - N and its derivative
+        a  = Q/(q + mu*r)
+        c1 = Q1/(q1 + r)
+        c2 = Q2/(q2 + r)
+        n  = mu*a + c1 + c2
+        dn = -(mu*mu*a/(q + mu*r) + c1/(q1 + r) + c2/(q2 + r))
+        return ((1 - r)*n - N, (1 - r)*dn - n)
+
+    # the root lies in (lo, hi]; h decreases from +infinity to -N
+    lo = np.maximum(-q1, -q2)
+    lo = np.where(mu > 0, np.maximum(lo, -q/np.where(mu > 0, mu, 1)), lo)
+    hi = np.ones(mu.shape)
+    r  = np.zeros(mu.shape) # lo < 0, so start at the MLE value of r
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for i in xrange(MAXITER):
+            f, df = h(r)
+            lo = np.where(f > 0, r, lo)
+            hi = np.where(f > 0, hi, r)
+            step = np.where(df < 0, f/df, 0)
+            rnew = r - step
+            # bisect if the Newton step leaves the bracket
+            bad  = ~((rnew > lo) & (rnew <= hi)) | ~np.isfinite(rnew)
+            rnew = np.where(bad, 0.5*(lo + hi), rnew)
+            done = np.abs(rnew - r) < TOLERANCE
+            r = rnew
+            if done.all(): break
+
+    s  = Q/(q + mu*r)
+    b1 = Q1/(q1 + r)
+    b2 = Q2/(q2 + r)
+    return (nll(mu, s, b1, b2, N, Q1, q1, Q2, q2, Q, q), s, b1, b2)
+#------------------------------------------------------------------------------
+def logNegativeBinomial(k, alpha, p):
+    '''
+    Return the log of the negative binomial probability of k = 0, 1, ...
+    (a 1-D array), that is, of a Poisson count whose mean is gamma
+    distributed with shape alpha and rate beta, where p = beta/(beta+1).
+    p may be an array, in which case the result has shape p.shape + k.shape.
+    '''
+    k = np.asarray(k, dtype=np.float64)
+    p = np.asarray(p, dtype=np.float64)[..., np.newaxis]
+    # log Gamma(k+alpha)/(Gamma(alpha) k!), by recurrence in k
+    i = np.arange(int(k.max()) if len(k) else 0)
+    c = np.concatenate(([0.0], np.cumsum(np.log((alpha + i)/(i + 1)))))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = c[k.astype(int)] + alpha*np.log(p)
+        y = y + np.where(k > 0, k*np.log(1 - p), 0.0)
+    return y
+
+def logsumexp(y, axis=-1):
+    ymax = np.max(y, axis=axis, keepdims=True)
+    ymax = np.where(np.isfinite(ymax), ymax, 0.0)
+    with np.errstate(divide='ignore'):
+        return np.log(np.sum(np.exp(y - ymax), axis=axis)) + \
+            np.squeeze(ymax, axis)
+#------------------------------------------------------------------------------
+class Posterior:
+    '''
+    Posterior density of mu, tabulated at the values mu (a fine, uniform
+    grid), from which intervals at any confidence level are computed.
+    '''
+    def __init__(self, mu, logp):
+        self.mu = np.asarray(mu, dtype=np.float64)
+        p = np.exp(logp - np.max(logp))
+        # normalize with the trapezoidal rule
+        area = 0.5*(p[1:] + p[:-1])*np.diff(self.mu)
+        self.cdf = np.concatenate(([0.0], np.cumsum(area)))
+        self.density = p / self.cdf[-1]
+        self.cdf /= self.cdf[-1]
+
+    def quantile(self, P):
+        '''
+        Return the value of mu below which the posterior probability is P.
+        '''
+        return float(np.interp(P, self.cdf, self.mu))
+
+    def central(self, CL=0.683):
+        '''
+        Return (lower, upper), with probability (1-CL)/2 on either side.
+        '''
+        return (self.quantile(0.5*(1 - CL)), self.quantile(0.5*(1 + CL)))
+
+    def upperLimit(self, CL=0.95):
+        return self.quantile(CL)
+
+    def shortest(self, CL=0.683):
+        '''
+        Return (lower, upper), the highest posterior density interval with
+        probability CL (for a density with a single maximum).
+        '''
+        order = np.argsort(-self.density, kind='mergesort')
+        dmu = np.gradient(self.mu)
+        mass = np.cumsum(self.density[order] * dmu[order])
+        m = min(np.searchsorted(mass, CL), len(order)-1)
+        inside = order[:m+1]
+        return (self.mu[inside.min()], self.mu[inside.max()])
+#------------------------------------------------------------------------------
+def crossings(mu, q, threshold):
+    '''
+    Return (lower, upper), the values of mu, linearly interpolated, at which
+    q(mu) crosses threshold on either side of its minimum. If q stays below
+    threshold on one side, the corresponding end of the scan is returned.
+    '''
+    k = int(np.argmin(q))
+    below = q <= threshold
+    # last point above threshold to the left of the minimum
+    left = np.flatnonzero(~below[:k+1])
+    if len(left) == 0:
+        lower = mu[0]
+    else:
+        i = left[-1]
+        lower = mu[i] + (threshold - q[i])*(mu[i+1] - mu[i]) / \
+            (q[i+1] - q[i])
+    right = np.flatnonzero(~below[k:])
+    if len(right) == 0:
+        upper = mu[-1]
+    else:
+        i = k + right[0]
+        upper = mu[i-1] + (threshold - q[i-1])*(mu[i] - mu[i-1]) / \
+            (q[i] - q[i-1])
+    return (lower, upper)
+#------------------------------------------------------------------------------
+class SingleCount:
+    '''
+    Profile likelihood analysis of the observed count N given the estimates
+    B1 +/- dB1, B2 +/- dB2 of the backgrounds and S +/- dS of the signal.
+    The signal strength mu is in [mumin, mumax].
+    '''
+    def __init__(self, N, B1, dB1, B2, dB2, S, dS, mumin=0.0, mumax=4.0):
+        self.N = N
+        self.B1, self.dB1 = B1, dB1
+        self.B2, self.dB2 = B2, dB2
+        self.S,  self.dS  = S,  dS
+        self.mumin = mumin
+        self.mumax = mumax
+        Q1, q1 = effectiveCounts(B1, dB1)
+        Q2, q2 = effectiveCounts(B2, dB2)
+        Q,  q  = effectiveCounts(S,  dS)
+        self.counts = (Q1, q1, Q2, q2, Q, q)
+        self.best = None
+
+    def profile(self, mu):
+        '''
+        Return (nll, s, b1, b2) at each value of mu (see profile).
+        '''
+        return profile(mu, self.N, *self.counts)
+
+    def fit(self):
+        '''
+        Return (mu_hat, s, b1, b2, nll) at the maximum of the likelihood.
+        '''
+        if self.best is None:
+            muhat = float(mle(self.N, *(self.counts +
+                                        (self.mumin, self.mumax))))
+            y, s, b1, b2 = self.profile(muhat)
+            self.best = (muhat, float(s), float(b1), float(b2), float(y))
+        return self.best
+
+    def scan(self, mu=None, npoints=NPOINTS):
+        '''
+        Return (mu, q), where q = 2*(nll(mu) - nll(mu_hat)) at each value of
+        mu (by default, npoints values spanning the range of mu).
+        '''
+        if mu is None:
+            mu = np.linspace(self.mumin, self.mumax, npoints)
+        mu = np.asarray(mu, dtype=np.float64)
+        y = self.profile(mu)[0]
+        return (mu, np.maximum(2*(y - self.fit()[-1]), 0.0))
+
+    def interval(self, CL=0.683, scan=None):
+        '''
+        Return (lower, upper), the profile likelihood interval at the given
+        confidence level: the values of mu at which q(mu) crosses the
+        chi-squared quantile of CL.
+        '''
+        if scan is None: scan = self.scan()
+        mu, q = scan
+        return crossings(mu, q, chi2Quantile1(CL))
+
+    def upperLimit(self, CL=0.95, scan=None):
+        '''
+        Return the upper limit on mu at the given confidence level, namely,
+        the upper end of the central interval at confidence level 2*CL-1.
+        '''
+        return self.interval(2*CL - 1, scan)[1]
+
+    def significance(self):
+        '''
+        Return Z = sqrt(q(0)).
+        '''
+        mu, q = self.scan([0.0])
+        return sqrt(q[0])
+
+    def posterior(self, npoints=NPOINTS):
+        '''
+        Return the Posterior of mu, for a flat prior in mu, s, b1 and b2,
+        computed at npoints values spanning the range of mu.
+        '''
+        N = int(round(self.N))
+        Q1, q1, Q2, q2, Q, q = [float(x) for x in self.counts]
+        mu = np.linspace(self.mumin, self.mumax, npoints)
+        k  = np.arange(N+1)
+        # backgrounds: convolution of the two negative binomials
+        b  = np.convolve(np.exp(logNegativeBinomial(k, Q1+1, q1/(q1+1))),
+                         np.exp(logNegativeBinomial(k, Q2+1, q2/(q2+1))))
+        with np.errstate(divide='ignore'):
+            logb = np.log(b[:N+1])[::-1] # log NB1*NB2(N-k)
+        # signal: negative binomial in k for each mu
+        logs = logNegativeBinomial(k, Q+1, q/(q + mu))
+        return Posterior(mu, logsumexp(logs + logb))
+
+    def analyze(self, CL=0.683, CLlimit=0.95, npoints=NPOINTS):
+        '''
+        Return a dictionary with the results of the analysis, all derived
+        from one scan of mu: the fit (mu_hat, s, b1, b2), the interval
+        (lower, upper) at CL, the upper limit (limit) at CLlimit, Z and
+        the scan itself (mu, q).
+        '''
+        mu, q = self.scan(npoints=npoints)
+        muhat, s, b1, b2, y = self.fit()
+        lower, upper = crossings(mu, q, chi2Quantile1(CL))
+        limit = crossings(mu, q, chi2Quantile1(2*CLlimit - 1))[1]
+        q0 = q[0] if self.mumin == 0 else self.scan([0.0])[1][0]
+        return {'mu_hat': muhat, 's': s, 'b1': b1, 'b2': b2,
+                'lower': lower, 'upper': upper, 'limit': limit,
+                'Z': sqrt(q0), 'mu': mu, 'q': q}
+#------------------------------------------------------------------------------
+def encodeNames(names, size=NAMESIZE):
+    '''
+    Return the scenario names as an array of shape (len(names), size) of
+    character codes, padded with zeros, which can be written as a column
+    of a table (see columnutil.writeColumns).
+    '''
+    codes = np.zeros((len(names), size))
+    for row, name in enumerate(names):
+        if len(name) > size:
+            sys.exit('** scenario name %s is longer than %d characters' % \
+                     (name, size))
+        codes[row, :len(name)] = [ord(c) for c in name]
+    return codes
+#------------------------------------------------------------------------------
+def decodeNames(codes):
+    '''
+    Return the list of names encoded by encodeNames.
+    '''
+    return [''.join([chr(int(c)) for c in row if c > 0])
+            for row in np.asarray(codes)]
+#------------------------------------------------------------------------------
+def readScenarios(filename):
+    '''
+    Return (names, params), where names is a list of scenario names and
+    params a dictionary of arrays, one per name in PARAMETERS, read from a
+    table of scenarios: either a text file with a header line of column
+    names, e.g.,
+
+      # name     N    B1    dB1   B2    dB2   S     dS
+      nominal    12   0.04  0.04  5.3   0.53  6.7   0.67
+      tight      8    0.02  0.02  2.9   0.30  5.1   0.51
+
+    or a table (tree or dataset "scenarios" of a .root or .h5 file) of such
+    columns, in which the names are a column of NAMESIZE character codes
+    (see encodeNames). createworkspace.py writes such tables only as .h5
+    files; a .root table must be written otherwise, e.g., with
+    columnutil.writeColumns. Missing columns of a text file take their
+    NOMINAL values.
+    '''
+    if not os.path.exists(filename):
+        sys.exit("** can't open scenarios file %s" % filename)
+    if filename.endswith('.h5') or filename.endswith('.root'):
+        from columnutil import readTree
+        params = readTree(filename, 'scenarios', PARAMETERS)
+        names  = decodeNames(readTree(filename, 'scenarios', ['name'],
+                                      NAMESIZE)['name'])
+        return (names, params)
+
+    header = None
+    rows = []
+    for line in open(filename):
+        t = line.split()
+        if len(t) == 0: continue
+        if t[0] == '#':
+            if header is None: header = t[1:]
+            continue
+        if t[0][0] == '#':
+            if header is None: header = [t[0][1:]] + t[1:]
+            continue
+        rows.append(t)
+    if header is None or header[0] != 'name':
+        sys.exit('** %s: first line must be "# name <parameters...>"' % \
+                 filename)
+    for name in header[1:]:
+        if name not in PARAMETERS:
+            sys.exit('** %s: unknown parameter %s' % (filename, name))
+    names  = []
+    params = dict([(name, []) for name in PARAMETERS])
+    for t in rows:
+        if len(t) != len(header):
+            sys.exit('** %s: bad line "%s"' % (filename, ' '.join(t)))
+        names.append(t[0])
+        values = dict(zip(header[1:], [float(x) for x in t[1:]]))
+        for name in PARAMETERS:
+            params[name].append(values.get(name, NOMINAL[name]))
+    for name in PARAMETERS:
+        params[name] = np.array(params[name], dtype=np.float64)
+    return (names, params)
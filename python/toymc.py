@@ -0,0 +1,137 @@
+#------------------------------------------------------------------------------
+# File: toymc.py
+# Description: pseudo-experiments (toys) for the single count model of
+#              5_analysis.
+#
+#   Each toy is a set of observations (N, Q1, Q2, Q) drawn from the model
+#   (see singlecount.py) for given true values of mu, s, b1 and b2. The
+#   toys are drawn as arrays and all toys of a batch are fitted at once:
+#   mu_hat is in closed form, q(mu) at the true mu and at mu = 0 are two
+#   vectorized profiles, and the upper limit is found by a vectorized
+#   bisection in mu. The batches are spread over a pool of processes:
+#
+#     toys    = ToyMC(model, seed=42)
+#     results = toys.run(1000000, mu=1.0, nworkers=8)
+#     summary = toys.summarize(results)
+#
+#   Batch k uses its own random stream, seeded by (seed, k), so that the
+#   results do not depend on the number of processes.
+#
+# Created: 17-Oct-2026 HATS@LPC
+#------------------------------------------------------------------------------
+import os, sys
+from math import erf, sqrt
+import numpy as np
+from parallel import parallelMap, cpu_count
+from singlecount import profile, mle, chi2Quantile1
+#------------------------------------------------------------------------------
+BATCHSIZE = 100000 # toys per batch
+NBISECT   = 40     # bisection steps for each upper limit
+#------------------------------------------------------------------------------
+def generateToys(ntoys, random, mu, s, b1, b2, q1, q2, q):
+    '''
+    Return a dictionary of ntoys values of each observation (N, Q1, Q2, Q)
+    drawn, with the numpy RandomState random, from the model with the true
+    values mu, s, b1 and b2 and the scale factors q1, q2 and q.
+    '''
+    return {'N':  random.poisson(mu*s + b1 + b2, ntoys).astype(np.float64),
+            'Q1': random.poisson(q1*b1, ntoys).astype(np.float64),
+            'Q2': random.poisson(q2*b2, ntoys).astype(np.float64),
+            'Q':  random.poisson(q*s,   ntoys).astype(np.float64)}
+#------------------------------------------------------------------------------
+def fitToys(toys, q1, q2, q, mutrue, mumin=0.0, mumax=4.0, CLlimit=0.95):
+    '''
+    Fit every toy and return a dictionary of arrays:
+      mu_hat   the maximum likelihood estimate of mu
+      q0       q(0), from which Z = sqrt(q0)
+      qtrue    q(mutrue), which tells whether an interval covers mutrue
+      limit    the upper limit on mu at confidence level CLlimit
+      capped   True if q(mumax) is below the threshold, in which case the
+               limit is not found in [mumin, mumax] and is set to mumax
+    '''
+    args = (toys['N'], toys['Q1'], q1, toys['Q2'], q2, toys['Q'], q)
+    muhat = mle(*(args + (mumin, mumax)))
+    yhat  = profile(muhat, *args)[0]
+    q0    = np.maximum(2*(profile(0.0,    *args)[0] - yhat), 0.0)
+    qtrue = np.maximum(2*(profile(mutrue, *args)[0] - yhat), 0.0)
+
+    # upper limit: q(mu) = threshold for mu > mu_hat, where q increases
+    threshold = chi2Quantile1(2*CLlimit - 1)
+    capped = 2*(profile(float(mumax), *args)[0] - yhat) <= threshold
+    lo = muhat.copy()
+    hi = np.full(len(muhat), float(mumax))
+    for i in xrange(NBISECT):
+        mid = 0.5*(lo + hi)
+        above = 2*(profile(mid, *args)[0] - yhat) > threshold
+        hi = np.where(above, mid, hi)
+        lo = np.where(above, lo, mid)
+    limit = np.where(capped, float(mumax), 0.5*(lo + hi))
+    return {'mu_hat': muhat, 'q0': q0, 'qtrue': qtrue,
+            'limit': limit, 'capped': capped}
+#------------------------------------------------------------------------------
+def _runBatch(task, seed, truth, scales, mumin, mumax, CLlimit):
+    k, ntoys = task
+    random = np.random.RandomState([seed, k])
+    q1, q2, q = scales
+    toys = generateToys(ntoys, random,
+                        truth['mu'], truth['s'], truth['b1'], truth['b2'],
+                        q1, q2, q)
+    results = fitToys(toys, q1, q2, q, truth['mu'], mumin, mumax, CLlimit)
+    results['N'] = toys['N']
+    return results
+#------------------------------------------------------------------------------
+class ToyMC:
+    '''
+    Pseudo-experiments for the SingleCount model, whose estimates (B1, S,
+    ...) are, by default, the true values of the nuisance parameters.
+    '''
+    def __init__(self, model, seed=None, batchsize=BATCHSIZE):
+        self.model = model
+        Q1, q1, Q2, q2, Q, q = [float(x) for x in model.counts]
+        self.scales = (q1, q2, q)
+        if seed is None: seed = np.random.randint(0, 2**31-1)
+        self.seed = seed
+        self.batchsize = batchsize
+
+    def run(self, ntoys, mu=1.0, s=None, b1=None, b2=None, CLlimit=0.95,
+            nworkers=1):
+        '''
+        Generate and fit ntoys toys with the true values mu, s, b1 and b2,
+        in batches of at most batchsize toys, nworkers batches at a time.
+        Return a dictionary of arrays (see fitToys), plus the generated N.
+        '''
+        m = self.model
+        truth = {'mu': mu,
+                 's':  m.S  if s  is None else s,
+                 'b1': m.B1 if b1 is None else b1,
+                 'b2': m.B2 if b2 is None else b2}
+        sizes = [min(self.batchsize, ntoys - first)
+                 for first in xrange(0, ntoys, self.batchsize)]
+        tasks = list(enumerate(sizes))
+
+        batches = parallelMap(_runBatch, tasks, nworkers, seed=self.seed,
+                              truth=truth, scales=self.scales,
+                              mumin=m.mumin, mumax=m.mumax, CLlimit=CLlimit)
+
+        results = {}
+        for name in ['mu_hat', 'q0', 'qtrue', 'limit', 'capped', 'N']:
+            results[name] = np.concatenate([b[name] for b in batches]) \
+                if len(batches) > 0 else np.empty(0)
+        results['mutrue'] = mu
+        return results
+
+    def summarize(self, results, CL=0.683):
+        '''
+        Return a dictionary with the median Z (Z), the median upper limit
+        and its -2, -1, +1 and +2 sigma quantiles (limits), the fraction
+        of toys whose limit is capped at mumax (capped; the quantiles at
+        or above that fraction are then only lower bounds) and the fraction
+        of toys whose CL interval contains the true mu (coverage).
+        '''
+        P = [0.5*(1 + erf(k/sqrt(2))) for k in [-2, -1, 0, 1, 2]]
+        return {'Z':        float(np.median(np.sqrt(results['q0']))),
+                'limits':   np.percentile(results['limit'],
+                                          [100*p for p in P]),
+                'capped':   float(np.mean(results['capped'])),
+                'coverage': float(np.mean(results['qtrue'] <=
+                                          chi2Quantile1(CL)))}